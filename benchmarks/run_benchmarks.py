@@ -0,0 +1,180 @@
+# benchmarks/run_benchmarks.py
+# Suite de rendimiento: ejecuciones completas contra un servidor de APIs simulado y micro-benchmarks.
+# Uso: python benchmarks/run_benchmarks.py [--cities 5,100,1000] [--compare resultados_anteriores.json]
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from stub_server import StubServer, MONEDAS
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+WORKER = os.path.join(BENCH_DIR, "worker.py")
+
+TIMEZONES = [
+    "America/New_York", "Europe/London", "Asia/Tokyo", "America/Sao_Paulo", "Australia/Sydney",
+    "Europe/Madrid", "America/Mexico_City", "America/Bogota", "Asia/Kolkata", "Asia/Shanghai"
+]
+
+def write_catalog(path, n, seed=3):
+    """Catálogo sintético de `n` ciudades con coordenadas distintas"""
+    rnd = random.Random(seed)
+    monedas = list(MONEDAS)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["nombre", "lat", "lon", "moneda", "timezone"])
+        for i in range(n):
+            writer.writerow([
+                f"Ciudad {i}", round(rnd.uniform(-60, 70), 4), round(rnd.uniform(-180, 180), 4),
+                monedas[i % len(monedas)], TIMEZONES[i % len(TIMEZONES)]
+            ])
+
+def run_worker(args, cwd, env):
+    """Ejecuta el worker en un proceso aparte y retorna su resultado JSON"""
+    proceso = subprocess.run(
+        [sys.executable, WORKER] + args, cwd=cwd, env=env,
+        capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"worker {' '.join(args)} falló:\n{proceso.stderr[-2000:]}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+def base_env(extra=None):
+    """Entorno aislado: sin cache HTTP, detección de cambios ni archivo de log (logs/ es del proyecto)"""
+    env = dict(os.environ)
+    env.update({
+        "LOG_FILE": "false",
+        "CACHE_ENABLED": "false",
+        "CHANGE_DETECTION_ENABLED": "false",
+        "DB_PATH": "data/database.db",
+        "CACHE_DIR": "data/cache",
+        "MODELS_DIR": "data/models",
+    })
+    env.update(extra or {})
+    return env
+
+def run_e2e(tamanos, stub, repeticiones):
+    resultados = {}
+    for n in tamanos:
+        with tempfile.TemporaryDirectory(prefix=f"bench_e2e_{n}_") as tmp:
+            catalogo = os.path.join(tmp, "ciudades.csv")
+            write_catalog(catalogo, n)
+            env = base_env(dict(stub.env(), CITY_CATALOG_PATH=catalogo))
+
+            antes = dict(stub.requests)
+            resultado = run_worker(["e2e", "--repeat", str(repeticiones)], tmp, env)
+            resultado["peticiones"] = {
+                fuente: stub.requests[fuente] - antes.get(fuente, 0) for fuente in stub.requests
+            }
+            resultados[str(n)] = resultado
+            print(f"e2e {n} ciudades: main {resultado['main']['mediana_s']:.3f} s "
+                  f"({resultado['ciudades_por_s']} ciudades/s)")
+    return resultados
+
+def run_micro(tamano, filas_historico, repeticiones):
+    with tempfile.TemporaryDirectory(prefix="bench_micro_") as tmp:
+        resultado = run_worker(
+            ["micro", "--size", str(tamano), "--history-rows", str(filas_historico), "--repeat", str(repeticiones)],
+            tmp, base_env()
+        )
+    for componente, metricas in resultado.items():
+        tiempos = ", ".join(
+            f"{nombre} {valor['mediana_s']:.4f} s" for nombre, valor in metricas.items() if isinstance(valor, dict)
+        )
+        print(f"micro {componente}: {tiempos}")
+    return resultado
+
+def flatten(resultado, prefijo=""):
+    """Métricas de tiempo (mediana) como {ruta: segundos} para comparar ejecuciones"""
+    metricas = {}
+    for clave, valor in resultado.items():
+        ruta = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            if "mediana_s" in valor:
+                metricas[ruta] = valor["mediana_s"]
+            else:
+                metricas.update(flatten(valor, ruta + "."))
+    return metricas
+
+def compare(actual, anterior, umbral):
+    """Imprime la variación de cada métrica y retorna las que empeoraron más que `umbral`"""
+    previas = flatten({"e2e": anterior.get("e2e", {}), "micro": anterior.get("micro", {})})
+    nuevas = flatten({"e2e": actual.get("e2e", {}), "micro": actual.get("micro", {})})
+
+    regresiones = []
+    for ruta in sorted(nuevas.keys() & previas.keys()):
+        if not previas[ruta]:
+            continue
+        cambio = nuevas[ruta] / previas[ruta] - 1
+        marca = ""
+        if cambio > umbral:
+            marca = "  <-- REGRESIÓN"
+            regresiones.append(ruta)
+        print(f"{ruta}: {previas[ruta]:.4f} s -> {nuevas[ruta]:.4f} s ({cambio:+.1%}){marca}")
+    return regresiones
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema RPA TravelCorp")
+    parser.add_argument("--cities", default="5,100,1000", help="Tamaños de catálogo para las ejecuciones completas")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia del servidor simulado (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variación de la latencia (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--micro-size", type=int, default=10000, help="Ciudades para los micro-benchmarks")
+    parser.add_argument("--history-rows", type=int, default=20000, help="Filas de histórico para IVVPredictor")
+    parser.add_argument("--skip-e2e", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results"))
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Aumento relativo considerado regresión")
+    args = parser.parse_args()
+
+    resultado = {
+        "version": git_version(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {
+            "latencia_s": args.latency, "jitter_s": args.jitter, "tasa_error": args.error_rate,
+            "repeticiones": args.repeat, "micro_ciudades": args.micro_size, "filas_historico": args.history_rows,
+        },
+    }
+
+    if not args.skip_e2e:
+        tamanos = [int(n) for n in args.cities.split(",") if n.strip()]
+        with StubServer(args.latency, args.jitter, args.error_rate) as stub:
+            resultado["e2e"] = run_e2e(tamanos, stub, args.repeat)
+
+    if not args.skip_micro:
+        resultado["micro"] = run_micro(args.micro_size, args.history_rows, args.repeat)
+
+    os.makedirs(args.output, exist_ok=True)
+    archivo = os.path.join(args.output, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(archivo, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {archivo}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regresiones = compare(resultado, json.load(f), args.threshold)
+        if regresiones:
+            print(f"{len(regresiones)} métricas empeoraron más de {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
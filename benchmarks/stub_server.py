@@ -0,0 +1,181 @@
+# benchmarks/stub_server.py
+# Servidor HTTP local que imita las respuestas de Open-Meteo, exchangerate-api y worldtimeapi,
+# con latencia, jitter y tasa de errores configurables.
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+MONEDAS = {
+    "USD": 1.0, "GBP": 0.78, "JPY": 149.5, "BRL": 5.45, "AUD": 1.55, "EUR": 0.92,
+    "CAD": 1.36, "MXN": 17.1, "COP": 3950.0, "CLP": 930.0, "INR": 83.2, "CNY": 7.24
+}
+
+def _weather_body(lat, lon, semilla):
+    """Respuesta de una ubicación con la forma de Open-Meteo (current + daily)"""
+    rnd = random.Random(semilla)
+    hoy = datetime.now(timezone.utc).date()
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "generationtime_ms": 0.1,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "current_units": {"time": "iso8601", "interval": "seconds", "temperature_2m": "°C",
+                          "wind_speed_10m": "km/h", "precipitation": "mm", "uv_index": ""},
+        "current": {
+            "time": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:00"),
+            "interval": 900,
+            "temperature_2m": round(rnd.uniform(-5, 40), 1),
+            "wind_speed_10m": round(rnd.uniform(0, 60), 1),
+            "precipitation": round(rnd.uniform(0, 8), 1),
+            "uv_index": round(rnd.uniform(0, 11), 1)
+        },
+        "daily_units": {"time": "iso8601", "temperature_2m_max": "°C", "temperature_2m_min": "°C",
+                        "precipitation_probability_max": "%"},
+        "daily": {
+            "time": [(hoy + timedelta(days=i)).isoformat() for i in range(7)],
+            "temperature_2m_max": [round(rnd.uniform(15, 40), 1) for _ in range(7)],
+            "temperature_2m_min": [round(rnd.uniform(-5, 15), 1) for _ in range(7)],
+            "precipitation_probability_max": [rnd.randint(0, 100) for _ in range(7)]
+        }
+    }
+
+class StubServer:
+    """
+    Servidor de APIs simulado en un hilo de fondo.
+    `latency` y `jitter` en segundos; `error_rate` es la fracción de respuestas 503.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0, seed=42, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = Counter()
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Variables de entorno que apuntan los clientes a este servidor"""
+        return {
+            "WEATHER_API_URL": f"{self.base_url}/v1/forecast",
+            "EXCHANGE_API_URL": f"{self.base_url}/v4/latest/USD",
+            "TIME_API_URL": f"{self.base_url}/api/timezone",
+        }
+
+    def _sample(self):
+        """Demora y si la respuesta debe fallar, según la configuración"""
+        with self._lock:
+            demora = max(0.0, self.latency + self._rnd.uniform(-self.jitter, self.jitter))
+            falla = self._rnd.random() < self.error_rate
+        return demora, falla
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # El cliente se fue antes (timeout): no hay a quién responder
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.endswith("/forecast"):
+                    fuente = "weather"
+                elif "/latest/" in url.path:
+                    fuente = "exchange"
+                elif "/timezone/" in url.path:
+                    fuente = "time"
+                else:
+                    self._send(404, {"error": "not found"})
+                    return
+
+                with servidor._lock:
+                    servidor.requests[fuente] += 1
+
+                demora, falla = servidor._sample()
+                time.sleep(demora)
+                if falla:
+                    self._send(503, {"error": "stub error"})
+                    return
+
+                self._send(200, getattr(self, f"_{fuente}")(url))
+
+            def _weather(self, url):
+                qs = parse_qs(url.query)
+                lats = [float(v) for v in qs["latitude"][0].split(",")]
+                lons = [float(v) for v in qs["longitude"][0].split(",")]
+                cuerpos = [_weather_body(lat, lon, f"{lat},{lon}") for lat, lon in zip(lats, lons)]
+                return cuerpos if len(cuerpos) > 1 else cuerpos[0]
+
+            def _exchange(self, url):
+                return {"base": "USD", "date": datetime.now(timezone.utc).date().isoformat(), "rates": MONEDAS}
+
+            def _time(self, url):
+                nombre = url.path.split("/timezone/", 1)[1]
+                return {
+                    "timezone": nombre,
+                    "datetime": datetime.now(timezone.utc).isoformat(),
+                    "utc_offset": "+00:00"
+                }
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor de APIs simulado para pruebas de carga")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StubServer(args.latency, args.jitter, args.error_rate, port=args.port) as stub:
+        for clave, valor in stub.env().items():
+            print(f"{clave}={valor}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
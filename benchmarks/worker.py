@@ -0,0 +1,168 @@
+# benchmarks/worker.py
+# Proceso aislado que ejecuta una medición y escribe el resultado como JSON en la última línea de stdout.
+# Lo lanza run_benchmarks.py con el directorio de trabajo y las variables de entorno ya preparados.
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from logger import setup_logging
+
+# Sin salida por consola; el archivo de log lo controla LOG_FILE (desactivado por run_benchmarks)
+logger = setup_logging(console=False)
+
+def _medir(funcion, repeticiones=1):
+    """Ejecuta `funcion` varias veces y retorna tiempos en segundos (mínimo y mediana)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {"min_s": round(min(tiempos), 6), "mediana_s": round(statistics.median(tiempos), 6), "repeticiones": repeticiones}
+
+def run_e2e(repeticiones):
+    """Tiempo de main.main completo y de cada etapa del pipeline"""
+    import main
+    from data_collector import CIUDADES
+    from pipeline import Pipeline
+
+    def ejecutar_main():
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.main()
+
+    total = _medir(ejecutar_main, repeticiones)
+
+    pipeline = Pipeline(CIUDADES)
+    etapas = {
+        "clima": _medir(pipeline.refresh_weather, repeticiones),
+        "cambio": _medir(pipeline.refresh_exchange, repeticiones),
+        "puntaje": _medir(lambda: pipeline.score(force=True), repeticiones),
+    }
+
+    return {
+        "ciudades": len(CIUDADES),
+        "main": total,
+        "etapas": etapas,
+        "ciudades_por_s": round(len(CIUDADES) / total["mediana_s"], 2) if total["mediana_s"] else None,
+    }
+
+def _observaciones(n, semilla=7):
+    from records import WeatherObservation, DailyForecast, ExchangeData
+
+    rnd = random.Random(semilla)
+    pronostico = tuple(DailyForecast(f"2026-01-0{i + 1}", 25.0, 10.0, 30) for i in range(7))
+    observaciones = [
+        WeatherObservation(
+            f"Ciudad {i}", "2026-01-01T00:00:00Z",
+            round(rnd.uniform(-5, 40), 1), round(rnd.uniform(0, 60), 1),
+            round(rnd.uniform(0, 8), 1), round(rnd.uniform(0, 11), 1), pronostico
+        )
+        for i in range(n)
+    ]
+    cambios = [ExchangeData(1.0, 0.5, rnd.choice(["estable", "positiva", "negativa"])) for _ in range(n)]
+    return observaciones, cambios
+
+def run_micro(tamano, filas_historico, repeticiones):
+    """Micro-benchmarks de DataProcessor, OutputGenerator e IVVPredictor"""
+    import pandas as pd
+    from processor import DataProcessor
+    from output_generator import OutputGenerator
+    from history_store import HistoryStore
+    from ml_predictor import IVVPredictor
+    from records import CityResult
+
+    resultados = {}
+    processor = DataProcessor()
+    observaciones, cambios = _observaciones(tamano)
+
+    # DataProcessor: camino escalar por ciudad y camino vectorizado sobre un DataFrame
+    def escalar():
+        for obs, cambio in zip(observaciones, cambios):
+            alertas = processor.evaluate_observation(obs)
+            processor.calculate_ivv_record(alertas, obs.uv, cambio_estable=cambio.estable)
+
+    df = pd.DataFrame({
+        "Temperatura": [o.temperatura for o in observaciones],
+        "Precipitacion": [o.precipitacion for o in observaciones],
+        "Viento": [o.viento for o in observaciones],
+        "UV": [o.uv for o in observaciones],
+        "Tendencia": [c.tendencia_5_dias for c in cambios],
+    })
+    resultados["data_processor"] = {
+        "filas": tamano,
+        "escalar": _medir(escalar, repeticiones),
+        "score_batch": _medir(lambda: processor.score_batch(df), repeticiones),
+    }
+
+    # OutputGenerator: escritor incremental y generación en bloque
+    ciudades = []
+    for obs, cambio in zip(observaciones, cambios):
+        alertas = processor.evaluate_observation(obs)
+        ivv = processor.calculate_ivv_record(alertas, obs.uv, cambio_estable=cambio.estable)
+        ciudades.append(CityResult(obs.ciudad, obs, cambio, alertas, ivv))
+
+    output_gen = OutputGenerator()
+    contador = iter(range(10 ** 9))
+
+    def escritor():
+        with output_gen.open_report(f"bench_{next(contador)}") as reporte:
+            for resultado in ciudades:
+                reporte.write(resultado)
+            reporte.commit()
+
+    resultados["output_generator"] = {
+        "ciudades": tamano,
+        "report_writer": _medir(escritor, repeticiones),
+        "generate_json": _medir(lambda: output_gen.generate_json(ciudades, f"bench_{next(contador)}"), repeticiones),
+        "generate_csv": _medir(lambda: output_gen.generate_csv(ciudades, f"bench_{next(contador)}"), repeticiones),
+    }
+
+    # IVVPredictor: histórico sintético en un almacén nuevo
+    rnd = random.Random(11)
+    n_ciudades = 50
+    store = HistoryStore("historico_bench.db")
+    inicio = datetime(2026, 1, 1)
+    filas = [
+        [
+            f"Ciudad {i % n_ciudades}",
+            (inicio + timedelta(minutes=30 * (i // n_ciudades))).isoformat() + "Z",
+            20.0, 10.0, 1.0, 5.0, 1.0, 0.1, "estable", round(rnd.uniform(40, 100), 1), "BAJO", 0
+        ]
+        for i in range(filas_historico)
+    ]
+    with store._connect() as conn:
+        store._insert_rows(conn, filas, "bench")
+
+    predictor = IVVPredictor(data_path="sin_csv", store=store, cache_dir="cache_bench")
+    resultados["ivv_predictor"] = {
+        "filas_historico": filas_historico,
+        "predict_ivv_frio": _medir(predictor.predict_ivv, 1),
+        "predict_ivv": _medir(predictor.predict_ivv, repeticiones),
+        "detect_anomalies_entrenamiento": _medir(lambda: predictor.detect_anomalies(force_retrain=True), 1),
+        "detect_anomalies": _medir(predictor.detect_anomalies, repeticiones),
+    }
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modo", choices=["e2e", "micro"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--history-rows", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.modo == "e2e":
+        resultado = run_e2e(args.repeat)
+    else:
+        resultado = run_micro(args.size, args.history_rows, args.repeat)
+
+    logger.complete()
+    print(json.dumps(resultado))
@@ -1,40 +1,52 @@
-import requests
+from datetime import date
 from logger import get_logger
-import random
-from datetime import datetime, timedelta
+from config import Config
+from api_clients.http_client import fetch_json
+from api_clients.session import get_session
+from fx_history import FxHistory
 
 logger = get_logger()
 
+def _fecha_tasas(data):
+    """Fecha de las tasas informada por la API ("date": "AAAA-MM-DD"); None si falta o es inválida"""
+    try:
+        return date.fromisoformat(str(data.get('date'))[:10])
+    except ValueError:
+        return None
+
 class ExchangeClient:
-    def __init__(self):
-        self.base_url = "https://api.exchangerate-api.com/v4/latest/USD"
+    def __init__(self, history=None):
+        self.base_url = Config.EXCHANGE_API_URL
+        self.session = get_session()
+        self._history = history
+    
+    @property
+    def history(self):
+        """Histórico diario de tasas (se abre al primer uso)"""
+        if self._history is None:
+            self._history = FxHistory()
+        return self._history
     
-    def get_exchange_rates(self):
-        """Obtiene tipos de cambio actuales USD a otras monedas con reintentos"""
-        # Usar una session con retry configurado para manejar reintentos y backoff
+    def get_exchange_rates(self, timeout=None, fallback=True, deadline=None):
+        """
+        Obtiene tipos de cambio actuales USD a otras monedas con reintentos.
+        Retorna (tasas, fecha de las tasas según la API o None si no la informa).
+        Si la API falla retorna tasas simuladas (sin fecha), o relanza el error con `fallback=False`.
+        """
+        # La sesion compartida ya aplica la politica de reintentos y backoff
         try:
-            # Crear session local con Retry (si no existe self.session)
-            try:
-                session = self.session
-            except AttributeError:
-                from requests.adapters import HTTPAdapter
-                from urllib3.util.retry import Retry
-                import requests
-                session = requests.Session()
-                retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
-                session.mount("https://", HTTPAdapter(max_retries=retries))
-
-            response = session.get(self.base_url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = fetch_json(self.base_url, source="exchange", timeout=timeout, session=self.session,
+                              deadline=deadline)
 
             logger.info("API Exchange Rates respondió exitosamente")
-            return data.get('rates', {})
+            return data.get('rates', {}), _fecha_tasas(data)
             
         except Exception as e:
-            logger.error(f"Error API Exchange Rates: {e}")
+            logger.error("Error API Exchange Rates: {}", e)
+            if not fallback:
+                raise
             logger.info("Usando datos simulados...")
-            return self._get_mock_rates()
+            return self._get_mock_rates(), None
     
     def _get_mock_rates(self):
         """Datos simulados cuando la API falla"""
@@ -46,30 +58,30 @@ class ExchangeClient:
             'AUD': 1.55
         }
     
+    def record_rates(self, rates, fecha=None):
+        """
+        Registra las tasas en el historico bajo su fecha (la de la API; si no la hay, la fecha UTC actual)
+        y retorna las tendencias actualizadas
+        """
+        return self.history.record_snapshot(rates, fecha)
+    
     def get_exchange_history(self, days=5):
-        """Simula historico de 5 dias con variacion ±2%"""
-        history = {}
-        today_rates = self.get_exchange_rates()
-        
-        for i in range(days):
-            date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-            day_rates = {}
-            
-            for currency, rate in today_rates.items():
-                variation = random.uniform(-0.02, 0.02)
-                day_rates[currency] = round(rate * (1 + variation), 4)
-            
-            history[date] = day_rates
-        
-        return history
+        """Historico real de los ultimos `days` dias ({fecha: {moneda: tasa}}, sin llamadas a la API)"""
+        return self.history.history(days)
     
-    def analyze_trend(self, history):
-        """Analiza tendencia de los ultimos 5 dias"""
-        currencies = list(history.values())[0].keys()
+    def analyze_trend(self, history=None):
+        """
+        Analiza tendencia de los ultimos 5 dias. Sin `history` usa las estadisticas incrementales
+        del historico local; con `history` ({fecha: {moneda: tasa}}) las recalcula sobre esas tasas.
+        """
+        if history is None:
+            return self.history.trends()
+        
+        currencies = dict.fromkeys(currency for day_rates in history.values() for currency in day_rates)
         trends = {}
         
         for currency in currencies:
-            rates = [day_rates[currency] for day_rates in history.values()]
+            rates = [day_rates[currency] for day_rates in history.values() if currency in day_rates]
             
             daily_changes = []
             for i in range(1, len(rates)):
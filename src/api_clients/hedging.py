@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import Config
+from metrics import record_hedge
+
+class LatencyTracker:
+    """Latencias recientes de llamadas exitosas por fuente, para calcular el umbral de hedging"""
+
+    def __init__(self, size=200):
+        self.size = size
+        self._muestras = {}
+        self._lock = threading.Lock()
+
+    def record(self, source, seconds):
+        with self._lock:
+            if source not in self._muestras:
+                self._muestras[source] = deque(maxlen=self.size)
+            self._muestras[source].append(seconds)
+
+    def threshold(self, source, percentile=None):
+        """Percentil de las latencias de la fuente, o None si aún no hay muestras suficientes"""
+        percentile = percentile if percentile is not None else Config.HEDGE_PERCENTILE
+        with self._lock:
+            muestras = sorted(self._muestras.get(source, ()))
+        if not muestras or len(muestras) < Config.HEDGE_MIN_SAMPLES:
+            return None
+        indice = min(len(muestras) - 1, int(len(muestras) * percentile / 100))
+        return muestras[indice]
+
+    def reset(self):
+        with self._lock:
+            self._muestras.clear()
+
+LATENCIAS = LatencyTracker()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(2, Config.HEDGE_MAX_WORKERS), thread_name_prefix="hedge")
+        return _executor
+
+def _timed(funcion):
+    inicio = time.perf_counter()
+    return funcion(), time.perf_counter() - inicio
+
+def _close_loser(futuro):
+    """Cierra la respuesta descartada para devolver su conexión al pool"""
+    try:
+        respuesta, _ = futuro.result()
+        respuesta.close()
+    except Exception:
+        pass
+
+def hedged_get(funcion, source, can_hedge=None):
+    """
+    Ejecuta `funcion` (un GET sin argumentos). Con hedging activo y muestras suficientes, si la
+    llamada supera el percentil de latencia de la fuente se lanza un duplicado (si `can_hedge()`
+    lo permite, por ejemplo con un token del limitador) y se usa la primera respuesta exitosa.
+    """
+    umbral = LATENCIAS.threshold(source) if Config.HEDGE_ENABLED else None
+    if umbral is None:
+        respuesta, duracion = _timed(funcion)
+        LATENCIAS.record(source, duracion)
+        return respuesta
+
+    executor = _get_executor()
+    original = executor.submit(_timed, funcion)
+    hechos, _ = wait([original], timeout=umbral)
+    if hechos or (can_hedge and not can_hedge()):
+        respuesta, duracion = original.result()
+        LATENCIAS.record(source, duracion)
+        return respuesta
+
+    duplicado = executor.submit(_timed, funcion)
+    pendientes = {original, duplicado}
+    error = None
+    while pendientes:
+        hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+        for futuro in hechos:
+            try:
+                respuesta, duracion = futuro.result()
+            except Exception as e:
+                error = e
+                continue
+            LATENCIAS.record(source, duracion)
+            record_hedge(source, "duplicado" if futuro is duplicado else "original")
+            for otro in pendientes:
+                otro.add_done_callback(_close_loser)
+            return respuesta
+
+    record_hedge(source, "fallido")
+    raise error
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+class ResponseCache:
+    """
+    Cache persistente en disco de respuestas JSON de las APIs.
+    Usa un TTL por fuente, respeta Cache-Control/ETag/Last-Modified y
+    expulsa las entradas menos usadas cuando supera el tamaño máximo.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, ttls=None):
+        self.cache_dir = os.path.join(cache_dir or Config.CACHE_DIR, "http")
+        self.max_bytes = max_bytes if max_bytes is not None else int(Config.CACHE_MAX_MB * 1024 * 1024)
+        self.ttls = ttls or {
+            "weather": Config.CACHE_TTL_WEATHER,
+            "exchange": Config.CACHE_TTL_EXCHANGE,
+            "time": Config.CACHE_TTL_TIME,
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = None  # {ruta: [bytes, ultimo_uso]}
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load_index(self):
+        """Construye (una sola vez) el índice de tamaños y último uso a partir del disco"""
+        if self._index is None:
+            self._index = {}
+            for nombre in os.listdir(self.cache_dir):
+                if nombre.endswith(".json"):
+                    ruta = os.path.join(self.cache_dir, nombre)
+                    try:
+                        st = os.stat(ruta)
+                        self._index[ruta] = [st.st_size, st.st_mtime]
+                    except OSError:
+                        continue
+        return self._index
+
+    def lookup(self, url):
+        """Devuelve la entrada guardada para la URL (fresca o vencida) o None"""
+        ruta = self._path(url)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return time.time() < entry.get("expires_at", 0)
+
+    def conditional_headers(self, entry):
+        """Cabeceras para un GET condicional a partir de los validadores guardados"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _ttl(self, source, headers):
+        """TTL de la respuesta: max-age del servidor si existe, si no el TTL de la fuente"""
+        directivas = {}
+        for parte in headers.get("Cache-Control", "").split(","):
+            clave, _, valor = parte.strip().partition("=")
+            if clave:
+                directivas[clave.lower()] = valor.strip('"')
+
+        if "no-store" in directivas:
+            return None
+        if "no-cache" in directivas:
+            return 0
+        if "max-age" in directivas:
+            try:
+                edad = int(headers.get("Age", 0) or 0)
+                return max(0, int(directivas["max-age"]) - edad)
+            except ValueError:
+                pass
+        return self.ttls.get(source, 0)
+
+    def record_hit(self, url):
+        with self._lock:
+            self._stats["hits"] += 1
+            self._touch(self._path(url))
+
+    def record_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def revalidate(self, entry, source, response):
+        """Renueva una entrada tras un 304 Not Modified"""
+        ttl = self._ttl(source, response.headers)
+        entry["expires_at"] = time.time() + (ttl or 0)
+        entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+        entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+        self._write(entry)
+        with self._lock:
+            self._stats["revalidated"] += 1
+        return entry["body"]
+
+    def store(self, url, source, response, body):
+        """Guarda una respuesta 200 salvo que el servidor lo prohíba (no-store)"""
+        ttl = self._ttl(source, response.headers)
+        if ttl is None:
+            return
+
+        ahora = time.time()
+        entry = {
+            "url": url,
+            "source": source,
+            "stored_at": ahora,
+            "expires_at": ahora + ttl,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": body,
+        }
+        self._write(entry)
+        with self._lock:
+            self._stats["stores"] += 1
+
+    def _write(self, entry):
+        """Escritura atómica de la entrada y actualización del índice de tamaños"""
+        ruta = self._path(entry["url"])
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            logger.warning("No se pudo escribir en cache {}: {}", ruta, e)
+            return
+
+        with self._lock:
+            self._load_index()[ruta] = [os.path.getsize(ruta), time.time()]
+            self._evict()
+
+    def _touch(self, ruta):
+        """Marca la entrada como usada (también en disco para que persista entre procesos)"""
+        indice = self._load_index()
+        if ruta in indice:
+            indice[ruta][1] = time.time()
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta respetar el tamaño máximo"""
+        indice = self._load_index()
+        total = sum(tamano for tamano, _ in indice.values())
+        if total <= self.max_bytes:
+            return
+
+        for ruta, (tamano, _) in sorted(indice.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            del indice[ruta]
+            total -= tamano
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        """Contadores de aciertos, fallos, revalidaciones y expulsiones"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._load_index())
+            stats["bytes"] = sum(tamano for tamano, _ in self._index.values())
+        consultas = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / consultas, 3) if consultas else 0.0
+        return stats
+
+    def clear(self):
+        """Elimina todas las entradas guardadas"""
+        with self._lock:
+            for ruta in list(self._load_index()):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            self._index = {}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Devuelve la cache compartida por todos los clientes (None si está deshabilitada)"""
+    global _cache
+    if not Config.CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,161 @@
+import time
+from urllib.parse import urlsplit
+import requests
+from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+from metrics import record_api_call
+from config import Config
+from deadline import DeadlineExceeded, timeout_for
+from api_clients.hedging import hedged_get
+from api_clients.resilience import CircuitOpenError, RateLimitExceeded, get_breaker, get_limiter
+from api_clients.http_cache import get_cache
+from api_clients.session import get_session
+from api_clients.single_flight import WaitTimeout, get_single_flight, process_lock
+
+def build_url(url, params=None):
+    """URL final de la petición con los parámetros ordenados (clave estable para cache)"""
+    if params:
+        params = sorted(params.items())
+    return requests.Request("GET", url, params=params).prepare().url
+
+def _is_timeout(error):
+    """Timeout de la petición, también cuando urllib3 agotó sus reintentos por timeouts"""
+    if isinstance(error, requests.Timeout):
+        return True
+    motivo = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(motivo, Urllib3TimeoutError)
+
+def _retries(response):
+    """Reintentos que hizo urllib3 antes de obtener la respuesta"""
+    historial = getattr(getattr(response.raw, "retries", None), "history", None)
+    return len(historial) if historial else 0
+
+def _leader_budget(timeout):
+    """
+    Tiempo máximo de una llamada líder sin presupuesto de ejecución: espera de token, bloqueo
+    entre procesos e intentos de urllib3 con su backoff (el doble por un posible duplicado de hedging).
+    """
+    intentos = Config.HTTP_RETRIES + 1
+    backoff = sum(Config.HTTP_BACKOFF * 2 ** i for i in range(Config.HTTP_RETRIES))
+    return Config.RATE_LIMIT_MAX_WAIT + timeout + 2 * (intentos * timeout + backoff)
+
+def fetch_json(url, params=None, source="default", timeout=None, session=None, deadline=None):
+    """
+    GET que devuelve el JSON de la respuesta pasando por la cache compartida.
+    Las entradas vigentes se sirven sin red; las vencidas se revalidan con un GET condicional.
+    Cada host pasa por un limitador de tasa y un circuit breaker: con el circuito abierto se sirve
+    la entrada vencida de la cache si existe, o se lanza CircuitOpenError sin tocar la red para que
+    el cliente use su respaldo.
+    `timeout` (por defecto el tiempo restante de `deadline` o Config.HTTP_TIMEOUT) limita cada intento;
+    las llamadas lentas pueden duplicarse según el percentil de latencia de la fuente (hedging).
+    Las peticiones idénticas concurrentes (misma URL final) comparten una sola llamada a la red
+    y, con SINGLE_FLIGHT_CROSS_PROCESS, también entre procesos mediante un bloqueo en disco. Quien
+    espera la llamada de otro lo hace hasta agotar su `deadline` (lanza DeadlineExceeded) o, sin
+    presupuesto, lo que puede tardar el líder con sus reintentos.
+    Cada llamada queda registrada en las métricas (fuente, estado, reintentos y cache).
+    """
+    full_url = build_url(url, params)
+    timeout = timeout if timeout is not None else timeout_for(deadline)
+    http = session or get_session()
+    cache = get_cache()
+
+    inicio = time.perf_counter()
+    if cache:
+        entry = cache.lookup(full_url)
+        if entry and cache.is_fresh(entry):
+            return _cache_hit(cache, full_url, entry, source, inicio)
+
+    if not Config.SINGLE_FLIGHT_ENABLED:
+        return _fetch(full_url, source, timeout, http, cache, inicio, deadline)
+
+    restante = deadline.remaining() if deadline else None
+    try:
+        data, compartido = get_single_flight().do(
+            full_url, lambda: _fetch_leader(full_url, source, timeout, http, cache, inicio, deadline),
+            timeout=restante if restante is not None else _leader_budget(timeout)
+        )
+    except WaitTimeout:
+        record_api_call(source, "timeout", "coalesced", time.perf_counter() - inicio)
+        if restante is not None:
+            raise DeadlineExceeded(f"presupuesto agotado esperando la llamada en curso a {source}") from None
+        raise
+    if compartido:
+        record_api_call(source, "shared", "coalesced", time.perf_counter() - inicio)
+    return data
+
+def _cache_hit(cache, full_url, entry, source, inicio):
+    cache.record_hit(full_url)
+    record_api_call(source, "cache", "hit", time.perf_counter() - inicio)
+    return entry["body"]
+
+def _fetch_leader(full_url, source, timeout, http, cache, inicio, deadline=None):
+    """Llamada que ejecuta el primero de un grupo de peticiones idénticas"""
+    if cache and Config.SINGLE_FLIGHT_CROSS_PROCESS:
+        # Otro proceso pudo haber guardado la respuesta mientras se esperaba el bloqueo
+        with process_lock(full_url, timeout):
+            return _fetch(full_url, source, timeout, http, cache, inicio, deadline)
+    return _fetch(full_url, source, timeout, http, cache, inicio, deadline)
+
+def _fetch(full_url, source, timeout, http, cache, inicio, deadline=None):
+    """Consulta la cache (otro hilo pudo llenarla recién) y, si no está vigente, la red"""
+    entry = cache.lookup(full_url) if cache else None
+    if entry and cache.is_fresh(entry):
+        return _cache_hit(cache, full_url, entry, source, inicio)
+
+    if cache:
+        cache.record_miss()
+
+    estado, resultado_cache, reintentos = "error", "miss", 0
+    try:
+        host = urlsplit(full_url).netloc
+        breaker = get_breaker(host)
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            estado = "circuit_open"
+            if entry:
+                resultado_cache = "stale"
+                return entry["body"]
+            raise
+
+        # La espera por un token tampoco pasa del tiempo restante de la ejecución
+        restante = deadline.remaining() if deadline else None
+        espera = Config.RATE_LIMIT_MAX_WAIT if restante is None else min(Config.RATE_LIMIT_MAX_WAIT, restante)
+        if not get_limiter(host).acquire(max_wait=espera):
+            breaker.release()
+            estado = "rate_limited"
+            raise RateLimitExceeded(f"sin capacidad para {host}")
+
+        headers = cache.conditional_headers(entry) if entry else {}
+        try:
+            # El duplicado solo sale si hay un token libre sin esperar; cuenta como una llamada para el breaker
+            response = hedged_get(
+                lambda: http.get(full_url, headers=headers, timeout=timeout), source,
+                can_hedge=lambda: get_limiter(host).acquire(max_wait=0)
+            )
+        except Exception as e:
+            if restante is not None and timeout < Config.HTTP_TIMEOUT and _is_timeout(e):
+                # El timeout lo fijó el presupuesto de la ejecución, no el host: no cuenta como fallo
+                breaker.release()
+            else:
+                breaker.record_failure()
+            raise
+        estado, reintentos = str(response.status_code), _retries(response)
+
+        # 429 y 5xx cuentan como host no saludable; el resto de respuestas como éxito
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        if entry and response.status_code == 304:
+            resultado_cache = "revalidated"
+            return cache.revalidate(entry, source, response)
+
+        response.raise_for_status()
+        data = response.json()
+
+        if cache:
+            cache.store(full_url, source, response, data)
+        return data
+    finally:
+        record_api_call(source, estado, resultado_cache, time.perf_counter() - inicio, reintentos)
@@ -0,0 +1,139 @@
+import threading
+import time
+import requests
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+class CircuitOpenError(requests.RequestException):
+    """El circuito del host está abierto: la llamada se rechaza sin tocar la red"""
+
+class RateLimitExceeded(requests.RequestException):
+    """No hubo un token disponible para el host dentro de la espera máxima"""
+
+class TokenBucket:
+    """
+    Limitador de tasa por host: `rate` tokens por segundo con ráfagas de hasta `capacity`.
+    Con rate <= 0 no limita.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._actualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, ahora):
+        self._tokens = min(self.capacity, self._tokens + (ahora - self._actualizado) * self.rate)
+        self._actualizado = ahora
+
+    def acquire(self, max_wait=None):
+        """Toma un token esperando como máximo `max_wait` segundos; False si no alcanzó"""
+        if self.rate <= 0:
+            return True
+
+        limite = time.monotonic() + (max_wait if max_wait is not None else Config.RATE_LIMIT_MAX_WAIT)
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._refill(ahora)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                espera = (1 - self._tokens) / self.rate
+
+            if ahora + espera > limite:
+                return False
+            time.sleep(espera)
+
+class CircuitBreaker:
+    """
+    Circuit breaker por host con estados cerrado, abierto y semiabierto.
+    Tras `failure_threshold` fallos seguidos se abre y rechaza llamadas durante `reset_timeout` segundos;
+    luego deja pasar una sola llamada de prueba (semiabierto) que lo cierra si tiene éxito o lo reabre si falla.
+    """
+
+    CERRADO = "cerrado"
+    ABIERTO = "abierto"
+    SEMIABIERTO = "semiabierto"
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else Config.BREAKER_RESET_SECONDS
+        self.state = self.CERRADO
+        self._fallos = 0
+        self._abierto_en = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Lanza CircuitOpenError si la llamada no debe salir a la red"""
+        with self._lock:
+            if self.state == self.CERRADO:
+                return
+
+            if self.state == self.ABIERTO:
+                if time.monotonic() - self._abierto_en < self.reset_timeout:
+                    raise CircuitOpenError(f"circuito abierto para {self.name}")
+                self.state = self.SEMIABIERTO
+                self._prueba_en_curso = False
+
+            # Semiabierto: solo una llamada de prueba a la vez
+            if self._prueba_en_curso:
+                raise CircuitOpenError(f"circuito semiabierto para {self.name}: prueba en curso")
+            self._prueba_en_curso = True
+
+    def release(self):
+        """Libera la llamada de prueba si terminó sin llegar al host (por ejemplo, sin token)"""
+        with self._lock:
+            self._prueba_en_curso = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CERRADO:
+                logger.info("Circuito cerrado para {}: el host respondió", self.name)
+            self.state = self.CERRADO
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def record_failure(self):
+        with self._lock:
+            self._fallos += 1
+            if self.state == self.SEMIABIERTO or self._fallos >= self.failure_threshold:
+                if self.state != self.ABIERTO:
+                    logger.warning("Circuito abierto para {} tras {} fallos", self.name, self._fallos)
+                self.state = self.ABIERTO
+                self._abierto_en = time.monotonic()
+                self._prueba_en_curso = False
+
+_limiters = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+def get_limiter(host):
+    """Limitador compartido del host"""
+    with _registry_lock:
+        if host not in _limiters:
+            _limiters[host] = TokenBucket(Config.RATE_LIMIT_PER_SECOND, Config.RATE_LIMIT_BURST)
+        return _limiters[host]
+
+def get_breaker(host):
+    """Circuit breaker compartido del host"""
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+def breaker_states():
+    """Estado actual de los circuitos por host"""
+    with _registry_lock:
+        return {host: breaker.state for host, breaker in _breakers.items()}
+
+def reset():
+    """Descarta limitadores y circuitos (útil entre ejecuciones de pruebas)"""
+    with _registry_lock:
+        _limiters.clear()
+        _breakers.clear()
@@ -0,0 +1,68 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+_session = None
+_session_lock = threading.Lock()
+
+def _parse_pool_sizes(valor):
+    """Convierte "host=tamaño,host2=tamaño" en un diccionario {host: tamaño}"""
+    pool_sizes = {}
+    for parte in valor.split(","):
+        host, _, tamano = parte.strip().partition("=")
+        if host and tamano:
+            try:
+                pool_sizes[host.strip()] = int(tamano)
+            except ValueError:
+                logger.warning("Tamaño de pool inválido para {}: {}", host, tamano)
+    return pool_sizes
+
+def build_retry_policy():
+    """Política única de reintentos para todas las APIs"""
+    return Retry(
+        total=Config.HTTP_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=Config.HTTP_RESPECT_RETRY_AFTER,
+    )
+
+def create_session(pool_maxsize=None, pool_sizes=None):
+    """
+    Crea una sesión con pools de conexiones keep-alive y la política de reintentos.
+    `pool_sizes` permite dar un tamaño de pool distinto a cada host.
+    """
+    session = requests.Session()
+    retry = build_retry_policy()
+
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize or Config.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # requests elige el adaptador con el prefijo más largo, así cada host usa su propio pool
+    if pool_sizes is None:
+        pool_sizes = _parse_pool_sizes(Config.HTTP_POOL_SIZES)
+    for host, tamano in pool_sizes.items():
+        adapter_host = HTTPAdapter(pool_connections=1, pool_maxsize=tamano, max_retries=retry)
+        session.mount(f"http://{host}", adapter_host)
+        session.mount(f"https://{host}", adapter_host)
+
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+def get_session():
+    """Devuelve la sesión HTTP compartida por todos los clientes de API"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
@@ -0,0 +1,134 @@
+import copy
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from config import Config
+from logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+logger = get_logger()
+
+class WaitTimeout(requests.Timeout):
+    """La llamada en curso de otro hilo no terminó dentro de la espera permitida"""
+
+class _Call:
+    """Llamada en curso compartida por todos los que piden la misma clave"""
+    __slots__ = ("evento", "resultado", "error")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave: la primera ejecuta la función y las demás
+    esperan y reciben el mismo resultado (o la misma excepción).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, funcion, timeout=None):
+        """
+        Retorna (resultado, compartido); `compartido` es True si se reutilizó una llamada en curso.
+        Quien espera una llamada ajena lo hace como máximo `timeout` segundos (lanza WaitTimeout)
+        y, si la llamada falló, recibe su propia copia de la excepción.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            lider = call is None
+            if lider:
+                call = self._calls[key] = _Call()
+
+        if not lider:
+            if not call.evento.wait(timeout):
+                raise WaitTimeout(f"sin respuesta de la llamada en curso tras {timeout:.1f} s")
+            if call.error is not None:
+                raise _copy_error(call.error) from call.error
+            return call.resultado, True
+
+        try:
+            call.resultado = funcion()
+            return call.resultado, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.evento.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+def _copy_error(error):
+    """
+    Copia de la excepción del líder para un hilo que esperaba: relanzar el mismo objeto
+    en varios hilos reescribe su __traceback__.
+    """
+    try:
+        return copy.copy(error)
+    except Exception:
+        return RuntimeError(f"falló la llamada compartida: {error!r}")
+
+_flight = SingleFlight()
+
+def get_single_flight():
+    """Grupo compartido por todos los clientes del proceso"""
+    return _flight
+
+def _lock_path(key, lock_dir=None):
+    """Un archivo (vacío) por clave: claves distintas nunca comparten el bloqueo"""
+    nombre = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(lock_dir or os.path.join(Config.CACHE_DIR, "locks"), f"vuelo_{nombre}.lock")
+
+@contextmanager
+def process_lock(key, timeout, lock_dir=None):
+    """
+    Bloqueo exclusivo entre procesos para la clave (flock sobre un archivo en CACHE_DIR/locks).
+    Si no se obtiene dentro de `timeout` segundos, o la plataforma no lo soporta, se continúa sin él.
+    Produce True si se obtuvo el bloqueo.
+    """
+    if fcntl is None:
+        yield False
+        return
+
+    ruta = _lock_path(key, lock_dir)
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError as e:
+        logger.warning("No se pudo abrir el bloqueo {}: {}", ruta, e)
+        yield False
+        return
+
+    try:
+        limite = time.monotonic() + timeout
+        obtenido = False
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                obtenido = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= limite:
+                    logger.debug("Bloqueo {} ocupado tras {} s: se consulta sin esperar", ruta, timeout)
+                    break
+                time.sleep(0.05)
+        try:
+            yield obtenido
+        finally:
+            if obtenido:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -1,21 +1,31 @@
-import requests
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from logger import get_logger
+from config import Config
+from api_clients.http_client import fetch_json
+from api_clients.session import get_session
 
 logger = get_logger()
 
+BOGOTA_TIMEZONE = "America/Bogota"
+
 class TimeClient:
-    def __init__(self):
-        self.base_url = "http://worldtimeapi.org/api/timezone"
+    def __init__(self, mode=None):
+        self.base_url = Config.TIME_API_URL
+        self.session = get_session()
+        self.mode = mode or Config.TIME_SOURCE
     
-    def get_time_data(self, timezone):
-        """Obtiene datos de zona horaria"""
+    def get_time_data(self, timezone, timeout=None, deadline=None):
+        """Obtiene datos de zona horaria (localmente con zoneinfo o desde la API)"""
+        if self.mode == "local":
+            local_data = self._get_local_time_data(timezone)
+            if local_data:
+                return local_data
+        
         try:
             url = f"{self.base_url}/{timezone}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            logger.info(f"API Zona Horaria respondio para {timezone}")
+            data = fetch_json(url, source="time", timeout=timeout, session=self.session, deadline=deadline)
+            logger.info("API Zona Horaria respondio para {}", timezone)
             
             return {
                 'hora_local': data['datetime'],
@@ -25,20 +35,56 @@ class TimeClient:
             }
             
         except Exception as e:
-            logger.error(f"Error API Zona Horaria {timezone}: {e}")
+            logger.error("Error API Zona Horaria {}: {}", timezone, e)
             return self._get_mock_time_data(timezone)
     
+    def _get_local_time_data(self, timezone):
+        """Calcula hora local y offsets en proceso con la base tz local (incluye horario de verano)"""
+        try:
+            hora_local = datetime.now(ZoneInfo(timezone))
+        except (ZoneInfoNotFoundError, ValueError) as e:
+            logger.warning("Zona horaria {} no disponible localmente: {}", timezone, e)
+            return None
+        
+        utc_offset = self._format_offset(hora_local.utcoffset())
+        return {
+            'hora_local': hora_local.isoformat(),
+            'zona_horaria': timezone,
+            'utc_offset': utc_offset,
+            'diferencia_bogota': self._calculate_bogota_offset(utc_offset)
+        }
+    
+    def _format_offset(self, offset):
+        """Convierte un timedelta en texto "+HH:MM" """
+        minutos = int(offset.total_seconds() // 60)
+        signo = "+" if minutos >= 0 else "-"
+        horas, minutos = divmod(abs(minutos), 60)
+        return f"{signo}{horas:02d}:{minutos:02d}"
+    
+    def _offset_minutes(self, utc_offset):
+        """Convierte un offset como "+05:30" en minutos"""
+        signo = -1 if utc_offset.strip().startswith('-') else 1
+        horas, _, minutos = utc_offset.strip().lstrip('+-').partition(':')
+        return signo * (int(horas) * 60 + int(minutos or 0))
+    
+    def _bogota_offset_minutes(self):
+        """Offset actual de Bogotá en minutos (UTC-5 si no hay base tz)"""
+        try:
+            return int(datetime.now(ZoneInfo(BOGOTA_TIMEZONE)).utcoffset().total_seconds() // 60)
+        except (ZoneInfoNotFoundError, ValueError):
+            return -5 * 60
+    
     def _calculate_bogota_offset(self, utc_offset):
-        """Calcula diferencia horaria con Bogotá (-05:00)"""
+        """Calcula diferencia horaria con Bogotá (-05:00), incluyendo offsets fraccionarios"""
         try:
-            # Bogotá es UTC-5
-            bogota_offset = -5
+            difference = self._offset_minutes(utc_offset) - self._bogota_offset_minutes()
             
-            # Convertir offset like "+01:00" to hours
-            target_offset = int(utc_offset.split(':')[0])
+            if difference % 60 == 0:
+                return f"{difference // 60:+d} horas"
             
-            difference = target_offset - bogota_offset
-            return f"{difference:+d} horas"
+            signo = "+" if difference >= 0 else "-"
+            horas, minutos = divmod(abs(difference), 60)
+            return f"{signo}{horas}:{minutos:02d} horas"
             
         except:
             return "N/A"
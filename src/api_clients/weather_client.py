@@ -1,26 +1,78 @@
-import requests
 from logger import get_logger
+from config import Config
+from api_clients.http_client import fetch_json
+from api_clients.session import get_session
+from deadline import timeout_for
 
 logger = get_logger()
 
 class WeatherClient:
     def __init__(self):
-        self.base_url = "https://api.open-meteo.com/v1/forecast"
+        self.base_url = Config.WEATHER_API_URL
+        self.session = get_session()
     
-    def get_weather_data(self, lat, lon):
-        """Obtiene datos climáticos para una ubicación"""
+    def _build_params(self, latitudes, longitudes):
+        """Parametros de la API; acepta listas de coordenadas separadas por coma"""
+        return {
+            'latitude': latitudes,
+            'longitude': longitudes,
+            'current': 'temperature_2m,wind_speed_10m,precipitation,uv_index',
+            'daily': 'temperature_2m_max,temperature_2m_min,precipitation_probability_max',
+            'timezone': 'auto'
+        }
+    
+    def get_weather_data(self, lat, lon, deadline=None):
+        """
+        Obtiene datos climáticos para una ubicación. El timeout sale del tiempo restante
+        de `deadline` (lanza DeadlineExceeded si ya se agotó).
+        """
+        timeout = timeout_for(deadline)
+        try:
+            params = self._build_params(lat, lon)
+            data = fetch_json(self.base_url, params=params, source="weather", timeout=timeout,
+                              session=self.session, deadline=deadline)
+            logger.info("API Clima respondió exitosamente")
+            return data
+        except Exception as e:
+            logger.error("Error API Clima: {}", e)
+            return None
+    
+    def get_weather_batch(self, coords, chunk_size=None, deadline=None):
+        """
+        Obtiene datos climáticos de varias ubicaciones agrupándolas en peticiones multi-ubicación.
+        Retorna una lista alineada con `coords` (tuplas lat, lon); None donde no hubo datos.
+        Cada petición toma el tiempo restante de `deadline` como timeout; si se agota lanza
+        DeadlineExceeded y no se hacen más peticiones.
+        """
+        chunk_size = max(1, chunk_size or Config.WEATHER_BATCH_SIZE)
+        resultados = []
+        
+        for inicio in range(0, len(coords), chunk_size):
+            resultados.extend(self._get_weather_chunk(coords[inicio:inicio + chunk_size], deadline))
+        
+        return resultados
+    
+    def _get_weather_chunk(self, bloque, deadline=None):
+        """Consulta un bloque de coordenadas en una sola petición, con respaldo individual"""
+        if len(bloque) == 1:
+            return [self.get_weather_data(*bloque[0], deadline=deadline)]
+        
+        timeout = timeout_for(deadline)
         try:
-            params = {
-                'latitude': lat,
-                'longitude': lon,
-                'current': 'temperature_2m,wind_speed_10m,precipitation,uv_index',
-                'daily': 'temperature_2m_max,temperature_2m_min,precipitation_probability_max',
-                'timezone': 'auto'
-            }
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            logger.info(f"API Clima respondió exitosamente")
-            return response.json()
+            params = self._build_params(
+                ",".join(str(lat) for lat, _ in bloque),
+                ",".join(str(lon) for _, lon in bloque)
+            )
+            data = fetch_json(self.base_url, params=params, source="weather", timeout=timeout,
+                              session=self.session, deadline=deadline)
+            
+            # Con varias ubicaciones la API responde una lista en el mismo orden
+            if not isinstance(data, list) or len(data) != len(bloque):
+                raise ValueError(f"respuesta inesperada para {len(bloque)} ubicaciones")
+            
+            logger.info("API Clima respondió exitosamente para {} ubicaciones", len(bloque))
+            return data
         except Exception as e:
-            logger.error(f"Error API Clima: {e}")
-            return None
\ No newline at end of file
+            logger.warning("Error API Clima en lote de {} ubicaciones: {}. Consultando individualmente...", len(bloque), e)
+        # Fuera del except: un DeadlineExceeded del respaldo no queda encadenado al error del lote
+        return [self.get_weather_data(lat, lon, deadline=deadline) for lat, lon in bloque]
@@ -0,0 +1,91 @@
+# src/change_tracker.py
+import hashlib
+import json
+import os
+import threading
+from config import Config
+from logger import get_logger
+from records import CityResult
+
+logger = get_logger()
+
+def city_fingerprint(observacion, cambio):
+    """Huella de las entradas que determinan el resultado de una ciudad (clima actual, pronóstico y cambio)"""
+    entradas = [observacion.values(), cambio.values() if cambio else None]
+    serializado = json.dumps(entradas, ensure_ascii=False, default=str)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+class ChangeTracker:
+    """
+    Huellas de entrada por ciudad de la última ejecución, junto con su resultado.
+    Se persisten en disco para que una ejecución nueva pueda reutilizar las ciudades sin cambios.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(Config.CACHE_DIR, "huellas_ciudades.json")
+        self._lock = threading.Lock()
+        self._estado = None  # {ciudad: {"huella": ..., "resultado": ...}}
+
+    def _load(self):
+        if self._estado is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._estado = json.load(f)
+            except (OSError, ValueError):
+                self._estado = {}
+        return self._estado
+
+    def previous(self, ciudad, huella):
+        """Resultado anterior de la ciudad si sus entradas no cambiaron, si no None"""
+        with self._lock:
+            anterior = self._load().get(ciudad)
+        if anterior and anterior["huella"] == huella:
+            try:
+                return CityResult.from_dict(anterior["resultado"])
+            except (KeyError, TypeError, ValueError):
+                return None  # Formato anterior: se recalcula
+        return None
+
+    def last(self, ciudad):
+        """Último resultado persistido de la ciudad (sin importar su huella), o None"""
+        with self._lock:
+            anterior = self._load().get(ciudad)
+        if not anterior:
+            return None
+        try:
+            return CityResult.from_dict(anterior["resultado"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def update(self, cambios):
+        """Registra y persiste {ciudad: (huella, resultado)} de las ciudades recalculadas"""
+        if not cambios:
+            return
+
+        with self._lock:
+            estado = self._load()
+            for ciudad, (huella, resultado) in cambios.items():
+                estado[ciudad] = {"huella": huella, "resultado": resultado.to_dict()}
+            self._write(estado)
+
+    def _write(self, estado):
+        """Escritura atómica del archivo de huellas"""
+        directorio = os.path.dirname(self.path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        temporal = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(estado, f, ensure_ascii=False)
+            os.replace(temporal, self.path)
+        except OSError as e:
+            logger.warning("No se pudieron guardar las huellas en {}: {}", self.path, e)
+
+    def clear(self):
+        with self._lock:
+            self._estado = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -0,0 +1,114 @@
+# src/city_catalog.py
+import csv
+import json
+import math
+import os
+from collections import defaultdict
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+# Catálogo usado cuando no existe el archivo configurado
+CIUDADES_POR_DEFECTO = [
+    {"nombre": "Nueva York", "lat": 40.7128, "lon": -74.0060, "moneda": "USD", "timezone": "America/New_York"},
+    {"nombre": "Londres", "lat": 51.5074, "lon": -0.1278, "moneda": "GBP", "timezone": "Europe/London"},
+    {"nombre": "Tokio", "lat": 35.6762, "lon": 139.6503, "moneda": "JPY", "timezone": "Asia/Tokyo"},
+    {"nombre": "São Paulo", "lat": -23.5505, "lon": -46.6333, "moneda": "BRL", "timezone": "America/Sao_Paulo"},
+    {"nombre": "Sídney", "lat": -33.8688, "lon": 151.2093, "moneda": "AUD", "timezone": "Australia/Sydney"}
+]
+
+def cell_of(lat, lon, resolution=None):
+    """Celda de la grilla del modelo climático a la que pertenece una coordenada"""
+    resolution = resolution or Config.WEATHER_GRID_DEG
+    return (math.floor(lat / resolution), math.floor(lon / resolution))
+
+def group_by_cell(ciudades, resolution=None):
+    """
+    Agrupa las ciudades que caen en la misma celda de la grilla.
+    Retorna {celda: [indices en `ciudades`]} en orden de primera aparición.
+    """
+    celdas = {}
+    for indice, ciudad in enumerate(ciudades):
+        celdas.setdefault(cell_of(ciudad['lat'], ciudad['lon'], resolution), []).append(indice)
+    return celdas
+
+class CityCatalog:
+    """Catálogo de ciudades monitoreadas indexado por nombre, moneda y zona horaria."""
+
+    def __init__(self, ciudades):
+        self.ciudades = list(ciudades)
+        self.por_nombre = {}
+        self.por_moneda = defaultdict(list)
+        self.por_timezone = defaultdict(list)
+
+        for ciudad in self.ciudades:
+            self.por_nombre[ciudad['nombre']] = ciudad
+            self.por_moneda[ciudad['moneda']].append(ciudad)
+            self.por_timezone[ciudad['timezone']].append(ciudad)
+
+    def __len__(self):
+        return len(self.ciudades)
+
+    def __iter__(self):
+        return iter(self.ciudades)
+
+    def get(self, nombre):
+        return self.por_nombre.get(nombre)
+
+    def by_currency(self, moneda):
+        return self.por_moneda.get(moneda, [])
+
+    def by_timezone(self, timezone):
+        return self.por_timezone.get(timezone, [])
+
+    def currencies(self):
+        return list(self.por_moneda)
+
+    def timezones(self):
+        return list(self.por_timezone)
+
+    def grid_cells(self, resolution=None):
+        """Ciudades del catálogo agrupadas por celda de la grilla climática"""
+        return {
+            celda: [self.ciudades[i] for i in indices]
+            for celda, indices in group_by_cell(self.ciudades, resolution).items()
+        }
+
+    @classmethod
+    def from_file(cls, path):
+        """Carga el catálogo desde un archivo CSV o JSON con nombre, lat, lon, moneda y timezone"""
+        if path.lower().endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                filas = json.load(f)
+        else:
+            with open(path, "r", newline="", encoding="utf-8") as f:
+                filas = list(csv.DictReader(f))
+
+        ciudades = [
+            {
+                "nombre": fila["nombre"].strip(),
+                "lat": float(fila["lat"]),
+                "lon": float(fila["lon"]),
+                "moneda": fila["moneda"].strip().upper(),
+                "timezone": fila["timezone"].strip()
+            }
+            for fila in filas
+        ]
+        return cls(ciudades)
+
+    @classmethod
+    def load(cls, path=None):
+        """Carga el catálogo configurado; usa las 5 ciudades por defecto si no está disponible"""
+        path = path or Config.CITY_CATALOG_PATH
+        if not os.path.exists(path):
+            logger.warning("No se encontró el catálogo {}. Usando ciudades por defecto.", path)
+            return cls(CIUDADES_POR_DEFECTO)
+
+        try:
+            catalogo = cls.from_file(path)
+            logger.info("Catálogo de ciudades cargado: {} ciudades desde {}", len(catalogo), path)
+            return catalogo
+        except Exception as e:
+            logger.error("Error cargando catálogo {}: {}. Usando ciudades por defecto.", path, e)
+            return cls(CIUDADES_POR_DEFECTO)
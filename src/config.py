@@ -11,8 +11,97 @@ class Config:
     APP_NAME = os.getenv("APP_NAME", "PRUEBA_MISSION")
     ENV = os.getenv("ENV", "development")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+    # Logging: diagnose (volcado de variables en trazas) solo para desarrollo, JSON estructurado opcional
+    # y muestreo de mensajes repetitivos: LOG_SAMPLE_BURST por punto de llamada cada LOG_SAMPLE_WINDOW s (0 = sin muestreo)
+    LOG_DIAGNOSE = os.getenv("LOG_DIAGNOSE", "false").lower() == "true"
+    LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"
+    LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() == "true"
+    LOG_FILE = os.getenv("LOG_FILE", "true").lower() == "true"
+    LOG_SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW", "60"))
+    LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
     API_BASE_URL = os.getenv("API_BASE_URL", "https://api.missionsas.com")
     DB_PATH = os.getenv("DB_PATH", "data/database.db")
+    # URLs de las APIs externas (configurables para apuntar a un servidor de pruebas)
+    WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+    EXCHANGE_API_URL = os.getenv("EXCHANGE_API_URL", "https://api.exchangerate-api.com/v4/latest/USD")
+    TIME_API_URL = os.getenv("TIME_API_URL", "http://worldtimeapi.org/api/timezone")
+    # Días de histórico usados por el predictor (0 = todo el histórico)
+    ML_HISTORY_DAYS = int(os.getenv("ML_HISTORY_DAYS", "0"))
+    # Ajuste de tendencia: últimos N puntos por ciudad y vida media exponencial (0 = desactivado)
+    ML_TREND_WINDOW = int(os.getenv("ML_TREND_WINDOW", "0"))
+    ML_TREND_HALFLIFE = float(os.getenv("ML_TREND_HALFLIFE", "0"))
+    # Cada cuánto el dashboard revisa si hay datos nuevos (segundos)
+    DASHBOARD_REFRESH_SECONDS = int(os.getenv("DASHBOARD_REFRESH_SECONDS", "30"))
+    # Modelos de anomalías persistidos: "global" o "ciudad"; se reentrenan por edad o por deriva
+    MODELS_DIR = os.getenv("MODELS_DIR", "data/models")
+    ANOMALY_SCOPE = os.getenv("ANOMALY_SCOPE", "global")
+    ANOMALY_RETRAIN_HOURS = float(os.getenv("ANOMALY_RETRAIN_HOURS", "24"))
+    ANOMALY_DRIFT_STD = float(os.getenv("ANOMALY_DRIFT_STD", "1.0"))
+    ANOMALY_DRIFT_MIN_ROWS = int(os.getenv("ANOMALY_DRIFT_MIN_ROWS", "10"))
+    MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+    WEATHER_BATCH_SIZE = int(os.getenv("WEATHER_BATCH_SIZE", "50"))
+    # Ciudades recalculadas que se acumulan antes de volcarlas al histórico y al tracker
+    SCORE_CHUNK_SIZE = int(os.getenv("SCORE_CHUNK_SIZE", "500"))
+    CITY_CATALOG_PATH = os.getenv("CITY_CATALOG_PATH", "data/ciudades.csv")
+    # Tamaño (grados) de la celda de grilla: ciudades en la misma celda comparten consulta de clima
+    WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.1"))
+    # "local": zonas horarias con la base tz del sistema (zoneinfo); "api": WorldTimeAPI
+    TIME_SOURCE = os.getenv("TIME_SOURCE", "local")
+
+    # Cache persistente de respuestas HTTP (TTL en segundos por fuente)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_DIR = os.getenv("CACHE_DIR", "data/cache")
+    CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "50"))
+    CACHE_TTL_WEATHER = int(os.getenv("CACHE_TTL_WEATHER", "3600"))
+    CACHE_TTL_EXCHANGE = int(os.getenv("CACHE_TTL_EXCHANGE", "86400"))
+    CACHE_TTL_TIME = int(os.getenv("CACHE_TTL_TIME", "60"))
+
+    # Ventanas (días) del histórico de tipos de cambio alimentado por cada ejecución
+    FX_WINDOWS = os.getenv("FX_WINDOWS", "5,30,90")
+
+    # Sesion HTTP compartida: pools por host (ej. "api.open-meteo.com=20,worldtimeapi.org=10")
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+    HTTP_POOL_SIZES = os.getenv("HTTP_POOL_SIZES", "")
+    # Reintentos cortos: el circuit breaker se encarga de los hosts caídos
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "1"))
+    HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.2"))
+    HTTP_RESPECT_RETRY_AFTER = os.getenv("HTTP_RESPECT_RETRY_AFTER", "false").lower() == "true"
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+
+    # Presupuesto de tiempo por ejecución (segundos, 0 = sin límite): las ciudades que no alcanzan
+    # se publican degradadas con sus últimos datos conocidos
+    RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "0"))
+    # Peticiones duplicadas ("hedged") cuando una llamada supera el percentil HEDGE_PERCENTILE
+    # de las latencias recientes de su fuente (requiere HEDGE_MIN_SAMPLES muestras)
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MAX_WORKERS = int(os.getenv("HEDGE_MAX_WORKERS", "8"))
+
+    # Peticiones idénticas concurrentes comparten una sola llamada; entre procesos con un bloqueo en CACHE_DIR/locks
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    SINGLE_FLIGHT_CROSS_PROCESS = os.getenv("SINGLE_FLIGHT_CROSS_PROCESS", "false").lower() == "true"
+
+    # Resiliencia por host: token bucket (0 = sin límite) y circuit breaker
+    RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "5"))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    # Scheduler: cadencia por fuente (minutos) y tolerancia a ejecuciones atrasadas (segundos)
+    SCHEDULER_WEATHER_MINUTES = float(os.getenv("SCHEDULER_WEATHER_MINUTES", "30"))
+    SCHEDULER_EXCHANGE_MINUTES = float(os.getenv("SCHEDULER_EXCHANGE_MINUTES", "60"))
+    SCHEDULER_MISFIRE_GRACE_SECONDS = int(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "300"))
+    # Omitir el recálculo y la escritura de ciudades cuyas entradas no cambiaron desde la última ejecución
+    CHANGE_DETECTION_ENABLED = os.getenv("CHANGE_DETECTION_ENABLED", "true").lower() == "true"
+
+    # Métricas de APIs y etapas: JSON por ejecución en METRICS_DIR y endpoint /metrics opcional (0 = desactivado)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DIR = os.getenv("METRICS_DIR", "data/metrics")
+    METRICS_RETENTION = int(os.getenv("METRICS_RETENTION", "200"))  # Archivos JSON que se conservan
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
 
     @staticmethod
     def summary():
@@ -23,4 +112,10 @@ class Config:
             "LOG_LEVEL": Config.LOG_LEVEL,
             "API_BASE_URL": Config.API_BASE_URL,
             "DB_PATH": Config.DB_PATH,
+            "MAX_WORKERS": Config.MAX_WORKERS,
+            "WEATHER_BATCH_SIZE": Config.WEATHER_BATCH_SIZE,
+            "CITY_CATALOG_PATH": Config.CITY_CATALOG_PATH,
+            "TIME_SOURCE": Config.TIME_SOURCE,
+            "CACHE_ENABLED": Config.CACHE_ENABLED,
+            "CACHE_DIR": Config.CACHE_DIR,
         }
\ No newline at end of file
@@ -0,0 +1,24 @@
+# src/conftest.py
+import time
+import pytest
+
+class Reloj:
+    """Reloj falso: sleep() avanza el tiempo sin esperar"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+        self.esperas = []
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.esperas.append(segundos)
+        self.ahora += segundos
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reemplaza time.monotonic por un Reloj falso (sleep se parchea donde se necesite)"""
+    reloj = Reloj()
+    monkeypatch.setattr(time, "monotonic", reloj.monotonic)
+    return reloj
@@ -2,9 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
-import json
-import os
+from datetime import datetime, timezone
+from data_layer import (
+    obtener_versiones, cargar_datos_recientes, get_training_job,
+    cargar_historico, invalidar_cache
+)
+from logger import setup_logging
+
+# Una sola vez por proceso (Streamlit vuelve a ejecutar el script en cada interacción)
+setup_logging()
 
 # Configurar página
 st.set_page_config(
@@ -17,23 +23,9 @@ st.set_page_config(
 st.title("🌍 TravelCorp - Monitoreo de Condiciones de Viaje")
 st.markdown("Sistema RPA para evaluación de viabilidad de viajes corporativos")
 
-# Cargar datos más recientes
-def cargar_datos_recientes():
-    """Carga el archivo JSON más reciente generado"""
-    output_dir = "data/outputs"
-    if not os.path.exists(output_dir):
-        return []
-    
-    archivos = [f for f in os.listdir(output_dir) if f.startswith("reporte_ciudades") and f.endswith(".json")]
-    if not archivos:
-        return []
-    
-    archivo_reciente = sorted(archivos)[-1]  # Más reciente
-    with open(os.path.join(output_dir, archivo_reciente), 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-# Cargar datos
-datos = cargar_datos_recientes()
+# Cargar datos (cacheados por versión: un cambio de filtro no vuelve a leer archivos)
+versiones = obtener_versiones()
+datos = cargar_datos_recientes(versiones["reporte"])
 
 if not datos:
     st.warning("No se encontraron datos recientes. Ejecuta el sistema primero.")
@@ -202,23 +194,61 @@ st.plotly_chart(fig_componentes, use_container_width=True)
 # --- PIE DE PÁGINA ---
 st.markdown("---")
 st.markdown(f"*Última actualización: {ciudad_data['timestamp']}*")
+if ciudad_data.get('degradado'):
+    st.caption("Datos degradados: la última ejecución no alcanzó a consultar esta ciudad a tiempo y se muestran los últimos datos conocidos.")
 
 # =============================
 # SECCIÓN: PREDICCIÓN DE IVV
 # =============================
-import pandas as pd
-import sys, os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from ml_predictor import IVVPredictor
-import plotly.express as px
-
 st.header("Predicción de IVV (Machine Learning)")
 
-predictor = IVVPredictor()
-predicciones = predictor.predict_ivv()
-anomalias = predictor.detect_anomalies()
+# El entrenamiento corre en un hilo de fondo; la página solo lee el último resultado publicado
+job = get_training_job()
+
+# --- BOTÓN DE RECALCULAR PREDICCIONES ---
+if st.button("Recalcular Predicciones ML"):
+    invalidar_cache()
+    versiones = obtener_versiones()
+    if job.submit(versiones["historico"], force=True):
+        st.info("Recalculando predicciones en segundo plano...")
+    else:
+        st.info("Ya hay un entrenamiento en curso; se mostrará al terminar.")
+else:
+    job.submit(versiones["historico"])
+
+# run_every queda fijo al definir el fragmento: al terminar el entrenamiento se vuelve a ejecutar
+# la página completa para definirlo de nuevo sin refresco automático
+refresco_automatico = job.is_running()
+
+@st.fragment(run_every=2 if refresco_automatico else None)
+def seccion_predicciones():
+    """Muestra el último resultado publicado; mientras se entrena se refresca sola"""
+    resultado = job.latest()
+    estado = job.status()
+
+    if refresco_automatico and estado != "entrenando":
+        st.rerun()
+
+    if resultado is not None:
+        edad_min = (datetime.now(timezone.utc) - resultado["entrenado_en"]).total_seconds() / 60
+        st.caption(
+            f"Modelo v{resultado['version']} · estado: {estado} · "
+            f"entrenado hace {edad_min:.0f} min ({resultado['duracion_s']} s)"
+        )
+    elif estado == "error":
+        st.error(f"Error entrenando los modelos: {job.last_error()}")
+        return
+    else:
+        st.info("Entrenando modelos en segundo plano...")
+        return
+
+    predicciones = resultado["predicciones"]
+    anomalias = resultado["anomalias"]
+
+    if not predicciones:
+        st.warning("No se encontraron suficientes datos históricos para generar predicciones.")
+        return
 
-if predicciones:
     # Mostrar tabla de predicciones
     st.subheader("Predicción estimada de IVV futuro por ciudad")
     df_pred = pd.DataFrame(list(predicciones.items()), columns=["Ciudad", "IVV_Predicho"])
@@ -227,12 +257,9 @@ if predicciones:
     # Mostrar gráfico histórico + predicción
     st.subheader("Tendencia histórica del IVV con proyección futura")
 
-    # Cargar datos históricos
-    import glob, os
-    import pandas as pd
-    csv_files = glob.glob(os.path.join("data/outputs", "resumen_ciudades_*.csv"))
-    if csv_files:
-        df_hist = pd.concat([pd.read_csv(f, encoding='latin-1') for f in csv_files])
+    # Cargar datos históricos (solo las ciudades con predicción)
+    df_hist = cargar_historico(resultado["version_historico"], tuple(df_pred["Ciudad"]))
+    if not df_hist.empty:
         for city in df_pred["Ciudad"]:
             sub = df_hist[df_hist["Ciudad"] == city].copy()
             sub["Index"] = range(len(sub))
@@ -253,14 +280,4 @@ if predicciones:
     else:
         st.success("No se detectaron anomalías significativas en los datos históricos.")
 
-# --- BOTÓN DE RECALCULAR PREDICCIONES ---
-st.markdown("---")
-if st.button("Recalcular Predicciones ML"):
-    with st.spinner("Entrenando modelo y recalculando IVV..."):
-        predicciones = predictor.predict_ivv()
-        anomalias = predictor.detect_anomalies()
-    st.success("Predicciones actualizadas correctamente.")
-    st.rerun()
-
-else:
-    st.warning("No se encontraron suficientes datos históricos para generar predicciones.")
+seccion_predicciones()
@@ -0,0 +1,70 @@
+# src/dashboard/data_layer.py
+# Capa de datos del dashboard con cache de Streamlit.
+# Las lecturas se indexan por la versión de los datos (mtime del reporte y versión del histórico),
+# así un cambio de filtro solo vuelve a dibujar la página sin I/O ni entrenamiento.
+import json
+import os
+import sys
+import streamlit as st
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config import Config
+from history_store import HistoryStore
+from ml_predictor import IVVPredictor
+from ml_jobs import MLTrainingJob
+
+OUTPUT_DIR = "data/outputs"
+
+@st.cache_resource
+def get_store():
+    """Almacén histórico compartido por todas las sesiones"""
+    return HistoryStore()
+
+@st.cache_resource
+def get_predictor():
+    """Predictor compartido: conserva el histórico consolidado entre ejecuciones de la página"""
+    return IVVPredictor(data_path=OUTPUT_DIR, store=get_store())
+
+@st.cache_data(ttl=Config.DASHBOARD_REFRESH_SECONDS, show_spinner=False)
+def obtener_versiones():
+    """
+    Versión actual de los datos: (archivo, mtime) del reporte JSON más reciente y versión del histórico.
+    Se revisa como máximo una vez cada DASHBOARD_REFRESH_SECONDS.
+    """
+    version_reporte = None
+    if os.path.exists(OUTPUT_DIR):
+        archivos = [f for f in os.listdir(OUTPUT_DIR) if f.startswith("reporte_ciudades") and f.endswith(".json")]
+        if archivos:
+            archivo_reciente = sorted(archivos)[-1]  # Más reciente
+            ruta = os.path.join(OUTPUT_DIR, archivo_reciente)
+            version_reporte = (ruta, os.path.getmtime(ruta))
+
+    # Incorporar CSV que aún no estén en el histórico antes de leer su versión
+    store = get_store()
+    store.import_csv_files(OUTPUT_DIR)
+    return {"reporte": version_reporte, "historico": store.version()}
+
+@st.cache_data(show_spinner=False)
+def cargar_datos_recientes(version_reporte):
+    """Carga el archivo JSON más reciente generado (una vez por versión)"""
+    if version_reporte is None:
+        return []
+
+    ruta, _ = version_reporte
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@st.cache_resource
+def get_training_job():
+    """Trabajo de entrenamiento ML en segundo plano, compartido por todas las sesiones"""
+    return MLTrainingJob(get_predictor())
+
+@st.cache_data(show_spinner=False)
+def cargar_historico(version_historico, ciudades):
+    """Histórico de IVV de las ciudades indicadas (una vez por versión del histórico)"""
+    return get_store().query(ciudades=list(ciudades))
+
+def invalidar_cache():
+    """Descarta las versiones y resultados cacheados para forzar una nueva lectura"""
+    obtener_versiones.clear()
+    cargar_historico.clear()
@@ -1,62 +1,166 @@
+import threading
 from logger import get_logger
 from api_clients.weather_client import WeatherClient
 from api_clients.exchange_client import ExchangeClient
 from datetime import datetime, timezone
 from api_clients.time_client import TimeClient
+from city_catalog import CityCatalog, group_by_cell
+from records import WeatherObservation, ExchangeData
+from deadline import DeadlineExceeded, timeout_for
 
 logger = get_logger()
 
-CIUDADES = [
-    {"nombre": "Nueva York", "lat": 40.7128, "lon": -74.0060, "moneda": "USD", "timezone": "America/New_York"},
-    {"nombre": "Londres", "lat": 51.5074, "lon": -0.1278, "moneda": "GBP", "timezone": "Europe/London"},
-    {"nombre": "Tokio", "lat": 35.6762, "lon": 139.6503, "moneda": "JPY", "timezone": "Asia/Tokyo"},
-    {"nombre": "São Paulo", "lat": -23.5505, "lon": -46.6333, "moneda": "BRL", "timezone": "America/Sao_Paulo"},
-    {"nombre": "Sídney", "lat": -33.8688, "lon": 151.2093, "moneda": "AUD", "timezone": "Australia/Sydney"}
-]
+# Catalogo de ciudades monitoreadas (data/ciudades.csv por defecto)
+CATALOGO = CityCatalog.load()
+CIUDADES = CATALOGO.ciudades
 
 class DataCollector:
     def __init__(self):
         self.weather_client = WeatherClient()
         self.exchange_client = ExchangeClient()
         self.time_client = TimeClient()
+        # Snapshot de tipos de cambio compartido por todas las ciudades de la ejecucion
+        self._exchange_snapshot = None
+        # Último snapshot completo: respaldo cuando el presupuesto de la ejecución se agota
+        self._last_exchange_snapshot = None
+        self._exchange_lock = threading.Lock()
     
-    def collect_city_data(self, ciudad):
+    def collect_city_data(self, ciudad, deadline=None):
         """Recolecta datos para una ciudad especifica"""
-        logger.info(f"Recolectando datos para {ciudad['nombre']}")
+        logger.info("Recolectando datos para {}", ciudad['nombre'])
         
-        weather_data = self.weather_client.get_weather_data(ciudad['lat'], ciudad['lon'])
+        weather_data = self.weather_client.get_weather_data(ciudad['lat'], ciudad['lon'], deadline=deadline)
+        return self._build_city_data(ciudad, weather_data)
+    
+    def collect_cities_data(self, ciudades, deadline=None):
+        """
+        Recolecta datos climaticos de varias ciudades con peticiones agrupadas.
+        Las ciudades de una misma celda de la grilla comparten una sola consulta.
+        Con `deadline` cada consulta usa como timeout el tiempo restante de la ejecucion
+        y se deja de consultar al agotarse (lanza DeadlineExceeded).
+        """
+        celdas = group_by_cell(ciudades)
+        logger.info("Recolectando datos para {} ciudades en lote ({} celdas)", len(ciudades), len(celdas))
+        
+        representantes = [ciudades[indices[0]] for indices in celdas.values()]
+        coords = [(ciudad['lat'], ciudad['lon']) for ciudad in representantes]
+        weather_batch = self.weather_client.get_weather_batch(coords, deadline=deadline)
         
+        resultados = [None] * len(ciudades)
+        for indices, weather_data in zip(celdas.values(), weather_batch):
+            for indice in indices:
+                resultados[indice] = self._build_city_data(ciudades[indice], weather_data)
+        return resultados
+    
+    def _build_city_data(self, ciudad, weather_data):
+        """Proyecta la respuesta del clima a un WeatherObservation de la ciudad"""
         if weather_data:
             timestamp_actual = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
             
-            return {
-                'ciudad': ciudad['nombre'],
-                'clima': weather_data,
-                'timestamp': timestamp_actual
-            }
+            try:
+                return WeatherObservation.from_api(ciudad['nombre'], weather_data, timestamp_actual)
+            except (KeyError, TypeError) as e:
+                logger.error("Respuesta de clima incompleta para {}: {}", ciudad['nombre'], e)
         return None
 
-    def collect_exchange_data(self, moneda):
-        """Recolecta datos de tipo de cambio para una moneda"""
+    def get_exchange_snapshot(self, deadline=None):
+        """
+        Obtiene una sola vez por ejecucion las tasas y tendencias de todas las monedas.
+        Con `deadline` no espera mas alla del tiempo restante (lanza DeadlineExceeded).
+        """
+        espera = deadline.remaining() if deadline else None
+        if not self._exchange_lock.acquire(timeout=-1 if espera is None else espera):
+            raise DeadlineExceeded("snapshot de tipos de cambio aun en curso")
+        try:
+            if self._exchange_snapshot is None:
+                self.set_exchange_snapshot(self.build_exchange_snapshot(deadline))
+            return self._exchange_snapshot
+        finally:
+            self._exchange_lock.release()
+
+    def build_exchange_snapshot(self, deadline=None):
+        """
+        Consulta tasas y tendencias de todas las monedas sin tocar el snapshot vigente
+        (se publica con set_exchange_snapshot). Lanza DeadlineExceeded si se agota el presupuesto.
+        """
+        try:
+            rates, fecha = self.exchange_client.get_exchange_rates(
+                timeout=timeout_for(deadline), fallback=False, deadline=deadline
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            rates, fecha = None, None
+        
+        if rates is not None:
+            # Las tendencias salen del historico local actualizado con estas tasas (sin mas llamadas)
+            # Con la cache de 24 h las tasas pueden ser de ayer: se registran bajo la fecha de la API
+            snapshot = {'rates': rates, 'trends': self.exchange_client.record_rates(rates, fecha), 'real': True}
+        else:
+            # Las tasas simuladas no se registran: se usan las ultimas tendencias conocidas
+            logger.info("Usando datos simulados...")
+            rates = self.exchange_client._get_mock_rates()
+            snapshot = {'rates': rates, 'trends': self.exchange_client.analyze_trend(), 'real': False}
+        
+        logger.info("Snapshot de tipos de cambio listo: {} monedas", len(rates))
+        return snapshot
+
+    def set_exchange_snapshot(self, snapshot):
+        """
+        Publica un snapshot ya construido. Es un solo reemplazo de referencia: quien ya tomó el
+        anterior (un cálculo en curso) sigue usándolo completo.
+        """
+        self._exchange_snapshot = snapshot
+        if snapshot['real']:
+            # Solo un snapshot real sirve de respaldo cuando se agota el presupuesto
+            self._last_exchange_snapshot = snapshot
+
+    def current_exchange_snapshot(self):
+        """Snapshot vigente sin consultar la API (None si aún no hay)"""
+        return self._exchange_snapshot
+    
+    def reset_exchange_snapshot(self):
+        """Descarta el snapshot para que la siguiente ejecucion consulte tasas nuevas"""
+        with self._exchange_lock:
+            self._exchange_snapshot = None
+
+    def _fallback_exchange_snapshot(self):
+        """Ultimo snapshot conocido o, si no hay, tasas simuladas sin tendencia"""
+        return self._last_exchange_snapshot or {'rates': self.exchange_client._get_mock_rates(), 'trends': {}}
+
+    def collect_exchange_data(self, moneda, deadline=None, snapshot=None):
+        """
+        Recolecta datos de tipo de cambio para una moneda desde `snapshot` o, si no se indica, el de la ejecucion.
+        Si el presupuesto se agota antes de tener el snapshot usa el ultimo conocido (marcado como degradado).
+        """
         try:
-            rates = self.exchange_client.get_exchange_rates()
-            history = self.exchange_client.get_exchange_history()
-            trends = self.exchange_client.analyze_trend(history)
+            degradado = False
+            try:
+                snapshot = snapshot or self.get_exchange_snapshot(deadline)
+            except DeadlineExceeded:
+                snapshot, degradado = self._fallback_exchange_snapshot(), True
+            rates = snapshot['rates']
+            trends = snapshot['trends']
+            
+            tendencia = trends.get(moneda, {})
             
-            return {
-                'tipo_cambio_actual': rates.get(moneda, 1.0),
-                'variacion_diaria': trends.get(moneda, {}).get('variacion_diaria', 0),
-                'tendencia_5_dias': trends.get(moneda, {}).get('tendencia', 'estable'),
-                'es_volatil': trends.get(moneda, {}).get('volatil', False)
-            }
+            return ExchangeData(
+                rates.get(moneda, 1.0),
+                tendencia.get('variacion_diaria', 0),
+                tendencia.get('tendencia', 'estable'),
+                tendencia.get('volatil', False),
+                degradado
+            )
         except Exception as e:
-            logger.error(f"Error recolectando datos de cambio para {moneda}: {e}")
+            logger.error("Error recolectando datos de cambio para {}: {}", moneda, e)
             return None
     
-    def collect_time_data(self, timezone):
+    def collect_time_data(self, timezone, deadline=None):
         """Recolecta datos de zona horaria"""
         try:
-            return self.time_client.get_time_data(timezone)
+            # En modo local no se consulta la red: el presupuesto solo limita la consulta a la API
+            timeout = timeout_for(deadline) if self.time_client.mode != "local" else None
+            return self.time_client.get_time_data(timezone, timeout=timeout, deadline=deadline)
         except Exception as e:
-            logger.error(f"Error recolectando datos de tiempo para {timezone}: {e}")
+            logger.error("Error recolectando datos de tiempo para {}: {}", timezone, e)
             return None
\ No newline at end of file
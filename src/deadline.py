@@ -0,0 +1,45 @@
+# src/deadline.py
+import time
+from config import Config
+
+class DeadlineExceeded(TimeoutError):
+    """Se agotó el presupuesto de tiempo de la ejecución"""
+
+class Deadline:
+    """
+    Presupuesto de tiempo de una ejecución. Cada llamada a una API toma como timeout
+    el mínimo entre su timeout normal y el tiempo restante. `seconds` None o 0 = sin límite.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds or None
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    @classmethod
+    def from_config(cls):
+        return cls(Config.RUN_DEADLINE_SECONDS)
+
+    def remaining(self):
+        """Segundos restantes (None si no hay límite)"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, default=None):
+        """Timeout para la próxima llamada; lanza DeadlineExceeded si ya no queda tiempo"""
+        default = default if default is not None else Config.HTTP_TIMEOUT
+        restante = self.remaining()
+        if restante is None:
+            return default
+        if restante <= 0:
+            raise DeadlineExceeded(f"presupuesto de {self.seconds} s agotado")
+        return min(default, restante)
+
+def timeout_for(deadline, default=None):
+    """Timeout de una llamada con o sin deadline"""
+    if deadline is None:
+        return default if default is not None else Config.HTTP_TIMEOUT
+    return deadline.timeout(default)
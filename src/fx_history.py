@@ -0,0 +1,281 @@
+# src/fx_history.py
+import math
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fx_tasas (
+    moneda TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    tasa REAL NOT NULL,
+    variacion REAL,
+    PRIMARY KEY (moneda, fecha)
+);
+CREATE TABLE IF NOT EXISTS fx_estado (
+    moneda TEXT PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    tasa REAL NOT NULL,
+    tasa_anterior REAL,
+    variacion REAL,
+    racha INTEGER NOT NULL DEFAULT 0,
+    racha_anterior INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS fx_ventanas (
+    moneda TEXT NOT NULL,
+    dias INTEGER NOT NULL,
+    inicio TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    suma REAL NOT NULL,
+    suma_cuadrados REAL NOT NULL,
+    PRIMARY KEY (moneda, dias)
+);
+"""
+
+# Días seguidos con variación del mismo signo para marcar tendencia, dentro de la ventana original de 5 días
+DIAS_TENDENCIA = 3
+VENTANA_TENDENCIA = 5
+UMBRAL_VOLATIL = 3
+
+def parse_windows(valor):
+    """Convierte "5,30,90" en (5, 30, 90)"""
+    dias = sorted({int(parte) for parte in str(valor).split(",") if parte.strip()})
+    return tuple(d for d in dias if d > 0) or (5,)
+
+def _variacion(tasa, anterior):
+    if not anterior:
+        return None
+    return (tasa - anterior) / anterior * 100
+
+def _racha(previa, variacion):
+    """
+    Días seguidos con variación positiva (> 0) o negativa (< 0) incluyendo la nueva,
+    acotados a VENTANA_TENDENCIA
+    """
+    if not variacion:
+        return 0
+    if variacion > 0:
+        return min(previa + 1, VENTANA_TENDENCIA) if previa > 0 else 1
+    return max(previa - 1, -VENTANA_TENDENCIA) if previa < 0 else -1
+
+def _consecutivas(anterior, fecha):
+    """True si `fecha` es el día siguiente a `anterior` (texto ISO o None)"""
+    return anterior is not None and (fecha - timedelta(days=1)).isoformat() == anterior
+
+class FxHistory:
+    """
+    Histórico diario de tipos de cambio en SQLite (misma base que el histórico de observaciones),
+    alimentado con el snapshot de cada ejecución. Guarda una tasa por moneda y día (la última del día)
+    y mantiene estadísticas por ventana (Config.FX_WINDOWS días) que se actualizan en O(1) por observación:
+    suma y suma de cuadrados de las variaciones diarias y racha de días con el mismo signo.
+    """
+
+    def __init__(self, db_path=None, windows=None):
+        self.db_path = db_path or Config.DB_PATH
+        self.windows = tuple(windows) if windows else parse_windows(Config.FX_WINDOWS)
+        directorio = os.path.dirname(self.db_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Conexión que confirma la transacción al salir y siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_snapshot(self, rates, fecha=None):
+        """
+        Registra las tasas de `fecha` (la de la fuente; por defecto la fecha UTC actual) y retorna las
+        tendencias {moneda: {'tendencia', 'variacion_diaria', 'volatil', 'ventanas'}} sin recalcular las
+        ventanas. Una fecha ya registrada con la misma tasa no cambia nada; con otra tasa la reemplaza.
+        """
+        fecha = fecha or datetime.now(timezone.utc).date()
+        try:
+            with self._connect() as conn:
+                # Bloqueo de escritura desde el inicio: varios procesos pueden registrar a la vez
+                conn.execute("BEGIN IMMEDIATE")
+                for moneda, tasa in rates.items():
+                    if tasa:
+                        self._update(conn, moneda, float(tasa), fecha)
+                self._prune(conn, fecha)
+            logger.info("Histórico de tipos de cambio actualizado: {} monedas ({})", len(rates), fecha)
+        except sqlite3.Error as e:
+            logger.error("Error actualizando el histórico de tipos de cambio en {}: {}", self.db_path, e)
+        return self.trends(list(rates))
+
+    def _update(self, conn, moneda, tasa, fecha):
+        hoy = fecha.isoformat()
+        estado = conn.execute(
+            "SELECT fecha, tasa, tasa_anterior, variacion, racha, racha_anterior FROM fx_estado WHERE moneda = ?",
+            (moneda,)
+        ).fetchone()
+
+        if estado is None:
+            conn.execute("INSERT INTO fx_tasas (moneda, fecha, tasa, variacion) VALUES (?, ?, ?, NULL)", (moneda, hoy, tasa))
+            conn.execute("INSERT INTO fx_estado (moneda, fecha, tasa) VALUES (?, ?, ?)", (moneda, hoy, tasa))
+            return
+
+        ultima_fecha, ultima_tasa, tasa_anterior, variacion_vieja, racha, racha_anterior = estado
+        if hoy < ultima_fecha:
+            return  # Observación atrasada: las estadísticas solo avanzan
+
+        if hoy == ultima_fecha:
+            if tasa == ultima_tasa:
+                return  # La misma observación otra vez (por ejemplo, servida desde la cache)
+            # Otra tasa para el mismo día: se reemplaza la observación del día
+            variacion = _variacion(tasa, tasa_anterior)
+            (fecha_anterior,) = conn.execute(
+                "SELECT MAX(fecha) FROM fx_tasas WHERE moneda = ? AND fecha < ?", (moneda, hoy)
+            ).fetchone()
+            nueva_racha = _racha(racha_anterior, variacion) if _consecutivas(fecha_anterior, fecha) else 0
+            conn.execute("UPDATE fx_tasas SET tasa = ?, variacion = ? WHERE moneda = ? AND fecha = ?",
+                         (tasa, variacion, moneda, hoy))
+            conn.execute("UPDATE fx_estado SET tasa = ?, variacion = ?, racha = ? WHERE moneda = ?",
+                         (tasa, variacion, nueva_racha, moneda))
+            for dias in self.windows:
+                self._window_swap(conn, moneda, dias, fecha, variacion_vieja, variacion)
+            return
+
+        variacion = _variacion(tasa, ultima_tasa)
+        # La racha solo cuenta variaciones entre días seguidos: tras un día sin datos vuelve a cero
+        consecutiva = _consecutivas(ultima_fecha, fecha)
+        conn.execute("INSERT INTO fx_tasas (moneda, fecha, tasa, variacion) VALUES (?, ?, ?, ?)",
+                     (moneda, hoy, tasa, variacion))
+        conn.execute(
+            "UPDATE fx_estado SET fecha = ?, tasa = ?, tasa_anterior = ?, variacion = ?, racha = ?, racha_anterior = ? "
+            "WHERE moneda = ?",
+            (hoy, tasa, ultima_tasa, variacion, _racha(racha, variacion) if consecutiva else 0, racha, moneda)
+        )
+        for dias in self.windows:
+            self._window_advance(conn, moneda, dias, fecha, variacion, ultima_fecha)
+
+    def _window(self, conn, moneda, dias, inicio):
+        fila = conn.execute(
+            "SELECT inicio, n, suma, suma_cuadrados FROM fx_ventanas WHERE moneda = ? AND dias = ?", (moneda, dias)
+        ).fetchone()
+        if fila is None:
+            conn.execute(
+                "INSERT INTO fx_ventanas (moneda, dias, inicio, n, suma, suma_cuadrados) VALUES (?, ?, ?, 0, 0, 0)",
+                (moneda, dias, inicio)
+            )
+            return [inicio, 0, 0.0, 0.0]
+        return list(fila)
+
+    def _save_window(self, conn, moneda, dias, ventana):
+        conn.execute(
+            "UPDATE fx_ventanas SET inicio = ?, n = ?, suma = ?, suma_cuadrados = ? WHERE moneda = ? AND dias = ?",
+            (*ventana, moneda, dias)
+        )
+
+    def _window_advance(self, conn, moneda, dias, fecha, variacion, ultima_fecha):
+        """Agrega la variación del día y descuenta las que quedaron fuera de la ventana"""
+        nuevo_inicio = (fecha - timedelta(days=dias - 1)).isoformat()
+        ventana = self._window(conn, moneda, dias, nuevo_inicio)
+
+        if ultima_fecha < nuevo_inicio:
+            # La moneda no tuvo datos dentro de la ventana: empieza de cero
+            ventana = [nuevo_inicio, 0, 0.0, 0.0]
+        elif ventana[0] < nuevo_inicio:
+            # Cada día sale de la ventana una sola vez: costo amortizado O(1)
+            for (salida,) in conn.execute(
+                "SELECT variacion FROM fx_tasas WHERE moneda = ? AND fecha >= ? AND fecha < ? AND variacion IS NOT NULL",
+                (moneda, ventana[0], nuevo_inicio)
+            ).fetchall():
+                ventana[1] -= 1
+                ventana[2] -= salida
+                ventana[3] -= salida * salida
+            ventana[0] = nuevo_inicio
+
+        if variacion is not None:
+            ventana[1] += 1
+            ventana[2] += variacion
+            ventana[3] += variacion * variacion
+        self._save_window(conn, moneda, dias, ventana)
+
+    def _window_swap(self, conn, moneda, dias, fecha, vieja, nueva):
+        """Reemplaza la variación del día dentro de la ventana"""
+        ventana = self._window(conn, moneda, dias, (fecha - timedelta(days=dias - 1)).isoformat())
+        if vieja is not None:
+            ventana[1] -= 1
+            ventana[2] -= vieja
+            ventana[3] -= vieja * vieja
+        if nueva is not None:
+            ventana[1] += 1
+            ventana[2] += nueva
+            ventana[3] += nueva * nueva
+        self._save_window(conn, moneda, dias, ventana)
+
+    def _prune(self, conn, fecha):
+        """Descarta las tasas que ya no pueden salir de ninguna ventana (dos veces la más larga)"""
+        limite = (fecha - timedelta(days=2 * max(self.windows) + 1)).isoformat()
+        conn.execute("DELETE FROM fx_tasas WHERE fecha < ?", (limite,))
+
+    def trends(self, monedas=None):
+        """Tendencias y estadísticas por ventana desde el estado guardado (sin recorrer el histórico)"""
+        sql = ("SELECT e.moneda, e.variacion, e.racha, v.dias, v.n, v.suma, v.suma_cuadrados "
+               "FROM fx_estado e LEFT JOIN fx_ventanas v ON v.moneda = e.moneda")
+        params = []
+        if monedas:
+            sql += f" WHERE e.moneda IN ({', '.join('?' for _ in monedas)})"
+            params = list(monedas)
+
+        try:
+            with self._connect() as conn:
+                filas = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Error leyendo el histórico de tipos de cambio: {}", e)
+            return {}
+
+        trends = {}
+        for moneda, variacion, racha, dias, n, suma, suma_cuadrados in filas:
+            if moneda not in trends:
+                variacion = variacion or 0
+                if racha >= DIAS_TENDENCIA:
+                    tendencia = "positiva"
+                elif racha <= -DIAS_TENDENCIA:
+                    tendencia = "negativa"
+                else:
+                    tendencia = "estable"
+                trends[moneda] = {
+                    'tendencia': tendencia,
+                    'variacion_diaria': round(variacion, 2),
+                    'volatil': abs(variacion) > UMBRAL_VOLATIL,
+                    'ventanas': {}
+                }
+            if dias is not None and dias in self.windows:
+                media = suma / n if n > 0 else 0.0
+                varianza = max(0.0, suma_cuadrados / n - media * media) if n > 0 else 0.0
+                trends[moneda]['ventanas'][dias] = {
+                    'dias_con_variacion': n,
+                    'variacion_acumulada': round(suma, 4),
+                    'variacion_media': round(media, 4),
+                    'volatilidad': round(math.sqrt(varianza), 4)
+                }
+        return trends
+
+    def history(self, days=5, hasta=None):
+        """Tasas de los últimos `days` días como {fecha: {moneda: tasa}}, de la más antigua a la más reciente"""
+        hasta = hasta or datetime.now(timezone.utc).date()
+        desde = (hasta - timedelta(days=days - 1)).isoformat()
+        with self._connect() as conn:
+            filas = conn.execute(
+                "SELECT fecha, moneda, tasa FROM fx_tasas WHERE fecha >= ? AND fecha <= ? ORDER BY fecha",
+                (desde, hasta.isoformat())
+            ).fetchall()
+
+        history = {}
+        for fecha, moneda, tasa in filas:
+            history.setdefault(fecha, {})[moneda] = tasa
+        return history
@@ -0,0 +1,185 @@
+# src/history_store.py
+import csv
+import glob
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import pandas as pd
+from config import Config
+from logger import get_logger
+from output_generator import CSV_HEADER, summary_row
+
+logger = get_logger()
+
+# Columnas de la tabla en el mismo orden que CSV_HEADER
+_COLUMNAS_DB = [
+    'ciudad', 'timestamp', 'temperatura', 'viento', 'precipitacion',
+    'uv', 'tipo_cambio', 'variacion', 'tendencia',
+    'ivv_score', 'nivel_riesgo', 'alertas_count'
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observaciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT,
+    ciudad TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    temperatura REAL,
+    viento REAL,
+    precipitacion REAL,
+    uv REAL,
+    tipo_cambio REAL,
+    variacion REAL,
+    tendencia TEXT,
+    ivv_score REAL,
+    nivel_riesgo TEXT,
+    alertas_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_observaciones_ciudad_ts ON observaciones (ciudad, timestamp);
+CREATE INDEX IF NOT EXISTS idx_observaciones_ts ON observaciones (timestamp);
+CREATE TABLE IF NOT EXISTS archivos_importados (
+    archivo TEXT PRIMARY KEY,
+    importado_en TEXT NOT NULL
+);
+"""
+
+def _to_iso(valor):
+    """Normaliza un datetime o texto al formato ISO UTC usado en los timestamps"""
+    if valor is None or isinstance(valor, str):
+        return valor
+    if valor.tzinfo is not None:
+        valor = valor.astimezone(timezone.utc).replace(tzinfo=None)
+    return valor.isoformat() + "Z"
+
+class HistoryStore:
+    """
+    Almacén histórico append-only en SQLite (Config.DB_PATH), indexado por ciudad y timestamp.
+    Cada ejecución se inserta en una sola transacción y las lecturas se hacen por rangos.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.DB_PATH
+        directorio = os.path.dirname(self.db_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Conexión que confirma la transacción al salir y siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _insert_rows(self, conn, filas, run_id):
+        conn.executemany(
+            f"INSERT INTO observaciones (run_id, {', '.join(_COLUMNAS_DB)}) "
+            f"VALUES (?, {', '.join('?' for _ in _COLUMNAS_DB)})",
+            [[run_id] + list(fila) for fila in filas]
+        )
+
+    def _mark_imported(self, conn, archivo):
+        """Reserva el archivo como importado; False si otro proceso ya lo había hecho"""
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO archivos_importados (archivo, importado_en) VALUES (?, ?)",
+            (archivo, _to_iso(datetime.now(timezone.utc)))
+        )
+        return cursor.rowcount > 0
+
+    def append_run(self, resultados, run_id=None, source_file=None):
+        """
+        Inserta los resultados de una ejecución en una sola transacción.
+        `source_file` es el CSV generado en la misma ejecución, para no importarlo dos veces.
+        """
+        filas = [summary_row(ciudad_data) for ciudad_data in resultados]
+        if not filas and not source_file:
+            return 0
+
+        try:
+            with self._connect() as conn:
+                self._insert_rows(conn, filas, run_id)
+                if source_file:
+                    self._mark_imported(conn, os.path.basename(source_file))
+            logger.info("Histórico actualizado: {} registros en {}", len(filas), self.db_path)
+            return len(filas)
+        except sqlite3.Error as e:
+            logger.error("Error guardando histórico en {}: {}", self.db_path, e)
+            return 0
+
+    def import_csv_files(self, data_path="data/outputs"):
+        """
+        Importa los CSV resumen existentes que aún no estén en el almacén. Cada archivo se reserva
+        en la misma transacción que inserta sus filas, así dos procesos no importan el mismo CSV.
+        """
+        with self._connect() as conn:
+            importados = {fila[0] for fila in conn.execute("SELECT archivo FROM archivos_importados")}
+
+        pendientes = [
+            ruta for ruta in sorted(glob.glob(os.path.join(data_path, "resumen_ciudades_*.csv")))
+            if os.path.basename(ruta) not in importados
+        ]
+
+        total, importados = 0, 0
+        for ruta in pendientes:
+            archivo = os.path.basename(ruta)
+            try:
+                with open(ruta, "r", newline="", encoding="utf-8") as f:
+                    filas = [[fila.get(col) for col in CSV_HEADER] for fila in csv.DictReader(f)]
+                with self._connect() as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    if not self._mark_imported(conn, archivo):
+                        continue  # Otro proceso lo importó entre la lectura y esta transacción
+                    self._insert_rows(conn, filas, archivo)
+                total += len(filas)
+                importados += 1
+            except (OSError, sqlite3.Error, UnicodeDecodeError) as e:
+                logger.error("Error importando {} al histórico: {}", ruta, e)
+
+        if importados:
+            logger.info("Importados {} registros de {} CSV al histórico", total, importados)
+        return total
+
+    def query(self, ciudades=None, desde=None, hasta=None, since_id=None):
+        """
+        Devuelve las observaciones en un rango como DataFrame con las columnas del CSV resumen,
+        ordenadas por timestamp. Filtra opcionalmente por lista de ciudades, por fechas
+        y por id (`since_id`: solo registros agregados después de ese id).
+        """
+        condiciones, params = [], []
+        if since_id:
+            condiciones.append("id > ?")
+            params.append(since_id)
+        if ciudades:
+            condiciones.append(f"ciudad IN ({', '.join('?' for _ in ciudades)})")
+            params.extend(ciudades)
+        if desde is not None:
+            condiciones.append("timestamp >= ?")
+            params.append(_to_iso(desde))
+        if hasta is not None:
+            condiciones.append("timestamp <= ?")
+            params.append(_to_iso(hasta))
+
+        sql = f"SELECT {', '.join(_COLUMNAS_DB)} FROM observaciones"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " ORDER BY timestamp, id"
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df.columns = CSV_HEADER
+        return df
+
+    def version(self):
+        """Identificador que cambia cuando se agregan registros (útil como clave de cache)"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM observaciones").fetchone()[0]
+
+    def is_empty(self):
+        return self.version() == 0
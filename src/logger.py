@@ -1,26 +1,115 @@
 # src/logger.py
-from loguru import logger
 import os
+import sys
+import threading
+import time
 from datetime import datetime
+from loguru import logger
+from config import Config
 
-# Crear carpeta de logs si no existe
+# Carpeta de logs del proyecto
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-
-# Archivo de log rotativo por día
-log_filename = os.path.join(LOG_DIR, f"{datetime.now().strftime('%Y-%m-%d')}.log")
-
-logger.add(
-    log_filename,
-    rotation="10 MB",
-    retention="10 days",
-    level="DEBUG",
-    encoding="utf-8",
-    enqueue=True,
-    backtrace=True,
-    diagnose=True,
+
+_FORMATO = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
 )
 
+_configurado = False
+_lock = threading.Lock()
+
+class _Sampler:
+    """
+    Limita los mensajes repetitivos por punto de llamada: por debajo de WARNING deja pasar
+    `burst` mensajes por ventana de `window` segundos y descarta el resto. El primer mensaje
+    de la ventana siguiente informa cuántos se omitieron (extra["omitidos"]).
+    Cada sink necesita su propio muestreador: el registro pasa por todos los filtros.
+    """
+
+    def __init__(self, window, burst):
+        self.window = window
+        self.burst = burst
+        self._ventanas = {}  # {(modulo, funcion, linea): [inicio, emitidos, omitidos]}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        # El registro es el mismo para todos los sinks: se quita lo que haya dejado otro muestreador
+        record["extra"].pop("omitidos", None)
+        if self.burst <= 0 or record["level"].no >= 30:
+            return True
+
+        clave = (record["name"], record["function"], record["line"])
+        ahora = time.monotonic()
+        with self._lock:
+            ventana = self._ventanas.get(clave)
+            if ventana is None or ahora - ventana[0] >= self.window:
+                omitidos = ventana[2] if ventana else 0
+                self._ventanas[clave] = [ahora, 1, 0]
+                if omitidos:
+                    record["extra"]["omitidos"] = omitidos
+                return True
+            if ventana[1] < self.burst:
+                ventana[1] += 1
+                return True
+            ventana[2] += 1
+            return False
+
+def _formato_texto(record):
+    """Formato de texto; agrega el número de mensajes similares omitidos por el muestreo"""
+    formato = _FORMATO
+    if record["extra"].get("omitidos"):
+        formato += " <dim>(+{extra[omitidos]} similares omitidos)</dim>"
+    return formato + "\n{exception}"
+
+def setup_logging(level=None, json_logs=None, console=None, force=False):
+    """
+    Configura los sinks de loguru una sola vez (las llamadas siguientes no hacen nada salvo con `force`).
+    Usa Config.LOG_LEVEL, sin diagnose por defecto, con muestreo de mensajes repetitivos
+    y opcionalmente un archivo JSON estructurado (Config.LOG_JSON).
+    """
+    global _configurado
+    if _configurado and not force:
+        return logger
+
+    with _lock:
+        if _configurado and not force:
+            return logger
+
+        level = (level or Config.LOG_LEVEL).upper()
+        json_logs = Config.LOG_JSON if json_logs is None else json_logs
+        console = Config.LOG_CONSOLE if console is None else console
+
+        logger.remove()
+        if console:
+            logger.add(sys.stderr, level=level, format=_formato_texto,
+                       filter=_Sampler(Config.LOG_SAMPLE_WINDOW, Config.LOG_SAMPLE_BURST),
+                       backtrace=Config.LOG_DIAGNOSE, diagnose=Config.LOG_DIAGNOSE)
+
+        if Config.LOG_FILE:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            # Archivo de log rotativo por día (JSON por línea si LOG_JSON está activo)
+            extension = "json" if json_logs else "log"
+            log_filename = os.path.join(LOG_DIR, f"{datetime.now().strftime('%Y-%m-%d')}.{extension}")
+            logger.add(
+                log_filename,
+                rotation="10 MB",
+                retention="10 days",
+                level=level,
+                format=_formato_texto,
+                filter=_Sampler(Config.LOG_SAMPLE_WINDOW, Config.LOG_SAMPLE_BURST),
+                serialize=json_logs,
+                encoding="utf-8",
+                enqueue=True,
+                backtrace=Config.LOG_DIAGNOSE,
+                diagnose=Config.LOG_DIAGNOSE,
+            )
+
+        _configurado = True
+        return logger
+
 def get_logger():
-    """Devuelve el logger configurado para todo el proyecto."""
+    """
+    Devuelve el logger del proyecto sin configurarlo: importar un módulo no agrega sinks ni crea logs/.
+    Los puntos de entrada (main, scheduler, dashboard, benchmarks) llaman a setup_logging().
+    """
     return logger
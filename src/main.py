@@ -1,89 +1,67 @@
-from logger import get_logger
-from data_collector import DataCollector, CIUDADES
-from processor import DataProcessor
-from output_generator import OutputGenerator
+from logger import get_logger, setup_logging
+from data_collector import CIUDADES
+from output_generator import read_report
+from pipeline import Pipeline
 
 logger = get_logger()
 
-def main():
-    logger.info("Iniciando sistema RPA TravelCorp - Procesando 5 ciudades")
+def main(max_workers=None):
+    setup_logging()
+    logger.info("Iniciando sistema RPA TravelCorp - Procesando {} ciudades", len(CIUDADES))
     
-    collector = DataCollector()
-    processor = DataProcessor()
+    pipeline = Pipeline(CIUDADES, max_workers=max_workers)
+    resumen = pipeline.run()
+    json_file, csv_file = pipeline.archivos
+    monedas = {ciudad['nombre']: ciudad['moneda'] for ciudad in CIUDADES}
+    zonas = {ciudad['nombre']: ciudad['timezone'] for ciudad in CIUDADES}
     
-    resultados = []
-    
-    for ciudad in CIUDADES:
-        logger.info(f"Procesando ciudad: {ciudad['nombre']}")
+    # Los resultados se leen del reporte publicado, registro por registro
+    for registro in read_report(json_file) if json_file else ():
+        clima = registro['clima']
+        finanzas = registro['finanzas']
+        time_data = pipeline.datos_tiempo.get(zonas.get(registro['ciudad']))
+        alertas = registro['alertas']
         
-        datos = collector.collect_city_data(ciudad)
+        # Mostrar resultados por ciudad
+        degradado = " (datos degradados: ultimos conocidos)" if registro['degradado'] else ""
+        print(f"\n--- {registro['ciudad']} ---{degradado}")
+        print(f"Temperatura: {clima['temperatura_actual']}C")
+        print(f"Viento: {clima['viento']} km/h")
+        print(f"Precipitacion: {clima['precipitacion']} mm")
+        print(f"UV: {clima['uv']}")
         
-        if datos:
-            exchange_data = collector.collect_exchange_data(ciudad['moneda'])
-            time_data = collector.collect_time_data(ciudad['timezone'])
-            alertas = processor.evaluate_alerts(ciudad, datos['clima'])
-            
-            # Usar datos reales de exchange para el calculo de IVV
-            cambio_estable = exchange_data['tendencia_5_dias'] == 'estable' if exchange_data else True
-            
-            ivv_data = processor.calculate_ivv(
-                alertas, 
-                datos['clima']['current']['uv_index'],
-                cambio_estable=cambio_estable
-            )
-            
-            resultado_ciudad = {
-                'ciudad': ciudad['nombre'],
-                'datos': datos,
-                'exchange_data': exchange_data,
-                'alertas': alertas,
-                'ivv_data': ivv_data
-            }
-            
-            resultados.append(resultado_ciudad)
+        if finanzas['tipo_cambio_actual'] is not None:
+            print(f"Tipo cambio: 1 USD = {finanzas['tipo_cambio_actual']} {monedas.get(registro['ciudad'])}")
+            print(f"Variacion: {finanzas['variacion_diaria']}%")
+            print(f"Tendencia: {finanzas['tendencia_5_dias']}")
             
-            # Mostrar resultados por ciudad
-            current = datos['clima']['current']
-            print(f"\n--- {ciudad['nombre']} ---")
-            print(f"Temperatura: {current['temperature_2m']}C")
-            print(f"Viento: {current['wind_speed_10m']} km/h")
-            print(f"Precipitacion: {current['precipitation']} mm")
-            print(f"UV: {current['uv_index']}")
-            
-            if exchange_data:
-                print(f"Tipo cambio: 1 USD = {exchange_data['tipo_cambio_actual']} {ciudad['moneda']}")
-                print(f"Variacion: {exchange_data['variacion_diaria']}%")
-                print(f"Tendencia: {exchange_data['tendencia_5_dias']}")
-                
-            if time_data:
-                print(f"Hora local: {time_data['hora_local']}")
-                print(f"Diferencia con Bogota: {time_data['diferencia_bogota']}")
-            
-            print(f"Alertas: {len(alertas)}")
-            for alerta in alertas:
-                print(f"  - {alerta['severidad']}: {alerta['mensaje']}")
-                
-            print(f"IVV: {ivv_data['ivv_score']} ({ivv_data['nivel_riesgo']})")
+        if time_data:
+            print(f"Hora local: {time_data['hora_local']}")
+            print(f"Diferencia con Bogota: {time_data['diferencia_bogota']}")
+        
+        print(f"Alertas: {len(alertas)}")
+        for alerta in alertas:
+            print(f"  - {alerta['severidad']}: {alerta['mensaje']}")
             
-        else:
-            logger.error(f"Fallo la recoleccion para {ciudad['nombre']}")
+        print(f"IVV: {registro['ivv_score']} ({registro['nivel_riesgo']})")
     
     # Resumen final
     print(f"\n=== RESUMEN EJECUCION ===")
-    print(f"Ciudades procesadas: {len(resultados)}/{len(CIUDADES)}")
+    procesadas = resumen.procesadas if resumen else 0
+    print(f"Ciudades procesadas: {procesadas}/{len(CIUDADES)}")
+    if resumen:
+        print(f"Recalculadas: {resumen.recalculadas} - Sin cambios: {resumen.sin_cambios} - "
+              f"Degradadas: {resumen.degradadas} - Fallidas: {resumen.fallidas}")
     
-    for resultado in resultados:
-        print(f"{resultado['ciudad']}: IVV {resultado['ivv_data']['ivv_score']} ({resultado['ivv_data']['nivel_riesgo']}) - Alertas: {len(resultado['alertas'])}")
-
-    # Generar archivos de output
-    output_gen = OutputGenerator()
-    json_file = output_gen.generate_json(resultados)
-    csv_file = output_gen.generate_csv(resultados)
+    for registro in read_report(json_file) if json_file else ():
+        print(f"{registro['ciudad']}: IVV {registro['ivv_score']} ({registro['nivel_riesgo']}) - Alertas: {len(registro['alertas'])}")
 
     if json_file and csv_file:
         print(f"Archivos generados exitosamente:")
         print(f"JSON: {json_file}")
         print(f"CSV: {csv_file}")
+    else:
+        print("Sin cambios desde la ultima ejecucion: no se generaron archivos nuevos")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
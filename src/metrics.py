@@ -0,0 +1,343 @@
+# src/metrics.py
+# Métricas en proceso (contadores e histogramas) de llamadas a APIs y etapas del pipeline.
+# Se exponen en formato de texto Prometheus (endpoint opcional) y como JSON por ejecución.
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import Config
+from logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+def _format_labels(labelnames, valores, extra=None):
+    pares = list(zip(labelnames, valores)) + (extra or [])
+    if not pares:
+        return ""
+    texto = ",".join(f'{nombre}="{str(valor)}"' for nombre, valor in pares)
+    return "{" + texto + "}"
+
+class Counter:
+    """Contador acumulado por combinación de etiquetas"""
+    tipo = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        clave = tuple(str(labels.get(nombre, "")) for nombre in self.labelnames)
+        with self._lock:
+            self._values[clave] = self._values.get(clave, 0) + amount
+
+    def value(self, **labels):
+        clave = tuple(str(labels.get(nombre, "")) for nombre in self.labelnames)
+        with self._lock:
+            return self._values.get(clave, 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, clave)} {valor}" for clave, valor in items]
+
+    def raw(self):
+        """Copia del estado interno (para calcular diferencias con snapshot(desde=...))"""
+        with self._lock:
+            return dict(self._values)
+
+    def snapshot(self, desde=None, estado=None):
+        """Valores acumulados (o de `estado`), o solo lo sumado desde `desde` (series sin cambios se omiten)"""
+        desde = desde or {}
+        series = []
+        for clave, valor in sorted((estado if estado is not None else self.raw()).items()):
+            anterior = desde.get(clave, 0)
+            if anterior <= valor:  # Si el contador se reinició se reporta completo
+                valor -= anterior
+            if valor or not desde:
+                series.append({"labels": dict(zip(self.labelnames, clave)), "valor": valor})
+        return series
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+class Histogram:
+    """Histograma de duraciones (segundos) con buckets fijos por combinación de etiquetas"""
+    tipo = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # {etiquetas: [conteos por bucket (+Inf al final), suma, total]}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        clave = tuple(str(labels.get(nombre, "")) for nombre in self.labelnames)
+        indice = bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += value
+            serie[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mide la duración del bloque y la registra con las etiquetas indicadas"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((clave, [list(serie[0]), serie[1], serie[2]]) for clave, serie in self._series.items())
+
+        lineas = []
+        for clave, (conteos, suma, total) in items:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ("+Inf",), conteos):
+                acumulado += conteo
+                etiquetas = _format_labels(self.labelnames, clave, [("le", limite)])
+                lineas.append(f"{self.name}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.name}_sum{_format_labels(self.labelnames, clave)} {round(suma, 6)}")
+            lineas.append(f"{self.name}_count{_format_labels(self.labelnames, clave)} {total}")
+        return lineas
+
+    def raw(self):
+        with self._lock:
+            return {clave: [list(serie[0]), serie[1], serie[2]] for clave, serie in self._series.items()}
+
+    def snapshot(self, desde=None, estado=None):
+        """Series acumuladas (o de `estado`), o solo lo observado desde `desde` (series sin cambios se omiten)"""
+        desde = desde or {}
+        series = []
+        for clave, (conteos, suma, total) in sorted((estado if estado is not None else self.raw()).items()):
+            if clave in desde and desde[clave][2] <= total:
+                anteriores, suma_anterior, total_anterior = desde[clave]
+                conteos = [actual - anterior for actual, anterior in zip(conteos, anteriores)]
+                suma -= suma_anterior
+                total -= total_anterior
+                if not total:
+                    continue
+            series.append({
+                "labels": dict(zip(self.labelnames, clave)),
+                "count": total,
+                "sum_s": round(suma, 6),
+                "promedio_s": round(suma / total, 6) if total else None,
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], conteos)),
+            })
+        return series
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+class MetricsRegistry:
+    """Registro de todas las métricas del proceso"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render_prometheus(self):
+        """Todas las métricas en formato de exposición de texto de Prometheus"""
+        lineas = []
+        with self._lock:
+            metricas = list(self._metrics.values())
+        for metrica in metricas:
+            lineas.append(f"# HELP {metrica.name} {metrica.help}")
+            lineas.append(f"# TYPE {metrica.name} {metrica.tipo}")
+            lineas.extend(metrica.render())
+        return "\n".join(lineas) + "\n"
+
+    def raw(self):
+        """Estado de todas las métricas, para luego pedir snapshot(desde=...)"""
+        with self._lock:
+            metricas = list(self._metrics.values())
+        return {metrica.name: metrica.raw() for metrica in metricas}
+
+    def snapshot(self, desde=None, estado=None):
+        """
+        Todas las métricas; con `desde` (resultado de raw()) solo la diferencia desde ese momento.
+        Con `estado` (también de raw()) se usa ese estado en lugar del actual.
+        """
+        with self._lock:
+            metricas = list(self._metrics.values())
+        desde = desde or {}
+        estado = estado or {}
+        return {
+            metrica.name: {
+                "tipo": metrica.tipo, "ayuda": metrica.help,
+                "series": metrica.snapshot(desde.get(metrica.name) if desde else None, estado.get(metrica.name))
+            }
+            for metrica in metricas
+        }
+
+    def reset(self):
+        with self._lock:
+            metricas = list(self._metrics.values())
+        for metrica in metricas:
+            metrica.reset()
+
+REGISTRY = MetricsRegistry()
+
+# Llamadas a APIs externas (fetch_json)
+API_REQUESTS = REGISTRY.counter(
+    "api_requests_total", "Llamadas a APIs por fuente, estado HTTP y resultado de cache",
+    ("source", "status", "cache")
+)
+API_DURATION = REGISTRY.histogram(
+    "api_request_duration_seconds", "Duración de las llamadas a APIs (incluye reintentos)",
+    ("source", "cache")
+)
+API_RETRIES = REGISTRY.counter(
+    "api_retries_total", "Reintentos HTTP realizados por fuente", ("source",)
+)
+API_HEDGES = REGISTRY.counter(
+    "api_hedged_requests_total", "Peticiones duplicadas por latencia y cuál respondió primero", ("source", "winner")
+)
+
+# Etapas del pipeline
+STAGE_DURATION = REGISTRY.histogram(
+    "pipeline_stage_duration_seconds", "Duración de cada etapa del pipeline", ("stage",)
+)
+CITY_STAGE_DURATION = REGISTRY.histogram(
+    "city_stage_duration_seconds", "Duración por ciudad de las etapas de recolección, proceso y salida",
+    ("stage",), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+CITIES_PROCESSED = REGISTRY.counter(
+    "cities_processed_total", "Ciudades procesadas por resultado (recalculada, sin_cambios, degradada, fallida)",
+    ("result",)
+)
+
+def record_api_call(source, status, cache, duration, retries=0):
+    """Registra una llamada a API: estado ('200', '304', 'error'...), cache ('hit', 'miss', 'revalidated', 'coalesced'...)"""
+    if not Config.METRICS_ENABLED:
+        return
+    API_REQUESTS.inc(source=source, status=status, cache=cache)
+    API_DURATION.observe(duration, source=source, cache=cache)
+    if retries:
+        API_RETRIES.inc(retries, source=source)
+
+def record_hedge(source, winner):
+    """Registra una petición duplicada: winner 'original', 'duplicado' o 'fallido'"""
+    if Config.METRICS_ENABLED:
+        API_HEDGES.inc(source=source, winner=winner)
+
+def count_city(resultado):
+    """Cuenta una ciudad procesada: 'recalculada', 'sin_cambios', 'degradada' o 'fallida'"""
+    if Config.METRICS_ENABLED:
+        CITIES_PROCESSED.inc(result=resultado)
+
+@contextmanager
+def stage(nombre, histogram=None):
+    """Mide una etapa del pipeline (o de una ciudad, con CITY_STAGE_DURATION)"""
+    if not Config.METRICS_ENABLED:
+        yield
+        return
+    with (histogram or STAGE_DURATION).time(stage=nombre):
+        yield
+
+def render_prometheus():
+    return REGISTRY.render_prometheus()
+
+# Estado de las métricas al guardar el último JSON: cada archivo lleva solo lo ocurrido desde entonces
+_ultimo_corte = {}
+_corte_lock = threading.Lock()
+
+def _prune_run_metrics(metrics_dir, conservar):
+    """Borra los JSON de métricas más antiguos dejando los `conservar` más recientes"""
+    if conservar <= 0:
+        return
+    archivos = sorted(
+        (os.path.join(metrics_dir, nombre) for nombre in os.listdir(metrics_dir)
+         if nombre.startswith("metricas_") and nombre.endswith(".json")),
+        key=os.path.getmtime
+    )
+    for ruta in archivos[:-conservar]:
+        try:
+            os.remove(ruta)
+        except OSError as e:
+            logger.warning("No se pudo borrar el archivo de métricas {}: {}", ruta, e)
+
+def write_run_metrics(run_id=None, metrics_dir=None, job="ejecucion"):
+    """
+    Guarda un JSON con las métricas de la ejecución (diferencia desde el JSON anterior del proceso)
+    como metricas_<job>_<run_id>.json y conserva solo los Config.METRICS_RETENTION más recientes.
+    Los contadores del proceso no se reinician: /metrics los sigue exponiendo acumulados.
+    """
+    if not Config.METRICS_ENABLED:
+        return None
+
+    metrics_dir = metrics_dir or Config.METRICS_DIR
+    run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    ruta = os.path.join(metrics_dir, f"metricas_{job}_{run_id}.json")
+    with _corte_lock:
+        global _ultimo_corte
+        corte = REGISTRY.raw()
+        metricas = REGISTRY.snapshot(desde=_ultimo_corte, estado=corte)
+        _ultimo_corte = corte
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({"run_id": run_id, "job": job, "generado_en": datetime.now().isoformat(), "metricas": metricas},
+                      f, indent=2, ensure_ascii=False)
+        _prune_run_metrics(metrics_dir, Config.METRICS_RETENTION)
+        logger.info("Métricas de la ejecución guardadas en {}", ruta)
+        return ruta
+    except OSError as e:
+        logger.error("Error guardando métricas en {}: {}", ruta, e)
+        return None
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        cuerpo = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """Expone /metrics en un hilo de fondo si Config.METRICS_PORT (o `port`) es distinto de 0"""
+    port = port if port is not None else Config.METRICS_PORT
+    if not port or not Config.METRICS_ENABLED:
+        return None
+
+    servidor = ThreadingHTTPServer((host, port), _MetricsHandler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="metrics").start()
+    logger.info("Métricas disponibles en http://{}:{}/metrics", host, servidor.server_address[1])
+    return servidor
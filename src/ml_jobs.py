@@ -0,0 +1,88 @@
+# src/ml_jobs.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logger import get_logger
+
+logger = get_logger()
+
+class MLTrainingJob:
+    """
+    Ejecuta predicción y detección de anomalías en un hilo de fondo y publica
+    resultados versionados. Las solicitudes mientras hay un entrenamiento en curso se descartan.
+    """
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-training")
+        self._lock = threading.Lock()
+        self._future = None
+        self._resultado = None
+        self._error = None
+        self._version = 0
+
+    def submit(self, version_historico=None, force=False):
+        """
+        Lanza un entrenamiento si no hay otro en curso.
+        Sin `force`, tampoco se lanza si ya hay resultados para esa versión del histórico.
+        Retorna True si se encoló un trabajo nuevo.
+        """
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                logger.info("Entrenamiento ML en curso: solicitud duplicada descartada.")
+                return False
+            if not force and self._resultado is not None and self._resultado["version_historico"] == version_historico:
+                return False
+
+            self._future = self._executor.submit(self._run, version_historico, force)
+            return True
+
+    def _run(self, version_historico, force):
+        inicio = time.perf_counter()
+        try:
+            predicciones = self.predictor.predict_ivv()
+            anomalias = self.predictor.detect_anomalies(force_retrain=force)
+        except Exception as e:
+            logger.error("Error en entrenamiento ML de fondo: {}", e)
+            with self._lock:
+                self._error = str(e)
+            return
+
+        with self._lock:
+            self._version += 1
+            self._error = None
+            self._resultado = {
+                "version": self._version,
+                "version_historico": version_historico,
+                "predicciones": predicciones,
+                "anomalias": anomalias,
+                "entrenado_en": datetime.now(timezone.utc),
+                "duracion_s": round(time.perf_counter() - inicio, 2),
+            }
+        logger.info("Resultados ML publicados (versión {}).", self._version)
+
+    def is_running(self):
+        with self._lock:
+            return self._future is not None and not self._future.done()
+
+    def latest(self):
+        """Último resultado publicado (None si aún no hay ninguno)"""
+        with self._lock:
+            return self._resultado
+
+    def status(self):
+        """Estado del trabajo: 'entrenando', 'error', 'listo' o 'pendiente'"""
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return "entrenando"
+            if self._error:
+                return "error"
+            return "listo" if self._resultado is not None else "pendiente"
+
+    def last_error(self):
+        with self._lock:
+            return self._error
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
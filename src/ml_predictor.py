@@ -3,86 +3,360 @@ import pandas as pd
 import numpy as np
 import os
 import glob
-from sklearn.linear_model import LinearRegression
+import hashlib
+import json
+import joblib
+from datetime import datetime, timedelta, timezone
 from sklearn.ensemble import IsolationForest
-from logger import get_logger
+from config import Config
+from history_store import HistoryStore
+from logger import get_logger, setup_logging
 
 logger = get_logger()
 
+def fit_grouped_trends(df, window=None, halflife=None, value_col="IVV_Score"):
+    """
+    Ajusta una recta valor ~ período para cada ciudad en una sola pasada vectorizada
+    (mínimos cuadrados en forma cerrada, equivalente a un LinearRegression por ciudad).
+    El período es la posición de la fila dentro de su ciudad (0..n-1) y la predicción es para n.
+    - window: usa solo los últimos `window` puntos de cada ciudad.
+    - halflife: pondera exponencialmente los puntos (vida media en períodos).
+    Retorna un DataFrame con Ciudad, n, pendiente, intercepto e IVV_Predicho (sin recortar);
+    se omiten las ciudades con menos de 2 puntos.
+    """
+    ciudad = df["Ciudad"].to_numpy()
+    grupos = df.groupby("Ciudad", sort=False)
+    x = grupos.cumcount().to_numpy(dtype=float)
+    n = grupos["Ciudad"].transform("size").to_numpy(dtype=float)
+    y = df[value_col].to_numpy(dtype=float)
+
+    # Antigüedad de cada punto: 0 para el último período de su ciudad
+    antiguedad = n - 1 - x
+    usar = np.ones(len(df), dtype=bool) if not window else antiguedad < window
+    w = np.ones(len(df)) if not halflife else 0.5 ** (antiguedad / halflife)
+
+    datos = pd.DataFrame({"Ciudad": ciudad[usar], "x": x[usar], "y": y[usar], "w": w[usar], "n": n[usar]})
+    datos["wx"] = datos["w"] * datos["x"]
+    datos["wy"] = datos["w"] * datos["y"]
+
+    # Primera pasada: medias ponderadas por ciudad; segunda: sumas centradas (estable numéricamente)
+    sumas = datos.groupby("Ciudad", sort=False).agg(
+        puntos=("x", "size"), n=("n", "first"), w=("w", "sum"), wx=("wx", "sum"), wy=("wy", "sum")
+    )
+    sumas["x_media"] = sumas["wx"] / sumas["w"]
+    sumas["y_media"] = sumas["wy"] / sumas["w"]
+
+    dx = datos["x"] - datos["Ciudad"].map(sumas["x_media"])
+    dy = datos["y"] - datos["Ciudad"].map(sumas["y_media"])
+    datos["sxx"] = datos["w"] * dx * dx
+    datos["sxy"] = datos["w"] * dx * dy
+    centradas = datos.groupby("Ciudad", sort=False)[["sxx", "sxy"]].sum()
+
+    sumas = sumas.join(centradas)
+    sumas = sumas[sumas["puntos"] >= 2]  # No hay suficientes datos históricos
+
+    pendiente = np.where(sumas["sxx"] > 0, sumas["sxy"] / sumas["sxx"].where(sumas["sxx"] > 0, 1), 0.0)
+    intercepto = sumas["y_media"] - pendiente * sumas["x_media"]
+
+    return pd.DataFrame({
+        "Ciudad": sumas.index,
+        "n": sumas["n"].astype(int).to_numpy(),
+        "pendiente": pendiente,
+        "intercepto": intercepto.to_numpy(),
+        "IVV_Predicho": (intercepto + pendiente * sumas["n"]).to_numpy(),
+    })
+
 class IVVPredictor:
     """
     Predice el IVV futuro y detecta anomalías usando datos históricos generados por el sistema.
     """
 
-    def __init__(self, data_path="data/outputs"):
+    def __init__(self, data_path="data/outputs", store=None, history_days=None, cache_dir=None, anomaly_scope=None):
         self.data_path = data_path
+        self.store = store if store is not None else HistoryStore()
+        self.history_days = history_days if history_days is not None else Config.ML_HISTORY_DAYS
+        self.cache_dir = cache_dir or Config.CACHE_DIR
+
+        self.models_dir = Config.MODELS_DIR
+        self.anomaly_scope = anomaly_scope or Config.ANOMALY_SCOPE
+        self.retrain_hours = Config.ANOMALY_RETRAIN_HOURS
+
+        # Histórico consolidado y manifiesto de lo ya ingerido (compartido entre predicción y anomalías)
+        self._df = None
+        self._manifest = None
+
+    def _cache_paths(self):
+        return (
+            os.path.join(self.cache_dir, "historico_ivv.pkl"),
+            os.path.join(self.cache_dir, "historico_ivv_manifest.json"),
+        )
+
+    def _read_cached_history(self):
+        """Recupera el histórico consolidado de memoria o, en un proceso nuevo, del disco."""
+        if self._df is not None:
+            return self._df, self._manifest
+
+        frame_path, manifest_path = self._cache_paths()
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            return pd.read_pickle(frame_path), manifest
+        except Exception:
+            return None, {}
+
+    def _save_cached_history(self, df, manifest):
+        """Guarda el histórico consolidado y su manifiesto (escritura atómica)."""
+        self._df, self._manifest = df, manifest
+
+        frame_path, manifest_path = self._cache_paths()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_pickle(frame_path + ".tmp")
+            os.replace(frame_path + ".tmp", frame_path)
+            with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(manifest_path + ".tmp", manifest_path)
+        except Exception as e:
+            logger.warning("No se pudo guardar la cache del histórico: {}", e)
 
     def _load_data(self):
-        """Carga los archivos CSV históricos generados por el sistema."""
+        """
+        Carga el histórico de forma incremental: solo lee los registros o archivos nuevos
+        desde la última carga. Usa el almacén SQLite y, si no está disponible, los CSV.
+        """
+        try:
+            # Incorporar CSV que aún no estén en el almacén (ejecuciones previas al histórico)
+            self.store.import_csv_files(self.data_path)
+            df = self._load_from_store()
+        except Exception as e:
+            logger.error("Error leyendo el histórico {}: {}. Usando archivos CSV.", self.store.db_path, e)
+            df = self._load_csv_files()
+
+        if df is None or df.empty:
+            logger.warning("No hay registros en el histórico.")
+            return None
+
+        if self.history_days:
+            desde = datetime.now(timezone.utc) - timedelta(days=self.history_days)
+            df = df[df["Timestamp"] >= desde.replace(tzinfo=None).isoformat() + "Z"].reset_index(drop=True)
+
+        logger.info("Datos históricos cargados correctamente: {} registros totales.", len(df))
+        return df
+
+    def _load_from_store(self):
+        """Agrega al histórico consolidado solo los registros con id mayor al último ingerido."""
+        df, manifest = self._read_cached_history()
+        db_path = os.path.abspath(self.store.db_path)
+        ultimo_id = manifest.get("ultimo_id", 0) if manifest.get("db_path") == db_path else 0
+
+        version = self.store.version()
+        if df is None or ultimo_id == 0 or version < ultimo_id:
+            # Sin cache válida (o la base fue recreada): carga completa
+            df, ultimo_id = None, 0
+
+        if df is not None and version == ultimo_id:
+            self._df, self._manifest = df, manifest
+            return df
+
+        nuevos = self.store.query(since_id=ultimo_id)
+        logger.info("Histórico: {} registros nuevos desde el id {}", len(nuevos), ultimo_id)
+        if df is not None:
+            df = pd.concat([df, nuevos], ignore_index=True)
+            df = df.sort_values("Timestamp", kind="stable", ignore_index=True)
+        else:
+            df = nuevos
+
+        self._save_cached_history(df, {"db_path": db_path, "ultimo_id": version})
+        return df
+
+    def _load_csv_files(self):
+        """Carga los archivos CSV históricos leyendo solo los nuevos según el manifiesto (ruta, tamaño, mtime)."""
         try:
-            csv_files = glob.glob(os.path.join(self.data_path, "resumen_ciudades_*.csv"))
+            csv_files = sorted(glob.glob(os.path.join(self.data_path, "resumen_ciudades_*.csv")))
             if not csv_files:
                 logger.warning("No se encontraron archivos CSV históricos en data/outputs.")
                 return None
 
-            df_list = [pd.read_csv(f) for f in csv_files]
-            df = pd.concat(df_list, ignore_index=True)
-            logger.info(f"Datos históricos cargados correctamente: {len(df)} registros totales.")
+            archivos = {}
+            for ruta in csv_files:
+                st = os.stat(ruta)
+                archivos[os.path.abspath(ruta)] = [st.st_size, st.st_mtime]
+
+            df, manifest = self._read_cached_history()
+            conocidos = manifest.get("archivos")
+            # Si algún archivo ingerido cambió o desapareció, se reconstruye todo
+            if df is None or conocidos is None or any(archivos.get(ruta) != meta for ruta, meta in conocidos.items()):
+                df, conocidos = None, {}
+
+            nuevos = [ruta for ruta in archivos if ruta not in conocidos]
+            if df is not None and not nuevos:
+                self._df, self._manifest = df, manifest
+                return df
+
+            df_list = ([df] if df is not None else []) + [pd.read_csv(f) for f in nuevos]
+            df = pd.concat(df_list, ignore_index=True).sort_values("Timestamp", kind="stable", ignore_index=True)
+            logger.info("Histórico CSV: {} archivos nuevos ingeridos.", len(nuevos))
+
+            self._save_cached_history(df, {"archivos": archivos})
             return df
         except Exception as e:
-            logger.error(f"Error cargando datos históricos: {e}")
+            logger.error("Error cargando datos históricos: {}", e)
             return None
 
-    def predict_ivv(self):
+    def predict_ivv(self, window=None, halflife=None):
         """
         Predice el IVV futuro simple para cada ciudad usando regresión lineal.
+        Todas las ciudades se ajustan juntas en una sola pasada (ver fit_grouped_trends).
         Retorna un diccionario {ciudad: IVV_predicho}.
         """
         df = self._load_data()
         if df is None:
             return {}
 
-        preds = {}
-        for city in df["Ciudad"].unique():
-            sub = df[df["Ciudad"] == city].reset_index(drop=True)
+        window = window if window is not None else Config.ML_TREND_WINDOW
+        halflife = halflife if halflife is not None else Config.ML_TREND_HALFLIFE
+        trends = fit_grouped_trends(df, window=window or None, halflife=halflife or None)
+
+        # Limitar los valores predichos al rango 0–100
+        preds = {
+            city: round(float(max(0, min(future_ivv, 100))), 2)
+            for city, future_ivv in zip(trends["Ciudad"], trends["IVV_Predicho"])
+        }
+
+        logger.info("Predicciones generadas para {} ciudades.", len(preds))
+        return preds
+
+    def _anomaly_model_path(self, scope):
+        return os.path.join(self.models_dir, f"anomalias_{scope}.joblib")
+
+    def _fingerprint(self, df):
+        """Huella de los datos de entrenamiento (ciudad, timestamp e IVV de cada fila)"""
+        hashes = pd.util.hash_pandas_object(df[["Ciudad", "Timestamp", "IVV_Score"]], index=False)
+        return hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+    def _group_keys(self, df, scope):
+        """Clave del modelo que corresponde a cada fila"""
+        return df["Ciudad"] if scope == "ciudad" else pd.Series("global", index=df.index)
+
+    def _train_anomaly_model(self, df, scope):
+        """Entrena los Isolation Forest (uno global o uno por ciudad) y los guarda en disco."""
+        modelos, stats = {}, {}
+        for clave, sub in df.groupby(self._group_keys(df, scope), sort=False):
             if len(sub) < 2:
-                continue  # No hay suficientes datos históricos
+                continue  # No hay suficientes datos para entrenar
+            model = IsolationForest(contamination=0.2, random_state=42)
+            model.fit(sub[["IVV_Score"]])
+            modelos[clave] = model
+            stats[clave] = (float(sub["IVV_Score"].mean()), float(sub["IVV_Score"].std(ddof=0)))
 
-            X = np.arange(len(sub)).reshape(-1, 1)
-            y = sub["IVV_Score"]
+        bundle = {
+            "scope": scope,
+            "modelos": modelos,
+            "stats": stats,
+            "fingerprint": self._fingerprint(df),
+            "ultimo_timestamp": df["Timestamp"].max(),
+            "trained_at": datetime.now(timezone.utc).timestamp(),
+            "n_rows": len(df),
+        }
 
-            model = LinearRegression()
-            model.fit(X, y)
-            future_ivv = model.predict([[len(sub)]])[0]
-            # Limitar los valores predichos al rango 0–100
-            future_ivv = max(0, min(future_ivv, 100))
-            preds[city] = round(float(future_ivv), 2)
+        self._save_anomaly_model(bundle, scope)
+        logger.info("Modelo de anomalías ({}) entrenado con {} registros.", scope, len(df))
+        return bundle
 
+    def _save_anomaly_model(self, bundle, scope):
+        """Guarda el modelo con escritura atómica (archivo temporal + os.replace)"""
+        path = self._anomaly_model_path(scope)
+        try:
+            os.makedirs(self.models_dir, exist_ok=True)
+            joblib.dump(bundle, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            logger.warning("No se pudo guardar el modelo de anomalías {}: {}", path, e)
 
-        logger.info(f"Predicciones generadas para {len(preds)} ciudades.")
-        return preds
+    def _load_anomaly_model(self, scope):
+        path = self._anomaly_model_path(scope)
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            logger.warning("Modelo de anomalías {} ilegible, se reentrenará: {}", path, e)
+            return None
+
+    def _retrain_reason(self, bundle, df, scope):
+        """Motivo para reentrenar (None si el modelo guardado sigue vigente)"""
+        if bundle is None or bundle.get("scope") != scope:
+            return "sin modelo guardado"
+
+        edad_horas = (datetime.now(timezone.utc).timestamp() - bundle["trained_at"]) / 3600
+        if edad_horas >= self.retrain_hours:
+            return f"modelo con {edad_horas:.1f} horas"
+
+        nuevos = df[df["Timestamp"] > bundle["ultimo_timestamp"]]
+        for clave, sub in nuevos.groupby(self._group_keys(nuevos, scope), sort=False):
+            if clave not in bundle["stats"]:
+                return f"{clave} sin modelo"
+            if len(sub) < Config.ANOMALY_DRIFT_MIN_ROWS:
+                continue
+            media, desviacion = bundle["stats"][clave]
+            # Deriva: la media de las observaciones nuevas se aleja de la de entrenamiento
+            if abs(sub["IVV_Score"].mean() - media) > Config.ANOMALY_DRIFT_STD * max(desviacion, 1.0):
+                return f"deriva detectada en {clave}"
+        return None
+
+    def get_anomaly_model(self, df=None, force=False):
+        """
+        Devuelve el modelo de anomalías guardado, reentrenándolo solo si es necesario
+        (no existe, venció Config.ANOMALY_RETRAIN_HOURS, hay deriva o `force=True`).
+        """
+        df = df if df is not None else self._load_data()
+        if df is None:
+            return None
 
-    def detect_anomalies(self):
+        bundle = self._load_anomaly_model(self.anomaly_scope)
+        motivo = "reentrenamiento forzado" if force else self._retrain_reason(bundle, df, self.anomaly_scope)
+        if motivo is None:
+            return bundle
+
+        if bundle is not None and bundle.get("scope") == self.anomaly_scope and self._fingerprint(df) == bundle["fingerprint"]:
+            # Mismos datos que el último entrenamiento: solo se renueva la fecha
+            bundle["trained_at"] = datetime.now(timezone.utc).timestamp()
+            self._save_anomaly_model(bundle, self.anomaly_scope)
+            return bundle
+
+        logger.info("Reentrenando modelo de anomalías: {}", motivo)
+        return self._train_anomaly_model(df, self.anomaly_scope)
+
+    def detect_anomalies(self, force_retrain=False):
         """
         Detecta ciudades con valores anómalos de IVV usando Isolation Forest.
+        Las observaciones se puntúan con el modelo guardado, sin reentrenar en cada llamada.
         """
         df = self._load_data()
         if df is None:
             return pd.DataFrame()
 
-        model = IsolationForest(contamination=0.2, random_state=42)
-        df["anomaly_flag"] = model.fit_predict(df[["IVV_Score"]])
-        anomalies = df[df["anomaly_flag"] == -1][["Ciudad", "IVV_Score", "Nivel_Riesgo"]]
+        bundle = self.get_anomaly_model(df, force=force_retrain)
+
+        # No se modifica el histórico consolidado: es compartido con predict_ivv
+        anomaly_flag = np.ones(len(df), dtype=int)
+        claves = self._group_keys(df, bundle["scope"]).to_numpy()
+        for clave, model in bundle["modelos"].items():
+            filas = claves == clave
+            if filas.any():
+                anomaly_flag[filas] = model.predict(df.loc[filas, ["IVV_Score"]])
+        anomalies = df.loc[anomaly_flag == -1, ["Ciudad", "IVV_Score", "Nivel_Riesgo"]]
 
         if anomalies.empty:
             logger.info("No se detectaron anomalías en el IVV.")
         else:
-            logger.warning(f"Se detectaron {len(anomalies)} anomalías en el IVV.")
+            logger.warning("Se detectaron {} anomalías en el IVV.", len(anomalies))
 
         return anomalies
 
 
 if __name__ == "__main__":
+    setup_logging()
     print("=== PREDICTOR DE IVV ===")
     predictor = IVVPredictor()
 
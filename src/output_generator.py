@@ -1,111 +1,202 @@
 import json
 import csv
 import os
+import threading
 from datetime import datetime
 from logger import get_logger
 
 logger = get_logger()
 
+CSV_HEADER = [
+    'Ciudad', 'Timestamp', 'Temperatura', 'Viento', 'Precipitacion', 
+    'UV', 'Tipo_Cambio', 'Variacion', 'Tendencia', 
+    'IVV_Score', 'Nivel_Riesgo', 'Alertas_Count'
+]
+
+def _finanzas(cambio):
+    """(tipo_cambio_actual, variacion_diaria, tendencia_5_dias); vacío si no hubo datos de cambio"""
+    if cambio is None:
+        return None, None, None
+    return cambio.tipo_cambio_actual, cambio.variacion_diaria, cambio.tendencia_5_dias
+
+def summary_row(ciudad_data):
+    """Fila resumen de un CityResult en el orden de CSV_HEADER"""
+    observacion = ciudad_data.observacion
+    tipo_cambio, variacion, tendencia = _finanzas(ciudad_data.cambio)
+    return [
+        ciudad_data.ciudad,
+        observacion.timestamp,
+        observacion.temperatura,
+        observacion.viento,
+        observacion.precipitacion,
+        observacion.uv,
+        tipo_cambio,
+        variacion,
+        tendencia,
+        ciudad_data.ivv.ivv_score,
+        ciudad_data.ivv.nivel_riesgo,
+        len(ciudad_data.alertas)
+    ]
+
+def report_record(ciudad_data):
+    """Registro de un CityResult con la estructura del reporte JSON"""
+    observacion = ciudad_data.observacion
+    tipo_cambio, variacion, tendencia = _finanzas(ciudad_data.cambio)
+    return {
+        "timestamp": observacion.timestamp,
+        "ciudad": ciudad_data.ciudad,
+        "clima": {
+            "temperatura_actual": observacion.temperatura,
+            "pronostico_7_dias": [dia.to_dict() for dia in observacion.pronostico],
+            "precipitacion": observacion.precipitacion,
+            "viento": observacion.viento,
+            "uv": observacion.uv
+        },
+        "finanzas": {
+            "tipo_cambio_actual": tipo_cambio,
+            "variacion_diaria": variacion,
+            "tendencia_5_dias": tendencia
+        },
+        "alertas": [alerta.to_dict() for alerta in ciudad_data.alertas],
+        "ivv_score": ciudad_data.ivv.ivv_score,
+        "nivel_riesgo": ciudad_data.ivv.nivel_riesgo,
+        "componentes_ivv": ciudad_data.ivv.componentes(),
+        "degradado": ciudad_data.degradado
+    }
+
+def run_timestamp():
+    """Timestamp de una ejecución para nombrar sus reportes (con microsegundos)"""
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+def read_report(json_file):
+    """Lee un reporte JSON escrito por ReportWriter registro por registro (uno por línea)"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        for linea in f:
+            linea = linea.strip().rstrip(",")
+            if linea and linea not in ("[", "]"):
+                yield json.loads(linea)
+
+class ReportWriter:
+    """
+    Escritor incremental de los reportes de una ejecución.
+    Cada ciudad se agrega al JSON (un registro por línea) y al CSV apenas se procesa, sobre
+    archivos temporales `.part` que se renombran al confirmar. Ambos archivos comparten el timestamp
+    de la ejecución (con microsegundos; si ya está tomado se usa otro). Si la ejecución se interrumpe,
+    los `.part` conservan lo escrito hasta ese momento.
+    """
+
+    def __init__(self, output_dir, timestamp=None):
+        while True:
+            self.timestamp = timestamp or run_timestamp()
+            self.json_file = f"{output_dir}/reporte_ciudades_{self.timestamp}.json"
+            self.csv_file = f"{output_dir}/resumen_ciudades_{self.timestamp}.csv"
+            if not timestamp and os.path.exists(self.json_file):
+                continue
+            try:
+                # Creación exclusiva: otro reporte con el mismo timestamp nunca se pisa
+                self._json = open(f"{self.json_file}.part", 'x', encoding='utf-8')
+                break
+            except FileExistsError:
+                if timestamp:
+                    raise
+        self.count = 0
+        self._lock = threading.Lock()
+
+        self._csv_handle = open(f"{self.csv_file}.part", 'w', newline='', encoding='utf-8')
+        self._csv = csv.writer(self._csv_handle)
+
+        self._json.write("[")
+        self._csv.writerow(CSV_HEADER)
+
+    def write(self, ciudad_data):
+        """Agrega una ciudad a ambos reportes y la deja en disco"""
+        registro = json.dumps(report_record(ciudad_data), ensure_ascii=False)
+        fila = summary_row(ciudad_data)
+        with self._lock:
+            self._json.write(("," if self.count else "") + "\n" + registro)
+            self._csv.writerow(fila)
+            self._json.flush()
+            self._csv_handle.flush()
+            self.count += 1
+
+    def _close_handles(self):
+        self._json.close()
+        self._csv_handle.close()
+
+    def commit(self):
+        """Cierra los reportes y los publica de forma atómica. Retorna (json_file, csv_file)"""
+        with self._lock:
+            self._json.write("\n]\n")
+            self._close_handles()
+            os.replace(f"{self.json_file}.part", self.json_file)
+            os.replace(f"{self.csv_file}.part", self.csv_file)
+
+        logger.info("Reportes generados ({} ciudades): {}, {}", self.count, self.json_file, self.csv_file)
+        return self.json_file, self.csv_file
+
+    def discard(self):
+        """Cierra y elimina los temporales sin publicar nada"""
+        with self._lock:
+            self._close_handles()
+            for ruta in (f"{self.json_file}.part", f"{self.csv_file}.part"):
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Ante un error se conservan los .part con el progreso parcial
+        if exc_type is not None and not self._json.closed:
+            self._close_handles()
+            logger.error("Ejecución interrumpida: reporte parcial en {}.part ({} ciudades)", self.json_file, self.count)
+        return False
+
 class OutputGenerator:
     def __init__(self):
         self.output_dir = "data/outputs"
         os.makedirs(self.output_dir, exist_ok=True)
     
-    def generate_json(self, datos_ciudades):
+    def open_report(self, timestamp=None):
+        """Abre el escritor incremental de reportes de una ejecución"""
+        return ReportWriter(self.output_dir, timestamp)
+    
+    def generate_json(self, datos_ciudades, timestamp=None):
         """Genera archivo JSON con estructura requerida"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = timestamp or run_timestamp()
             filename = f"{self.output_dir}/reporte_ciudades_{timestamp}.json"
             
-            output_data = []
-            
-            for ciudad_data in datos_ciudades:
-                ciudad_output = {
-                    "timestamp": ciudad_data['datos']['timestamp'],
-                    "ciudad": ciudad_data['ciudad'],
-                    "clima": {
-                        "temperatura_actual": ciudad_data['datos']['clima']['current']['temperature_2m'],
-                        "pronostico_7_dias": self._get_7day_forecast(ciudad_data['datos']['clima']),
-                        "precipitacion": ciudad_data['datos']['clima']['current']['precipitation'],
-                        "viento": ciudad_data['datos']['clima']['current']['wind_speed_10m'],
-                        "uv": ciudad_data['datos']['clima']['current']['uv_index']
-                    },
-                    "finanzas": {
-                        "tipo_cambio_actual": ciudad_data['exchange_data']['tipo_cambio_actual'],
-                        "variacion_diaria": ciudad_data['exchange_data']['variacion_diaria'],
-                        "tendencia_5_dias": ciudad_data['exchange_data']['tendencia_5_dias']
-                    },
-                    "alertas": ciudad_data['alertas'],
-                    "ivv_score": ciudad_data['ivv_data']['ivv_score'],
-                    "nivel_riesgo": ciudad_data['ivv_data']['nivel_riesgo'],
-                    "componentes_ivv": ciudad_data['ivv_data']['componentes_ivv']
-                }
-                output_data.append(ciudad_output)
+            output_data = [report_record(ciudad_data) for ciudad_data in datos_ciudades]
             
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
             
-            logger.info(f"JSON generado: {filename}")
+            logger.info("JSON generado: {}", filename)
             return filename
             
         except Exception as e:
-            logger.error(f"Error generando JSON: {e}")
+            logger.error("Error generando JSON: {}", e)
             return None
     
-    def _get_7day_forecast(self, clima_data):
-        """Extrae pronostico de 7 dias de los datos de la API"""
-        try:
-            forecast = []
-            daily = clima_data.get('daily', {})
-            
-            if daily and 'time' in daily:
-                for i in range(min(7, len(daily['time']))):
-                    day_forecast = {
-                        "fecha": daily['time'][i],
-                        "temp_max": daily['temperature_2m_max'][i] if 'temperature_2m_max' in daily else 0,
-                        "temp_min": daily['temperature_2m_min'][i] if 'temperature_2m_min' in daily else 0,
-                        "precipitacion": daily['precipitation_probability_max'][i] if 'precipitation_probability_max' in daily else 0
-                    }
-                    forecast.append(day_forecast)
-            
-            return forecast
-        except Exception as e:
-            logger.error(f"Error procesando pronostico: {e}")
-            return []
-    
-    def generate_csv(self, datos_ciudades):
+    def generate_csv(self, datos_ciudades, timestamp=None):
         """Genera archivo CSV resumen"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = timestamp or run_timestamp()
             filename = f"{self.output_dir}/resumen_ciudades_{timestamp}.csv"
             
             with open(filename, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    'Ciudad', 'Timestamp', 'Temperatura', 'Viento', 'Precipitacion', 
-                    'UV', 'Tipo_Cambio', 'Variacion', 'Tendencia', 
-                    'IVV_Score', 'Nivel_Riesgo', 'Alertas_Count'
-                ])
+                writer.writerow(CSV_HEADER)
                 
                 for ciudad_data in datos_ciudades:
-                    writer.writerow([
-                        ciudad_data['ciudad'],
-                        ciudad_data['datos']['timestamp'],
-                        ciudad_data['datos']['clima']['current']['temperature_2m'],
-                        ciudad_data['datos']['clima']['current']['wind_speed_10m'],
-                        ciudad_data['datos']['clima']['current']['precipitation'],
-                        ciudad_data['datos']['clima']['current']['uv_index'],
-                        ciudad_data['exchange_data']['tipo_cambio_actual'],
-                        ciudad_data['exchange_data']['variacion_diaria'],
-                        ciudad_data['exchange_data']['tendencia_5_dias'],
-                        ciudad_data['ivv_data']['ivv_score'],
-                        ciudad_data['ivv_data']['nivel_riesgo'],
-                        len(ciudad_data['alertas'])
-                    ])
+                    writer.writerow(summary_row(ciudad_data))
             
-            logger.info(f"CSV generado: {filename}")
+            logger.info("CSV generado: {}", filename)
             return filename
             
         except Exception as e:
-            logger.error(f"Error generando CSV: {e}")
+            logger.error("Error generando CSV: {}", e)
             return None
\ No newline at end of file
@@ -0,0 +1,357 @@
+# src/pipeline.py
+import threading
+import time
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from logger import get_logger
+from config import Config
+from data_collector import DataCollector, CIUDADES
+from city_catalog import group_by_cell
+from processor import DataProcessor
+from output_generator import OutputGenerator
+from history_store import HistoryStore
+from change_tracker import ChangeTracker, city_fingerprint
+from records import CityResult
+from metrics import stage, count_city, write_run_metrics, CITY_STAGE_DURATION
+from deadline import Deadline, DeadlineExceeded
+
+logger = get_logger()
+
+def _obtener_resultado(futuro, descripcion, deadline=None):
+    """
+    Devuelve el resultado de un futuro o None si la tarea falló.
+    Con `deadline` espera solo el tiempo restante y lanza DeadlineExceeded si no alcanzó.
+    """
+    try:
+        return futuro.result(timeout=deadline.remaining() if deadline else None)
+    except TimeoutError:
+        # Incluye el timeout del futuro y DeadlineExceeded lanzado dentro de la tarea
+        raise DeadlineExceeded(f"sin tiempo para {descripcion}") from None
+    except Exception as e:
+        logger.error("Error inesperado en {}: {}", descripcion, e)
+        return None
+
+def _con_limite(deadline):
+    return deadline is not None and deadline.remaining() is not None
+
+@dataclass(slots=True)
+class ScoreSummary:
+    """Conteo de ciudades de un cálculo de puntajes (los resultados van al reporte y al histórico)"""
+    recalculadas: int = 0
+    sin_cambios: int = 0
+    degradadas: int = 0
+    fallidas: int = 0
+
+    @property
+    def procesadas(self):
+        return self.recalculadas + self.sin_cambios + self.degradadas
+
+class Pipeline:
+    """
+    Pipeline de recolección por etapas: clima (con zona horaria), tipos de cambio y puntajes.
+    Cada etapa se puede ejecutar por separado (scheduler) o todas juntas con run().
+    """
+
+    def __init__(self, ciudades=None, max_workers=None):
+        self.ciudades = ciudades if ciudades is not None else CIUDADES
+        self.max_workers = max(1, max_workers or Config.MAX_WORKERS)
+        self.collector = DataCollector()
+        self.processor = DataProcessor()
+        self.output_gen = OutputGenerator()
+        self.store = HistoryStore()
+        self.tracker = ChangeTracker() if Config.CHANGE_DETECTION_ENABLED else None
+
+        # Últimos datos recolectados por etapa y sus versiones
+        self._lock = threading.Lock()
+        self.datos_clima = [None] * len(self.ciudades)
+        self.datos_tiempo = {}
+        self.degradados = frozenset()  # Índices cuyo clima no llegó dentro del presupuesto
+        self.version_clima = 0
+        self.version_cambio = 0
+        self.archivos = (None, None)
+
+        self._version_puntuada = None
+        self._puntuando = False
+        self._repuntuar = False
+
+    def _new_executor(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="recolector")
+
+    def _shutdown(self, executor, deadline):
+        # Con presupuesto no se espera a las consultas rezagadas: su resultado se descarta
+        executor.shutdown(wait=not _con_limite(deadline), cancel_futures=True)
+
+    def refresh_weather(self, executor=None, deadline=None):
+        """
+        Recolecta clima (en lotes por celda de la grilla) y zona horaria de todas las ciudades.
+        Los lotes que no responden dentro del `deadline` conservan los últimos datos conocidos
+        y sus ciudades quedan marcadas como degradadas.
+        """
+        if executor is None:
+            executor = self._new_executor()
+            try:
+                return self.refresh_weather(executor, deadline)
+            finally:
+                self._shutdown(executor, deadline)
+
+        with stage("clima"):
+            tamano_lote = max(1, Config.WEATHER_BATCH_SIZE)
+
+            # Lotes de celdas de la grilla: cada lote genera una sola peticion multi-ubicacion
+            celdas = list(group_by_cell(self.ciudades).values())
+            lotes = [
+                [indice for celda in celdas[i:i + tamano_lote] for indice in celda]
+                for i in range(0, len(celdas), tamano_lote)
+            ]
+            timezones = list(dict.fromkeys(ciudad['timezone'] for ciudad in self.ciudades))
+
+            futuros_clima = [
+                executor.submit(self._collect_batch, [self.ciudades[i] for i in lote], deadline)
+                for lote in lotes
+            ]
+            futuros_tiempo = {
+                tz: executor.submit(self.collector.collect_time_data, tz, deadline) for tz in timezones
+            }
+
+            with self._lock:
+                previos_clima = self.datos_clima
+                previos_tiempo = self.datos_tiempo
+
+            datos_clima = [None] * len(self.ciudades)
+            degradados = set()
+            for lote, futuro in zip(lotes, futuros_clima):
+                try:
+                    datos_lote = _obtener_resultado(futuro, f"clima de {len(lote)} ciudades", deadline)
+                except DeadlineExceeded:
+                    degradados.update(lote)
+                    datos_lote = [previos_clima[indice] for indice in lote]
+                for indice, datos in zip(lote, datos_lote or [None] * len(lote)):
+                    datos_clima[indice] = datos
+
+            datos_tiempo = {}
+            for tz, futuro in futuros_tiempo.items():
+                try:
+                    datos_tiempo[tz] = _obtener_resultado(futuro, f"zona horaria de {tz}", deadline)
+                except DeadlineExceeded:
+                    datos_tiempo[tz] = previos_tiempo.get(tz)
+
+            if degradados:
+                logger.warning(
+                    "Presupuesto de {} s agotado: {} ciudades usarán sus últimos datos conocidos",
+                    deadline.seconds, len(degradados)
+                )
+
+            with self._lock:
+                self.datos_clima = datos_clima
+                self.datos_tiempo = datos_tiempo
+                self.degradados = frozenset(degradados)
+                self.version_clima += 1
+                return self.version_clima
+
+    def _collect_batch(self, ciudades, deadline=None):
+        """Recolecta un lote de clima y registra su duración (total y prorrateada por ciudad)"""
+        inicio = time.perf_counter()
+        with stage("clima_lote"):
+            datos = self.collector.collect_cities_data(ciudades, deadline)
+        duracion = (time.perf_counter() - inicio) / max(1, len(ciudades))
+        if Config.METRICS_ENABLED:
+            for _ in ciudades:
+                CITY_STAGE_DURATION.observe(duracion, stage="recoleccion")
+        return datos
+
+    def refresh_exchange(self, deadline=None):
+        """
+        Consulta un snapshot nuevo de tipos de cambio para todas las monedas y lo reemplaza ya listo:
+        un cálculo en curso sigue con el snapshot que tomó al empezar.
+        """
+        with stage("cambio"):
+            snapshot = self.collector.build_exchange_snapshot(deadline)
+        with self._lock:
+            self.collector.set_exchange_snapshot(snapshot)
+            self.version_cambio += 1
+            return self.version_cambio
+
+    def collect(self, deadline=None):
+        """Recolecta todas las fuentes a la vez (clima, zona horaria y tipos de cambio)"""
+        executor = self._new_executor()
+        try:
+            futuro_cambio = executor.submit(self.refresh_exchange, deadline)
+            self.refresh_weather(executor, deadline)
+            try:
+                _obtener_resultado(futuro_cambio, "snapshot de tipos de cambio", deadline)
+            except DeadlineExceeded:
+                logger.warning("Tipos de cambio sin respuesta dentro del presupuesto: se usará el último snapshot conocido")
+        finally:
+            self._shutdown(executor, deadline)
+
+    def score(self, force=False, deadline=None):
+        """
+        Calcula alertas e IVV con los últimos datos y publica reportes e histórico.
+        Solo recalcula si cambió alguna fuente y, dentro de ella, solo las ciudades cuyas
+        entradas cambiaron (`force` recalcula y escribe todo). Si ya hay un cálculo en curso,
+        se marca para repetirlo al terminar en lugar de correr en paralelo.
+        Retorna el ScoreSummary del último cálculo, o None si no había nada nuevo.
+        """
+        with self._lock:
+            if self._puntuando:
+                self._repuntuar = True
+                return None
+            self._puntuando = True
+
+        try:
+            resumen = None
+            while True:
+                with self._lock:
+                    version = (self.version_clima, self.version_cambio)
+                    datos_clima = self.datos_clima
+                    datos_tiempo = self.datos_tiempo
+                    degradados = self.degradados
+                    # El mismo snapshot de cambio para todas las ciudades de este cálculo
+                    snapshot = self.collector.current_exchange_snapshot()
+                    self._repuntuar = False
+
+                # Sin clima aún no hay nada que calcular (el trabajo de clima puntuará al terminar)
+                if version[0] and (force or version != self._version_puntuada):
+                    # Cada ciudad se escribe en el reporte apenas se procesa
+                    with self.output_gen.open_report() as reporte:
+                        with stage("puntaje"):
+                            resumen = self._score(
+                                datos_clima, datos_tiempo, reporte, force, degradados, deadline, snapshot
+                            )
+                        with stage("publicacion"):
+                            self._publish(reporte, resumen, force)
+                    self._version_puntuada = version
+                    force = False
+
+                with self._lock:
+                    if not self._repuntuar:
+                        return resumen
+        finally:
+            with self._lock:
+                self._puntuando = False
+
+    def _score(self, datos_clima, datos_tiempo, reporte, force=False, degradados=frozenset(), deadline=None,
+               snapshot=None):
+        """
+        Evalúa alertas e IVV de cada ciudad con datos de clima y la agrega al reporte. Las ciudades
+        con la misma huella de entrada que en la ejecución anterior reutilizan su resultado.
+        Las ciudades sin datos a tiempo se publican degradadas (últimos datos conocidos) y no
+        pasan al histórico. Las recalculadas se vuelcan al histórico y al tracker cada
+        Config.SCORE_CHUNK_SIZE ciudades, así la memoria no crece con el número de ciudades.
+        Retorna el ScoreSummary con los conteos.
+        """
+        if snapshot is None:
+            # Aún sin snapshot (la consulta de la ejecución no terminó): se obtiene una vez para todas
+            try:
+                snapshot = self.collector.get_exchange_snapshot(deadline)
+            except Exception:
+                pass  # Cada ciudad lo reintenta o usa el último snapshot conocido (degradada)
+        resumen = ScoreSummary()
+        tamano_bloque = max(1, Config.SCORE_CHUNK_SIZE)
+        cambios = {}
+
+        for indice, (ciudad, datos) in enumerate(zip(self.ciudades, datos_clima)):
+            logger.info("Procesando ciudad: {}", ciudad['nombre'])
+            time_data = datos_tiempo.get(ciudad['timezone'])
+            degradado = indice in degradados
+
+            if not datos:
+                # Sin datos en memoria: el último resultado persistido de la ciudad, si lo hay
+                ultimo = self.tracker.last(ciudad['nombre']) if degradado and self.tracker else None
+                if ultimo is None:
+                    logger.error("Fallo la recoleccion para {}", ciudad['nombre'])
+                    resumen.fallidas += 1
+                    count_city("fallida")
+                    continue
+                ultimo.time_data = time_data
+                ultimo.degradado = True
+                with stage("salida", CITY_STAGE_DURATION):
+                    reporte.write(ultimo)
+                resumen.degradadas += 1
+                count_city("degradada")
+                continue
+
+            exchange_data = self.collector.collect_exchange_data(ciudad['moneda'], deadline, snapshot)
+            degradado = degradado or bool(exchange_data and exchange_data.degradado)
+
+            huella = city_fingerprint(datos, exchange_data)
+            reutilizable = self.tracker and not force and not degradado
+            anterior = self.tracker.previous(ciudad['nombre'], huella) if reutilizable else None
+            if anterior:
+                anterior.time_data = time_data
+                with stage("salida", CITY_STAGE_DURATION):
+                    reporte.write(anterior)
+                resumen.sin_cambios += 1
+                count_city("sin_cambios")
+                continue
+
+            with stage("proceso", CITY_STAGE_DURATION):
+                alertas = self.processor.evaluate_observation(datos)
+
+                # Usar datos reales de exchange para el calculo de IVV
+                cambio_estable = exchange_data.estable if exchange_data else True
+
+                ivv_data = self.processor.calculate_ivv_record(alertas, datos.uv, cambio_estable=cambio_estable)
+
+            resultado = CityResult(ciudad['nombre'], datos, exchange_data, alertas, ivv_data, time_data, degradado)
+            with stage("salida", CITY_STAGE_DURATION):
+                reporte.write(resultado)
+            if degradado:
+                resumen.degradadas += 1
+                count_city("degradada")
+                continue
+
+            resumen.recalculadas += 1
+            count_city("recalculada")
+            cambios[ciudad['nombre']] = (huella, resultado)
+            if len(cambios) >= tamano_bloque:
+                self._flush(reporte, cambios)
+                cambios = {}
+
+        self._flush(reporte, cambios)
+        return resumen
+
+    def _flush(self, reporte, cambios):
+        """
+        Guarda un bloque de ciudades recalculadas {ciudad: (huella, resultado)} en el histórico
+        (una transacción) y en el tracker. El CSV de la ejecución queda marcado como importado
+        antes de publicarse: una importación concurrente nunca lo ve sin marcar.
+        """
+        if not cambios:
+            return
+        self.store.append_run([resultado for _, resultado in cambios.values()], source_file=reporte.csv_file)
+        if self.tracker:
+            self.tracker.update(cambios)
+
+    def _publish(self, reporte, resumen, force=False):
+        """
+        Publica los reportes de la ejecución (el histórico ya tiene las ciudades que cambiaron).
+        Si ninguna ciudad cambió ni quedó degradada se descarta el reporte: el último sigue vigente.
+        Las degradadas se publican (con su marca) pero no pasan al histórico ni al tracker.
+        """
+        if not resumen.recalculadas and not resumen.degradadas and not force:
+            logger.info("Sin cambios en las entradas desde la última ejecución: se omite la escritura.")
+            reporte.discard()
+            self.archivos = (None, None)
+            return
+
+        if not resumen.recalculadas:
+            # Sin bloques volcados el CSV aún no está marcado como importado
+            self.store.append_run([], source_file=reporte.csv_file)
+        self.archivos = reporte.commit()
+        logger.info(
+            "Ciudades recalculadas: {}/{} ({} degradadas)",
+            resumen.recalculadas, resumen.procesadas, resumen.degradadas
+        )
+
+    def run(self, force=False, deadline=None):
+        """
+        Ejecución completa: recolecta todas las fuentes y calcula los puntajes dentro del
+        presupuesto de tiempo (`deadline` o Config.RUN_DEADLINE_SECONDS).
+        """
+        deadline = deadline or Deadline.from_config()
+        with stage("ejecucion"):
+            self.collect(deadline)
+            resumen = self.score(force=force, deadline=deadline)
+        write_run_metrics(job="ejecucion")
+        return resumen
@@ -1,5 +1,8 @@
+import numpy as np
+import pandas as pd
 from logger import get_logger
 from datetime import datetime
+from records import Alert, IVVResult
 
 logger = get_logger()
 
@@ -7,49 +10,49 @@ class DataProcessor:
     def __init__(self):
         self.logger = get_logger()
     
-    def evaluate_alerts(self, ciudad, clima_data):
-        """Evalúa y genera alertas basadas en los datos climáticos"""
+    def _alert_rules(self, temperatura, precipitacion, viento, uv_index):
+        """Reglas de alerta climática: lista de (tipo, severidad, mensaje)"""
         alertas = []
-        current = clima_data['current']
         
         # 1. Alerta por temperatura crítica
-        if current['temperature_2m'] > 35 or current['temperature_2m'] < 0:
-            alertas.append({
-                'tipo': 'CLIMA',
-                'severidad': 'ALTA',
-                'mensaje': f"Temperatura crítica: {current['temperature_2m']}°C"
-            })
+        if temperatura > 35 or temperatura < 0:
+            alertas.append(('CLIMA', 'ALTA', f"Temperatura crítica: {temperatura}°C"))
         
         # 2. Alerta por probabilidad de lluvia alta
-        if current['precipitation'] > 5:
-            alertas.append({
-                'tipo': 'CLIMA', 
-                'severidad': 'MEDIA',
-                'mensaje': f"Precipitación alta: {current['precipitation']}mm"
-            })
+        if precipitacion > 5:
+            alertas.append(('CLIMA', 'MEDIA', f"Precipitación alta: {precipitacion}mm"))
         
         # 3. Alerta por viento fuerte
-        if current['wind_speed_10m'] > 50:
-            alertas.append({
-                'tipo': 'CLIMA',
-                'severidad': 'ALTA', 
-                'mensaje': f"Viento fuerte: {current['wind_speed_10m']} km/h"
-            })
+        if viento > 50:
+            alertas.append(('CLIMA', 'ALTA', f"Viento fuerte: {viento} km/h"))
         
         # 4. Alerta por UV alto
-        if current['uv_index'] > 8:
-            alertas.append({
-                'tipo': 'CLIMA',
-                'severidad': 'MEDIA',
-                'mensaje': f"Índice UV muy alto: {current['uv_index']}"
-            })
+        if uv_index > 8:
+            alertas.append(('CLIMA', 'MEDIA', f"Índice UV muy alto: {uv_index}"))
             
         return alertas
     
-    def calculate_ivv(self, alertas, uv_index, cambio_estable=True):
-        """Calcula el Índice de Viabilidad de Viaje (IVV)"""
+    def evaluate_alerts(self, ciudad, clima_data):
+        """Evalúa y genera alertas basadas en los datos climáticos"""
+        current = clima_data['current']
+        reglas = self._alert_rules(
+            current['temperature_2m'], current['precipitation'],
+            current['wind_speed_10m'], current['uv_index']
+        )
+        return [{'tipo': tipo, 'severidad': severidad, 'mensaje': mensaje} for tipo, severidad, mensaje in reglas]
+    
+    def evaluate_observation(self, observacion):
+        """Igual que evaluate_alerts pero sobre un WeatherObservation; retorna una tupla de Alert"""
+        reglas = self._alert_rules(
+            observacion.temperatura, observacion.precipitacion,
+            observacion.viento, observacion.uv
+        )
+        return tuple(Alert(*regla) for regla in reglas)
+    
+    def _ivv_components(self, alertas_count, uv_index, cambio_estable):
+        """Componentes, IVV y nivel de riesgo: (ivv, nivel_riesgo, clima_score, cambio_score, uv_score)"""
         # Clima_Score: 100 - (alertas_climaticas * 25)
-        clima_score = 100 - (len(alertas) * 25)
+        clima_score = 100 - (alertas_count * 25)
         clima_score = max(0, clima_score)
         
         # Cambio_Score: 100 si estable, 50 si volátil
@@ -76,12 +79,104 @@ class DataProcessor:
         else:
             nivel_riesgo = "CRÍTICO"
             
+        return round(ivv, 1), nivel_riesgo, clima_score, cambio_score, uv_score
+    
+    def calculate_ivv(self, alertas, uv_index, cambio_estable=True):
+        """Calcula el Índice de Viabilidad de Viaje (IVV)"""
+        ivv, nivel_riesgo, clima_score, cambio_score, uv_score = self._ivv_components(
+            len(alertas), uv_index, cambio_estable
+        )
         return {
-            'ivv_score': round(ivv, 1),
+            'ivv_score': ivv,
             'nivel_riesgo': nivel_riesgo,
             'componentes_ivv': {
                 'clima_score': clima_score,
                 'cambio_score': cambio_score,
                 'uv_score': uv_score
             }
-        }
\ No newline at end of file
+        }
+    
+    def calculate_ivv_record(self, alertas, uv_index, cambio_estable=True):
+        """Igual que calculate_ivv pero retorna un IVVResult"""
+        return IVVResult(*self._ivv_components(len(alertas), uv_index, cambio_estable))
+    
+    def evaluate_alerts_batch(self, temperatura, precipitacion, viento, uv_index):
+        """
+        Versión vectorizada de evaluate_alerts para muchas ciudades/instantes a la vez.
+        Recibe arreglos (NumPy, listas o columnas de un DataFrame) y retorna una máscara
+        booleana por tipo de alerta junto con el conteo de alertas por fila.
+        """
+        temperatura = np.asarray(temperatura, dtype=float)
+        precipitacion = np.asarray(precipitacion, dtype=float)
+        viento = np.asarray(viento, dtype=float)
+        uv_index = np.asarray(uv_index, dtype=float)
+        
+        # Mismas reglas que evaluate_alerts
+        mascaras = {
+            'temperatura_critica': (temperatura > 35) | (temperatura < 0),
+            'precipitacion_alta': precipitacion > 5,
+            'viento_fuerte': viento > 50,
+            'uv_alto': uv_index > 8
+        }
+        mascaras['alertas_count'] = sum(mascara.astype(np.int64) for mascara in list(mascaras.values()))
+        return mascaras
+    
+    def calculate_ivv_batch(self, alertas_count, uv_index, cambio_estable=True):
+        """
+        Versión vectorizada de calculate_ivv: calcula componentes, IVV y nivel de riesgo
+        de todas las filas en una sola pasada, con los mismos resultados que la versión escalar.
+        """
+        alertas_count = np.asarray(alertas_count, dtype=np.int64)
+        uv_index = np.asarray(uv_index, dtype=float)
+        cambio_estable = np.broadcast_to(np.asarray(cambio_estable, dtype=bool), alertas_count.shape)
+        
+        clima_score = np.maximum(0, 100 - (alertas_count * 25))
+        cambio_score = np.where(cambio_estable, 100, 50)
+        uv_score = np.select([uv_index < 6, uv_index <= 8], [100, 75], default=50)
+        
+        ivv = (clima_score * 0.4) + (cambio_score * 0.3) + (uv_score * 0.3)
+        nivel_riesgo = np.select(
+            [ivv >= 80, ivv >= 60, ivv >= 40],
+            ["BAJO", "MEDIO", "ALTO"],
+            default="CRÍTICO"
+        )
+        
+        return {
+            'ivv_score': np.round(ivv, 1),
+            'nivel_riesgo': nivel_riesgo,
+            'clima_score': clima_score,
+            'cambio_score': cambio_score,
+            'uv_score': uv_score
+        }
+    
+    def score_batch(self, df, cambio_estable_col='Tendencia'):
+        """
+        Evalúa alertas e IVV de un DataFrame con las columnas del CSV resumen
+        (Temperatura, Precipitacion, Viento, UV y Tendencia o una columna booleana de estabilidad).
+        Retorna un DataFrame con máscaras de alerta, componentes, IVV y nivel de riesgo por fila.
+        """
+        if cambio_estable_col in df:
+            columna = df[cambio_estable_col]
+            if pd.api.types.is_bool_dtype(columna):
+                cambio_estable = columna.astype(bool)
+            else:
+                # Sin tendencia (ciudad sin datos de cambio) cuenta como estable, igual que el cálculo escalar
+                cambio_estable = columna.isna() | columna.isin(('estable', ''))
+        else:
+            cambio_estable = True
+        
+        alertas = self.evaluate_alerts_batch(df['Temperatura'], df['Precipitacion'], df['Viento'], df['UV'])
+        ivv = self.calculate_ivv_batch(alertas['alertas_count'], df['UV'], cambio_estable=cambio_estable)
+        
+        return pd.DataFrame({
+            'Alerta_Temperatura': alertas['temperatura_critica'],
+            'Alerta_Precipitacion': alertas['precipitacion_alta'],
+            'Alerta_Viento': alertas['viento_fuerte'],
+            'Alerta_UV': alertas['uv_alto'],
+            'Alertas_Count': alertas['alertas_count'],
+            'Clima_Score': ivv['clima_score'],
+            'Cambio_Score': ivv['cambio_score'],
+            'UV_Score': ivv['uv_score'],
+            'IVV_Score': ivv['ivv_score'],
+            'Nivel_Riesgo': ivv['nivel_riesgo']
+        }, index=df.index)
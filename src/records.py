@@ -0,0 +1,148 @@
+# src/records.py
+# Registros compactos del resultado por ciudad (dataclasses con __slots__).
+# El payload crudo de las APIs se proyecta a los campos que se usan al momento de la ingesta.
+from dataclasses import dataclass
+from logger import get_logger
+
+logger = get_logger()
+
+@dataclass(slots=True, frozen=True)
+class DailyForecast:
+    fecha: str
+    temp_max: float
+    temp_min: float
+    precipitacion: float
+
+    def to_dict(self):
+        return {
+            "fecha": self.fecha,
+            "temp_max": self.temp_max,
+            "temp_min": self.temp_min,
+            "precipitacion": self.precipitacion
+        }
+
+def project_forecast(daily, dias=7):
+    """Proyecta el bloque `daily` de Open-Meteo a una tupla de DailyForecast (máximo `dias`)"""
+    try:
+        if not daily or 'time' not in daily:
+            return ()
+
+        temp_max = daily.get('temperature_2m_max')
+        temp_min = daily.get('temperature_2m_min')
+        precipitacion = daily.get('precipitation_probability_max')
+        return tuple(
+            DailyForecast(
+                daily['time'][i],
+                temp_max[i] if temp_max is not None else 0,
+                temp_min[i] if temp_min is not None else 0,
+                precipitacion[i] if precipitacion is not None else 0
+            )
+            for i in range(min(dias, len(daily['time'])))
+        )
+    except Exception as e:
+        logger.error("Error procesando pronostico: {}", e)
+        return ()
+
+@dataclass(slots=True)
+class WeatherObservation:
+    """Observación climática de una ciudad con solo los campos usados por alertas, IVV y reportes"""
+    ciudad: str
+    timestamp: str
+    temperatura: float
+    viento: float
+    precipitacion: float
+    uv: float
+    pronostico: tuple = ()
+
+    @classmethod
+    def from_api(cls, ciudad, weather_data, timestamp):
+        """Proyecta la respuesta cruda de Open-Meteo al registro"""
+        current = weather_data['current']
+        return cls(
+            ciudad,
+            timestamp,
+            current['temperature_2m'],
+            current['wind_speed_10m'],
+            current['precipitation'],
+            current['uv_index'],
+            project_forecast(weather_data.get('daily'))
+        )
+
+    def values(self):
+        """Valores de entrada de la observación (sin ciudad ni timestamp)"""
+        return (self.temperatura, self.viento, self.precipitacion, self.uv,
+                [(d.fecha, d.temp_max, d.temp_min, d.precipitacion) for d in self.pronostico])
+
+@dataclass(slots=True)
+class ExchangeData:
+    tipo_cambio_actual: float
+    variacion_diaria: float
+    tendencia_5_dias: str
+    es_volatil: bool = False
+    degradado: bool = False  # Tasas del último snapshot conocido (o simuladas) por falta de tiempo
+
+    @property
+    def estable(self):
+        return self.tendencia_5_dias == 'estable'
+
+    def values(self):
+        return (self.tipo_cambio_actual, self.variacion_diaria, self.tendencia_5_dias, self.es_volatil)
+
+@dataclass(slots=True, frozen=True)
+class Alert:
+    tipo: str
+    severidad: str
+    mensaje: str
+
+    def to_dict(self):
+        return {'tipo': self.tipo, 'severidad': self.severidad, 'mensaje': self.mensaje}
+
+@dataclass(slots=True)
+class IVVResult:
+    ivv_score: float
+    nivel_riesgo: str
+    clima_score: int
+    cambio_score: int
+    uv_score: int
+
+    def componentes(self):
+        return {
+            'clima_score': self.clima_score,
+            'cambio_score': self.cambio_score,
+            'uv_score': self.uv_score
+        }
+
+@dataclass(slots=True)
+class CityResult:
+    """Resultado de una ciudad en una ejecución"""
+    ciudad: str
+    observacion: WeatherObservation
+    cambio: ExchangeData
+    alertas: tuple
+    ivv: IVVResult
+    time_data: dict = None
+    degradado: bool = False  # Publicado con datos anteriores porque no alcanzó el presupuesto de tiempo
+
+    def to_dict(self):
+        """Representación serializable (sin time_data) para persistir el resultado"""
+        obs = self.observacion
+        return {
+            'ciudad': self.ciudad,
+            'observacion': [obs.ciudad, obs.timestamp, obs.temperatura, obs.viento, obs.precipitacion, obs.uv,
+                            [[d.fecha, d.temp_max, d.temp_min, d.precipitacion] for d in obs.pronostico]],
+            'cambio': list(self.cambio.values()) if self.cambio else None,
+            'alertas': [[a.tipo, a.severidad, a.mensaje] for a in self.alertas],
+            'ivv': [self.ivv.ivv_score, self.ivv.nivel_riesgo, self.ivv.clima_score,
+                    self.ivv.cambio_score, self.ivv.uv_score]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        *campos, pronostico = data['observacion']
+        return cls(
+            data['ciudad'],
+            WeatherObservation(*campos, tuple(DailyForecast(*dia) for dia in pronostico)),
+            ExchangeData(*data['cambio']) if data['cambio'] else None,
+            tuple(Alert(*alerta) for alerta in data['alertas']),
+            IVVResult(*data['ivv'])
+        )
@@ -1,35 +1,81 @@
 # src/scheduler.py
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.blocking import BlockingScheduler
 from datetime import datetime
-from logger import get_logger
+from logger import get_logger, setup_logging
 from config import Config
-import time
+from pipeline import Pipeline
+from metrics import start_metrics_server, write_run_metrics
+from deadline import Deadline, DeadlineExceeded
 
 logger = get_logger()
 
-def tarea_prueba():
-    """Ejemplo de tarea automática programada."""
-    logger.info(f"Tarea ejecutada automáticamente a las {datetime.now()}")
+def tarea_inicial(pipeline):
+    """Primera ejecución completa: recolecta ambas fuentes juntas y calcula los puntajes una sola vez."""
+    pipeline.run()
+    logger.info("Ejecución inicial completada")
 
-def iniciar_scheduler():
-    """Inicia el planificador en segundo plano."""
-    logger.info("Iniciando scheduler de tareas...")
+def tarea_clima(pipeline):
+    """Actualiza clima y zonas horarias y recalcula los puntajes."""
+    deadline = Deadline.from_config()
+    version = pipeline.refresh_weather(deadline=deadline)
+    logger.info("Clima actualizado (versión {})", version)
+    pipeline.score(deadline=deadline)
+    write_run_metrics(job="clima")
+
+def tarea_cambio(pipeline):
+    """Actualiza el snapshot de tipos de cambio y recalcula los puntajes."""
+    deadline = Deadline.from_config()
+    try:
+        version = pipeline.refresh_exchange(deadline)
+    except DeadlineExceeded:
+        logger.warning("Tipos de cambio sin respuesta dentro del presupuesto: se conserva el snapshot anterior")
+        return
+    logger.info("Tipos de cambio actualizados (versión {})", version)
+    pipeline.score(deadline=deadline)
+    write_run_metrics(job="cambio")
 
-    scheduler = BackgroundScheduler(timezone="America/Bogota")
+def crear_scheduler(pipeline=None):
+    """
+    Crea el planificador con un trabajo por fuente. Cada trabajo tiene una sola instancia a la vez
+    y las ejecuciones atrasadas se agrupan en una sola (coalesce).
+    """
+    pipeline = pipeline or Pipeline()
 
-    # Ejemplo: ejecuta tarea cada 30 segundos
-    scheduler.add_job(tarea_prueba, "interval", seconds=30, id="tarea_prueba")
+    scheduler = BlockingScheduler(
+        timezone="America/Bogota",
+        job_defaults={
+            "max_instances": 1,
+            "coalesce": True,
+            "misfire_grace_time": Config.SCHEDULER_MISFIRE_GRACE_SECONDS,
+        },
+    )
 
-    scheduler.start()
-    logger.info("Scheduler iniciado correctamente.")
+    # Una primera ejecución combinada inmediata (un solo snapshot de cambio y un solo archivo de métricas);
+    # luego cada fuente con su propia cadencia a partir del primer intervalo
+    ahora = datetime.now(scheduler.timezone)
+    scheduler.add_job(tarea_inicial, "date", args=[pipeline], id="inicial", run_date=ahora)
+    scheduler.add_job(tarea_clima, "interval", args=[pipeline], id="clima",
+                      minutes=Config.SCHEDULER_WEATHER_MINUTES)
+    scheduler.add_job(tarea_cambio, "interval", args=[pipeline], id="cambio",
+                      minutes=Config.SCHEDULER_EXCHANGE_MINUTES)
+    return scheduler
+
+def iniciar_scheduler():
+    """Inicia el planificador y bloquea hasta que se detenga."""
+    setup_logging()
+    logger.info("Iniciando scheduler de tareas...")
+    scheduler = crear_scheduler()
+    start_metrics_server()
+    logger.info(
+        "Scheduler iniciado: clima cada {} min, tipos de cambio cada {} min.",
+        Config.SCHEDULER_WEATHER_MINUTES, Config.SCHEDULER_EXCHANGE_MINUTES
+    )
 
     try:
-        # Mantener el scheduler corriendo
-        while True:
-            time.sleep(5)
+        scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         logger.info("Deteniendo scheduler...")
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
 
 if __name__ == "__main__":
-    iniciar_scheduler()
\ No newline at end of file
+    iniciar_scheduler()
@@ -0,0 +1,45 @@
+# src/test_data_collector.py
+import pytest
+from data_collector import DataCollector
+from deadline import Deadline, DeadlineExceeded
+
+class _ExchangeFalso:
+    """Cliente de cambio con respuestas programadas (tasas reales o error)"""
+
+    def __init__(self, respuestas):
+        self.respuestas = list(respuestas)
+
+    def get_exchange_rates(self, timeout=None, fallback=True, deadline=None):
+        respuesta = self.respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta, None
+
+    def record_rates(self, rates, fecha=None):
+        return {moneda: {'tendencia': 'positiva'} for moneda in rates}
+
+    def analyze_trend(self):
+        return {}
+
+    def _get_mock_rates(self):
+        return {'USD': 1.0, 'BRL': 5.45}
+
+def test_respaldo_degradado_usa_el_ultimo_snapshot_real():
+    collector = DataCollector()
+    collector.exchange_client = _ExchangeFalso([{'USD': 1.0, 'BRL': 5.1}, ConnectionError("caída")])
+
+    collector.get_exchange_snapshot()
+    collector.reset_exchange_snapshot()
+    # La API falla: la ejecución usa tasas simuladas, pero no pasan a ser el respaldo
+    assert collector.get_exchange_snapshot()['rates']['BRL'] == 5.45
+
+    collector.reset_exchange_snapshot()
+    vencido = Deadline(0.001)
+    while not vencido.expired():
+        pass
+    with pytest.raises(DeadlineExceeded):
+        collector.get_exchange_snapshot(vencido)
+    datos = collector.collect_exchange_data('BRL', vencido)
+    assert datos.degradado
+    assert datos.tipo_cambio_actual == 5.1
+    assert datos.tendencia_5_dias == 'positiva'
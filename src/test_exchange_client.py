@@ -0,0 +1,28 @@
+# src/test_exchange_client.py
+from datetime import date
+import pytest
+import requests_mock
+from config import Config
+from api_clients import resilience
+from api_clients.exchange_client import ExchangeClient
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0)
+    resilience.reset()
+    with requests_mock.Mocker() as mock:
+        yield mock
+    resilience.reset()
+
+def test_retorna_la_fecha_de_las_tasas(api):
+    api.get(Config.EXCHANGE_API_URL, json={"base": "USD", "date": "2026-10-17", "rates": {"USD": 1, "BRL": 5.1}})
+    assert ExchangeClient().get_exchange_rates() == ({"USD": 1, "BRL": 5.1}, date(2026, 10, 17))
+
+def test_sin_fecha_o_simuladas(api):
+    api.get(Config.EXCHANGE_API_URL, json={"rates": {"USD": 1}})
+    assert ExchangeClient().get_exchange_rates() == ({"USD": 1}, None)
+
+    api.get(Config.EXCHANGE_API_URL, status_code=404)
+    rates, fecha = ExchangeClient().get_exchange_rates()
+    assert rates == ExchangeClient()._get_mock_rates() and fecha is None
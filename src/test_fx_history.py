@@ -0,0 +1,112 @@
+# src/test_fx_history.py
+import random
+import statistics
+from datetime import date, timedelta
+import pytest
+from fx_history import DIAS_TENDENCIA, UMBRAL_VOLATIL, VENTANA_TENDENCIA, FxHistory
+
+VENTANAS = (5, 30, 90)
+
+def _referencia(serie, hoy):
+    """Estadísticas recalculadas desde cero con la última tasa de cada día"""
+    fechas = sorted(serie)
+    variaciones = {
+        fechas[i]: (serie[fechas[i]] - serie[fechas[i - 1]]) / serie[fechas[i - 1]] * 100
+        for i in range(1, len(fechas))
+    }
+    ventanas = {}
+    for dias in VENTANAS:
+        dentro = [v for f, v in variaciones.items() if f > hoy - timedelta(days=dias)]
+        ventanas[dias] = dentro
+
+    # Tendencia: las últimas variaciones del mismo signo en días seguidos (sin huecos entre observaciones)
+    ultimas = fechas[-(DIAS_TENDENCIA + 1):]
+    seguidas = len(ultimas) == DIAS_TENDENCIA + 1 and all(
+        ultimas[i] - ultimas[i - 1] == timedelta(days=1) for i in range(1, len(ultimas))
+    )
+    tendencia = "estable"
+    if seguidas and all(variaciones[f] > 0 for f in ultimas[1:]):
+        tendencia = "positiva"
+    elif seguidas and all(variaciones[f] < 0 for f in ultimas[1:]):
+        tendencia = "negativa"
+    ultima = variaciones[fechas[-1]] if len(fechas) > 1 else 0
+    return ventanas, tendencia, ultima
+
+@pytest.mark.parametrize("semilla", [3, 17])
+def test_estadisticas_incrementales_iguales_a_recalcular(tmp_path, semilla):
+    historico = FxHistory(str(tmp_path / "fx.db"), windows=VENTANAS)
+    rnd = random.Random(semilla)
+    series = {"USD": {}, "EUR": {}}
+    tasas = {"USD": 4000.0, "EUR": 4300.0}
+    hoy = date(2026, 1, 1)
+
+    for paso in range(300):
+        if paso:
+            # Mismo día (reemplazo), días seguidos, huecos y algún salto mayor que todas las ventanas
+            hoy += timedelta(days=rnd.choice([0, 0, 1, 1, 1, 2, 7]))
+            if rnd.random() < 0.02:
+                hoy += timedelta(days=120)
+
+        if series["USD"] and rnd.random() < 0.1:
+            # La misma observación otra vez (tasas servidas desde la cache): no cambia nada
+            ultimo = max(series["USD"])
+            trends = historico.record_snapshot({m: series[m][ultimo] for m in series}, fecha=ultimo)
+        elif series["USD"] and rnd.random() < 0.1:
+            # Observación atrasada: se ignora y las estadísticas no cambian
+            atrasada = max(series["USD"]) - timedelta(days=rnd.randint(1, 10))
+            trends = historico.record_snapshot({"USD": 1.0, "EUR": 1.0}, fecha=atrasada)
+        else:
+            for moneda in tasas:
+                tasas[moneda] *= 1 + rnd.uniform(-0.04, 0.04)
+                series[moneda][hoy] = tasas[moneda]
+            trends = historico.record_snapshot(dict(tasas), fecha=hoy)
+
+        ultimo_dia = max(series["USD"])
+        for moneda, serie in series.items():
+            ventanas, tendencia, variacion = _referencia(serie, ultimo_dia)
+            obtenido = trends[moneda]
+            assert obtenido["tendencia"] == tendencia, (paso, moneda)
+            assert obtenido["variacion_diaria"] == round(variacion, 2), (paso, moneda)
+            assert obtenido["volatil"] == (abs(variacion) > UMBRAL_VOLATIL), (paso, moneda)
+            for dias, dentro in ventanas.items():
+                ventana = obtenido["ventanas"].get(dias, {"dias_con_variacion": 0, "variacion_acumulada": 0})
+                assert ventana["dias_con_variacion"] == len(dentro), (paso, moneda, dias)
+                assert ventana["variacion_acumulada"] == pytest.approx(sum(dentro), abs=1e-3), (paso, moneda, dias)
+                if dentro:
+                    assert ventana["variacion_media"] == pytest.approx(statistics.fmean(dentro), abs=1e-3)
+                    assert ventana["volatilidad"] == pytest.approx(statistics.pstdev(dentro), abs=1e-3)
+
+def test_history_conserva_la_ultima_tasa_del_dia(tmp_path):
+    historico = FxHistory(str(tmp_path / "fx.db"), windows=(5,))
+    dia = date(2026, 3, 10)
+    historico.record_snapshot({"USD": 4000.0}, fecha=dia)
+    historico.record_snapshot({"USD": 4100.0}, fecha=dia)
+    historico.record_snapshot({"USD": 3900.0}, fecha=dia - timedelta(days=1))
+    assert historico.history(days=5, hasta=dia) == {dia.isoformat(): {"USD": 4100.0}}
+
+def _racha(historico, moneda):
+    with historico._connect() as conn:
+        return conn.execute("SELECT racha FROM fx_estado WHERE moneda = ?", (moneda,)).fetchone()[0]
+
+def test_racha_de_dias_seguidos_acotada_a_la_ventana(tmp_path):
+    historico = FxHistory(str(tmp_path / "fx.db"), windows=(5,))
+    dia = date(2026, 3, 1)
+    for i in range(10):
+        historico.record_snapshot({"USD": 4000.0 + i}, fecha=dia + timedelta(days=i))
+    assert _racha(historico, "USD") == VENTANA_TENDENCIA
+
+    # Tras un día sin datos la variación no es diaria: la racha vuelve a cero
+    trends = historico.record_snapshot({"USD": 4100.0}, fecha=dia + timedelta(days=11))
+    assert _racha(historico, "USD") == 0
+    assert trends["USD"]["tendencia"] == "estable"
+
+def test_tasas_repetidas_de_la_cache_no_cambian_la_tendencia(tmp_path):
+    historico = FxHistory(str(tmp_path / "fx.db"), windows=(5,))
+    dia = date(2026, 3, 1)
+    for i in range(4):
+        trends = historico.record_snapshot({"USD": 4000.0 - 10 * i}, fecha=dia + timedelta(days=i))
+    assert trends["USD"]["tendencia"] == "negativa"
+
+    # Al día siguiente la cache sirve las mismas tasas con la fecha de la API
+    repetido = historico.record_snapshot({"USD": 3970.0}, fecha=dia + timedelta(days=3))
+    assert repetido == trends
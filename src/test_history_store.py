@@ -0,0 +1,72 @@
+# src/test_history_store.py
+import csv
+import threading
+from history_store import HistoryStore
+from output_generator import CSV_HEADER
+
+def _escribir_csv(directorio, nombre, ciudades):
+    ruta = directorio / f"resumen_ciudades_{nombre}.csv"
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for ciudad in ciudades:
+            writer.writerow([ciudad, f"2026-01-01T{nombre[-2:]}:00:00Z", 20, 10, 0, 5, 4000, 0.1,
+                             "estable", 30, "BAJO", 0])
+    return ruta
+
+def _total(store):
+    return len(store.query())
+
+def test_segunda_carga_importa_solo_archivos_nuevos(tmp_path):
+    salidas = tmp_path / "outputs"
+    salidas.mkdir()
+    store = HistoryStore(str(tmp_path / "db.sqlite"))
+    _escribir_csv(salidas, "20260101_000001", ["Bogota", "Lima"])
+    _escribir_csv(salidas, "20260101_000002", ["Quito"])
+
+    assert store.import_csv_files(str(salidas)) == 3
+    assert store.import_csv_files(str(salidas)) == 0
+
+    _escribir_csv(salidas, "20260101_000003", ["Cali", "Cusco"])
+    assert store.import_csv_files(str(salidas)) == 2
+    assert _total(store) == 5
+    assert sorted(store.query(ciudades=["Cali", "Cusco"])["Ciudad"]) == ["Cali", "Cusco"]
+
+def test_append_run_marca_el_csv_de_la_ejecucion(tmp_path):
+    salidas = tmp_path / "outputs"
+    salidas.mkdir()
+    store = HistoryStore(str(tmp_path / "db.sqlite"))
+    ruta = salidas / "resumen_ciudades_20260101_000001.csv"
+    store.append_run([], source_file=str(ruta))
+
+    # El CSV se publica después de marcarlo: la importación no lo vuelve a cargar
+    _escribir_csv(salidas, "20260101_000001", ["Bogota"])
+    assert store.import_csv_files(str(salidas)) == 0
+    assert _total(store) == 0
+
+def test_importaciones_concurrentes_no_duplican(tmp_path):
+    salidas = tmp_path / "outputs"
+    salidas.mkdir()
+    db_path = str(tmp_path / "db.sqlite")
+    HistoryStore(db_path)
+    for i in range(5):
+        _escribir_csv(salidas, f"20260101_0000{i:02d}", ["Bogota", "Lima", "Quito"])
+
+    hilos = 6
+    barrera = threading.Barrier(hilos)
+    totales = []
+
+    def importar():
+        # Cada hilo con su propio almacén (conexiones separadas), como el dashboard y el job de ML
+        store = HistoryStore(db_path)
+        barrera.wait()
+        totales.append(store.import_csv_files(str(salidas)))
+
+    trabajos = [threading.Thread(target=importar) for _ in range(hilos)]
+    for trabajo in trabajos:
+        trabajo.start()
+    for trabajo in trabajos:
+        trabajo.join()
+
+    assert sum(totales) == 15
+    assert _total(HistoryStore(db_path)) == 15
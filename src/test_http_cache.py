@@ -0,0 +1,98 @@
+# src/test_http_cache.py
+import pytest
+import requests_mock
+from config import Config
+from api_clients import http_cache, resilience
+from api_clients.http_cache import ResponseCache
+from api_clients.http_client import fetch_json
+
+URL = "https://api.example/clima"
+
+class _Respuesta:
+    """Respuesta mínima: el cache solo lee sus cabeceras"""
+
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+@pytest.fixture
+def ahora(monkeypatch):
+    """Reloj de pared controlado por la prueba (segundos)"""
+    reloj = [1_000_000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: reloj[0])
+    return reloj
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path), max_bytes=10**6, ttls={"weather": 60})
+
+def test_entrada_vence_con_el_ttl_de_la_fuente(cache, ahora):
+    cache.store(URL, "weather", _Respuesta(), {"t": 20})
+    assert cache.is_fresh(cache.lookup(URL))
+
+    ahora[0] += 61
+    entrada = cache.lookup(URL)
+    assert not cache.is_fresh(entrada)
+    assert entrada["body"] == {"t": 20}  # Vencida pero disponible para revalidar
+
+def test_max_age_del_servidor_reemplaza_el_ttl(cache, ahora):
+    cache.store(URL, "weather", _Respuesta({"Cache-Control": "public, max-age=300", "Age": "100"}), {})
+    ahora[0] += 199
+    assert cache.is_fresh(cache.lookup(URL))
+    ahora[0] += 2
+    assert not cache.is_fresh(cache.lookup(URL))
+
+def test_no_store_no_guarda_la_respuesta(cache):
+    cache.store(URL, "weather", _Respuesta({"Cache-Control": "no-store"}), {})
+    assert cache.lookup(URL) is None
+
+def test_expulsa_las_entradas_menos_usadas(tmp_path, ahora):
+    cache = ResponseCache(str(tmp_path), ttls={"weather": 60})
+    for i in range(3):
+        cache.store(f"{URL}/{i}", "weather", _Respuesta(), {"dato": "x" * 100})
+        ahora[0] += 1
+    tamano = cache.stats()["bytes"] // 3
+
+    # La primera se usa de nuevo: la menos usada pasa a ser la segunda
+    cache.record_hit(f"{URL}/0")
+    ahora[0] += 1
+    cache.max_bytes = tamano * 3
+    cache.store(f"{URL}/3", "weather", _Respuesta(), {"dato": "x" * 100})
+
+    assert cache.lookup(f"{URL}/1") is None
+    assert all(cache.lookup(f"{URL}/{i}") for i in (0, 2, 3))
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 3
+    assert stats["bytes"] <= cache.max_bytes
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0)
+    monkeypatch.setattr(http_cache, "_cache", ResponseCache(str(tmp_path), ttls={"weather": 60}))
+    resilience.reset()
+    with requests_mock.Mocker() as mock:
+        yield mock
+    resilience.reset()
+
+def test_revalida_con_304_usando_etag_y_last_modified(api):
+    validadores = {"ETag": '"v1"', "Last-Modified": "Thu, 01 Jan 2026 00:00:00 GMT"}
+    api.get(URL, [
+        {"json": {"t": 20}, "headers": {**validadores, "Cache-Control": "no-cache"}},
+        {"status_code": 304, "headers": {"Cache-Control": "max-age=30"}},
+    ])
+
+    assert fetch_json(URL, source="weather") == {"t": 20}
+    # no-cache: la entrada queda guardada pero vencida, la siguiente consulta revalida
+    assert fetch_json(URL, source="weather") == {"t": 20}
+
+    condicional = api.request_history[1].headers
+    assert condicional["If-None-Match"] == '"v1"'
+    assert condicional["If-Modified-Since"] == validadores["Last-Modified"]
+
+    # El 304 renovó la entrada con el max-age del servidor: no vuelve a la red
+    assert fetch_json(URL, source="weather") == {"t": 20}
+    assert api.call_count == 2
+    stats = http_cache._cache.stats()
+    assert (stats["revalidated"], stats["hits"]) == (1, 1)
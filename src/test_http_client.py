@@ -0,0 +1,56 @@
+# src/test_http_client.py
+import pytest
+import requests
+import requests_mock
+from config import Config
+from deadline import Deadline
+from api_clients import resilience
+from api_clients.http_client import fetch_json
+from api_clients.resilience import CircuitBreaker
+
+URL = "https://api.example/clima"
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0)
+    monkeypatch.setattr(Config, "BREAKER_FAILURE_THRESHOLD", 2)
+    resilience.reset()
+    with requests_mock.Mocker() as mock:
+        yield mock
+    resilience.reset()
+
+def _estado():
+    return resilience.breaker_states()["api.example"]
+
+def test_timeout_acortado_por_el_presupuesto_no_abre_el_circuito(api):
+    api.get(URL, exc=requests.ReadTimeout)
+    for _ in range(5):
+        with pytest.raises(requests.Timeout):
+            fetch_json(URL, deadline=Deadline(Config.HTTP_TIMEOUT / 2))
+    assert _estado() == CircuitBreaker.CERRADO
+
+def test_timeout_normal_abre_el_circuito(api):
+    api.get(URL, exc=requests.ReadTimeout)
+    for _ in range(2):
+        with pytest.raises(requests.Timeout):
+            fetch_json(URL, deadline=Deadline(Config.HTTP_TIMEOUT * 10))
+    assert _estado() == CircuitBreaker.ABIERTO
+
+def test_errores_del_host_cuentan_con_presupuesto(api):
+    api.get(URL, exc=requests.ConnectionError)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            fetch_json(URL, deadline=Deadline(Config.HTTP_TIMEOUT / 2))
+    assert _estado() == CircuitBreaker.ABIERTO
+
+def test_espera_de_token_limitada_por_el_presupuesto(api, monkeypatch):
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0.1)
+    monkeypatch.setattr(Config, "RATE_LIMIT_BURST", 1)
+    monkeypatch.setattr(Config, "RATE_LIMIT_MAX_WAIT", 60)
+    api.get(URL, json={"ok": True})
+    assert fetch_json(URL) == {"ok": True}
+    # Sin token libre: con 0.2 s de presupuesto no espera los 10 s del siguiente token
+    with pytest.raises(resilience.RateLimitExceeded):
+        fetch_json(URL, deadline=Deadline(0.2))
@@ -0,0 +1,38 @@
+# src/test_metrics.py
+import json
+import os
+import metrics
+from config import Config
+
+def _serie(datos, nombre):
+    return datos["metricas"][nombre]["series"]
+
+def test_cada_archivo_tiene_solo_su_ejecucion(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_ultimo_corte", {})
+    metrics.record_api_call("clima", "200", "miss", 0.1)
+    metrics.write_run_metrics(metrics_dir=str(tmp_path), job="clima", run_id="1")
+
+    metrics.record_api_call("cambio", "200", "miss", 0.3)
+    metrics.record_api_call("cambio", "200", "miss", 0.3)
+    ruta = metrics.write_run_metrics(metrics_dir=str(tmp_path), job="cambio", run_id="1")
+
+    assert os.path.basename(ruta) == "metricas_cambio_1.json"
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    assert datos["job"] == "cambio"
+    llamadas = _serie(datos, "api_requests_total")
+    assert [s["labels"]["source"] for s in llamadas] == ["cambio"]
+    assert llamadas[0]["valor"] == 2
+    duraciones = _serie(datos, "api_request_duration_seconds")
+    assert len(duraciones) == 1 and duraciones[0]["count"] == 2
+    assert duraciones[0]["sum_s"] == 0.6
+    # /metrics sigue acumulando todo el proceso
+    assert 'source="clima"' in metrics.render_prometheus()
+
+def test_conserva_los_mas_recientes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "METRICS_RETENTION", 3)
+    for i in range(5):
+        ruta = metrics.write_run_metrics(metrics_dir=str(tmp_path), job="clima", run_id=str(i))
+        os.utime(ruta, (i, i))
+    metrics.write_run_metrics(metrics_dir=str(tmp_path), job="clima", run_id="5")
+    assert sorted(os.listdir(tmp_path)) == ["metricas_clima_3.json", "metricas_clima_4.json", "metricas_clima_5.json"]
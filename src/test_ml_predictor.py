@@ -0,0 +1,59 @@
+# src/test_ml_predictor.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from ml_predictor import fit_grouped_trends
+
+def _historico():
+    """Ciudades con cantidades distintas de puntos (incluye una con una sola fila), intercaladas"""
+    rnd = np.random.default_rng(11)
+    tamanos = {"Bogota": 12, "Lima": 5, "Quito": 2, "Cusco": 1, "Cali": 30, "Plana": 6}
+    valores = {
+        ciudad: [70.0 if ciudad == "Plana" else 50 + 1.5 * i + rnd.normal(0, 4) for i in range(tamano)]
+        for ciudad, tamano in tamanos.items()
+    }
+    # Orden mezclado entre ciudades pero cronológico dentro de cada una
+    etiquetas = [ciudad for ciudad, tamano in tamanos.items() for _ in range(tamano)]
+    rnd.shuffle(etiquetas)
+    posiciones = {ciudad: 0 for ciudad in tamanos}
+    filas = []
+    for ciudad in etiquetas:
+        filas.append({"Ciudad": ciudad, "IVV_Score": valores[ciudad][posiciones[ciudad]]})
+        posiciones[ciudad] += 1
+    return pd.DataFrame(filas)
+
+def _referencia(df, window=None, halflife=None):
+    """Un LinearRegression por ciudad con las mismas reglas de ventana y pesos"""
+    esperado = {}
+    for ciudad, grupo in df.groupby("Ciudad", sort=False):
+        y = grupo["IVV_Score"].to_numpy(dtype=float)
+        n = len(y)
+        x = np.arange(n, dtype=float)
+        if window:
+            x, y = x[-window:], y[-window:]
+        if len(x) < 2:
+            continue
+        pesos = 0.5 ** ((n - 1 - x) / halflife) if halflife else None
+        modelo = LinearRegression().fit(x.reshape(-1, 1), y, sample_weight=pesos)
+        esperado[ciudad] = (modelo.coef_[0], modelo.predict([[n]])[0], n)
+    return esperado
+
+@pytest.mark.parametrize("window,halflife", [(None, None), (4, None), (None, 3.0), (3, 2.0), (1, None)])
+def test_igual_a_linear_regression_por_ciudad(window, halflife):
+    df = _historico()
+    resultado = fit_grouped_trends(df, window=window, halflife=halflife).set_index("Ciudad")
+    esperado = _referencia(df, window=window, halflife=halflife)
+
+    assert set(resultado.index) == set(esperado)
+    for ciudad, (pendiente, prediccion, n) in esperado.items():
+        fila = resultado.loc[ciudad]
+        assert fila["n"] == n
+        assert fila["pendiente"] == pytest.approx(pendiente, abs=1e-9)
+        assert fila["IVV_Predicho"] == pytest.approx(prediccion, abs=1e-9)
+
+def test_omite_ciudades_con_un_punto():
+    df = _historico()
+    resultado = fit_grouped_trends(df)
+    assert "Cusco" not in set(resultado["Ciudad"])
+    assert resultado.set_index("Ciudad").loc["Plana", "pendiente"] == 0
@@ -0,0 +1,52 @@
+# src/test_output_generator.py
+import csv
+import json
+import output_generator
+from output_generator import CSV_HEADER, ReportWriter, read_report, report_record, summary_row
+from records import CityResult, ExchangeData, IVVResult, WeatherObservation
+
+def _resultado(cambio):
+    observacion = WeatherObservation("Tokio", "2026-01-01T00:00:00Z", 20.0, 10.0, 0.0, 3.0)
+    return CityResult("Tokio", observacion, cambio, (), IVVResult(100.0, "BAJO", 100, 100, 100))
+
+def test_sin_datos_de_cambio():
+    resultado = _resultado(None)
+
+    fila = summary_row(resultado)
+    assert len(fila) == len(CSV_HEADER)
+    assert fila[6:9] == [None, None, None]
+    assert report_record(resultado)["finanzas"] == {
+        "tipo_cambio_actual": None, "variacion_diaria": None, "tendencia_5_dias": None
+    }
+
+def test_reporte_con_y_sin_cambio(tmp_path):
+    with ReportWriter(str(tmp_path), "prueba") as reporte:
+        reporte.write(_resultado(ExchangeData(149.5, 0.4, "positiva")))
+        reporte.write(_resultado(None))
+        json_file, csv_file = reporte.commit()
+
+    registros = json.load(open(json_file, encoding="utf-8"))
+    assert [r["finanzas"]["tipo_cambio_actual"] for r in registros] == [149.5, None]
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    assert [fila["Tipo_Cambio"] for fila in filas] == ["149.5", ""]
+
+def test_reportes_con_el_mismo_timestamp_no_se_pisan(tmp_path, monkeypatch):
+    timestamps = iter(["20260101_000000_000001", "20260101_000000_000001", "20260101_000000_000002"])
+    monkeypatch.setattr(output_generator, "run_timestamp", lambda: next(timestamps))
+
+    with ReportWriter(str(tmp_path)) as primero, ReportWriter(str(tmp_path)) as segundo:
+        primero.write(_resultado(None))
+        segundo.write(_resultado(ExchangeData(149.5, 0.4, "positiva")))
+        archivos = {primero.commit(), segundo.commit()}
+
+    assert len(archivos) == 2
+    assert sorted(len(list(read_report(json_file))) for json_file, _ in archivos) == [1, 1]
+
+def test_leer_reporte_registro_por_registro(tmp_path):
+    with ReportWriter(str(tmp_path), "prueba") as reporte:
+        for _ in range(3):
+            reporte.write(_resultado(None))
+        json_file, _ = reporte.commit()
+
+    assert list(read_report(json_file)) == json.load(open(json_file, encoding="utf-8"))
@@ -0,0 +1,146 @@
+# src/test_pipeline.py
+from change_tracker import ChangeTracker
+from config import Config
+from data_collector import DataCollector
+from history_store import HistoryStore
+from output_generator import read_report
+from pipeline import Pipeline
+from records import ExchangeData, WeatherObservation
+
+CIUDADES = [
+    {'nombre': f"Ciudad {i}", 'moneda': 'USD', 'timezone': 'UTC', 'lat': 0.0, 'lon': float(i)}
+    for i in range(5)
+]
+
+class _CollectorFalso:
+    """Recolector con tasas fijas; no consulta ninguna API"""
+
+    def __init__(self):
+        self.cambio = ExchangeData(1.0, 0.0, 'estable')
+
+    def current_exchange_snapshot(self):
+        return {}
+
+    def collect_exchange_data(self, moneda, deadline=None, snapshot=None):
+        return self.cambio
+
+def _observacion(ciudad, temperatura=20.0):
+    return WeatherObservation(ciudad['nombre'], "2026-01-01T00:00:00Z", temperatura, 10.0, 0.0, 3.0)
+
+def _pipeline(tmp_path, monkeypatch, datos_clima=None):
+    monkeypatch.chdir(tmp_path)
+    pipeline = Pipeline(CIUDADES, max_workers=1)
+    pipeline.collector = _CollectorFalso()
+    pipeline.output_gen.output_dir = str(tmp_path)
+    pipeline.store = HistoryStore(str(tmp_path / "historico.db"))
+    pipeline.tracker = ChangeTracker(str(tmp_path / "huellas.json"))
+    pipeline.datos_clima = datos_clima or [_observacion(ciudad) for ciudad in CIUDADES]
+    pipeline.version_clima = 1
+    return pipeline
+
+def _registros(store):
+    return len(store.query())
+
+def test_puntaje_vuelca_por_bloques_y_retorna_conteos(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SCORE_CHUNK_SIZE", 2)
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    volcados = []
+    append_run = pipeline.store.append_run
+
+    def registrar(filas, **kwargs):
+        volcados.append(len(filas))
+        return append_run(filas, **kwargs)
+
+    monkeypatch.setattr(pipeline.store, "append_run", registrar)
+
+    resumen = pipeline.score()
+
+    assert (resumen.recalculadas, resumen.sin_cambios, resumen.procesadas) == (5, 0, 5)
+    assert volcados == [2, 2, 1]
+    assert _registros(pipeline.store) == 5
+    json_file, csv_file = pipeline.archivos
+    assert [r["ciudad"] for r in read_report(json_file)] == [c['nombre'] for c in CIUDADES]
+    # El CSV publicado ya figura como importado
+    assert pipeline.store.import_csv_files(str(tmp_path)) == 0
+
+def _reportes(tmp_path):
+    return sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("reporte_ciudades_"))
+
+def test_sin_cambios_omite_y_descarta_el_reporte(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    pipeline.score()
+    publicados = _reportes(tmp_path)
+
+    pipeline.version_clima += 1  # Mismos datos con una versión nueva
+    resumen = pipeline.score()
+
+    assert (resumen.recalculadas, resumen.sin_cambios) == (0, 5)
+    assert pipeline.archivos == (None, None)
+    assert _reportes(tmp_path) == publicados  # Sin reporte nuevo ni .part sobrante
+    assert _registros(pipeline.store) == 5
+
+def test_forzado_recalcula_y_escribe_todo(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    pipeline.score()
+
+    resumen = pipeline.score(force=True)
+
+    assert (resumen.recalculadas, resumen.sin_cambios) == (5, 0)
+    assert len(_reportes(tmp_path)) == 2
+    assert _registros(pipeline.store) == 10
+
+def test_degradadas_se_publican_sin_pasar_al_tracker(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    pipeline.degradados = frozenset({1})
+    resumen = pipeline.score()
+
+    assert (resumen.recalculadas, resumen.degradadas) == (4, 1)
+    assert pipeline.tracker.last("Ciudad 1") is None
+    assert _registros(pipeline.store) == 4
+    degradados = {r["ciudad"]: r["degradado"] for r in read_report(pipeline.archivos[0])}
+    assert degradados["Ciudad 1"] and not degradados["Ciudad 0"]
+
+    # Sin datos a tiempo se publica el último resultado conocido, también fuera del tracker
+    pipeline.datos_clima = [None if i == 0 else d for i, d in enumerate(pipeline.datos_clima)]
+    pipeline.degradados = frozenset({0})
+    pipeline.version_clima += 1
+    resumen = pipeline.score()
+
+    assert (resumen.recalculadas, resumen.sin_cambios, resumen.degradadas) == (1, 3, 1)
+    registros = {r["ciudad"]: r for r in read_report(pipeline.archivos[0])}
+    assert registros["Ciudad 0"]["degradado"]
+    assert pipeline.tracker.last("Ciudad 0").degradado is False
+    assert _registros(pipeline.store) == 5
+
+class _ExchangeFalso:
+    """Cliente de cambio que devuelve las tasas programadas en orden"""
+
+    def __init__(self, *tasas):
+        self.tasas = list(tasas)
+
+    def get_exchange_rates(self, timeout=None, fallback=True, deadline=None):
+        return {'USD': self.tasas.pop(0)}, None
+
+    def record_rates(self, rates, fecha=None):
+        return {}
+
+def test_snapshot_nuevo_no_cambia_el_calculo_en_curso(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    pipeline.collector = DataCollector()
+    pipeline.collector.exchange_client = _ExchangeFalso(4000.0, 4100.0)
+    pipeline.refresh_exchange()
+
+    # El trabajo de cambio termina mientras se procesa la primera ciudad
+    evaluar = pipeline.processor.evaluate_observation
+    def evaluar_y_refrescar(datos):
+        if pipeline.version_cambio == 1:
+            pipeline.refresh_exchange()
+        return evaluar(datos)
+    monkeypatch.setattr(pipeline.processor, "evaluate_observation", evaluar_y_refrescar)
+
+    pipeline.score()
+    assert {r["finanzas"]["tipo_cambio_actual"] for r in read_report(pipeline.archivos[0])} == {4000.0}
+
+    resumen = pipeline.score()
+    assert resumen.recalculadas == 5
+    assert {r["finanzas"]["tipo_cambio_actual"] for r in read_report(pipeline.archivos[0])} == {4100.0}
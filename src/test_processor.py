@@ -0,0 +1,89 @@
+# src/test_processor.py
+import itertools
+import numpy as np
+import pandas as pd
+from processor import DataProcessor
+
+# Valores en los umbrales de cada regla (35/0 temperatura, 5 precipitación, 50 viento, 6/8 UV) y NaN
+TEMPERATURAS = [-0.1, 0, 0.1, 34.9, 35, 35.1, np.nan]
+PRECIPITACIONES = [4.9, 5, 5.1, np.nan]
+VIENTOS = [49.9, 50, 50.1, np.nan]
+UVS = [5.9, 6, 6.1, 7.9, 8, 8.1, np.nan]
+
+def _casos():
+    return list(itertools.product(TEMPERATURAS, PRECIPITACIONES, VIENTOS, UVS, [True, False]))
+
+def test_batch_igual_a_escalar_en_umbrales_y_nan():
+    processor = DataProcessor()
+    casos = _casos()
+    temperatura, precipitacion, viento, uv, estable = (list(columna) for columna in zip(*casos))
+
+    alertas = processor.evaluate_alerts_batch(temperatura, precipitacion, viento, uv)
+    ivv = processor.calculate_ivv_batch(alertas['alertas_count'], uv, cambio_estable=estable)
+
+    for i, (t, p, v, u, e) in enumerate(casos):
+        clima = {'current': {'temperature_2m': t, 'precipitation': p, 'wind_speed_10m': v, 'uv_index': u}}
+        esperadas = processor.evaluate_alerts("X", clima)
+        escalar = processor.calculate_ivv(esperadas, u, cambio_estable=e)
+
+        assert alertas['alertas_count'][i] == len(esperadas), casos[i]
+        assert ivv['ivv_score'][i] == escalar['ivv_score'], casos[i]
+        assert ivv['nivel_riesgo'][i] == escalar['nivel_riesgo'], casos[i]
+        for componente, valor in escalar['componentes_ivv'].items():
+            assert ivv[componente][i] == valor, (casos[i], componente)
+
+def test_score_batch_igual_a_escalar():
+    processor = DataProcessor()
+    casos = _casos()
+    df = pd.DataFrame(casos, columns=['Temperatura', 'Precipitacion', 'Viento', 'UV', 'Estable'])
+    df['Tendencia'] = np.where(df['Estable'], 'estable', 'positiva')
+
+    resultado = processor.score_batch(df)
+
+    for i, (t, p, v, u, e) in enumerate(casos):
+        clima = {'current': {'temperature_2m': t, 'precipitation': p, 'wind_speed_10m': v, 'uv_index': u}}
+        escalar = processor.calculate_ivv(processor.evaluate_alerts("X", clima), u, cambio_estable=e)
+        fila = resultado.iloc[i]
+        assert fila['IVV_Score'] == escalar['ivv_score'], casos[i]
+        assert fila['Nivel_Riesgo'] == escalar['nivel_riesgo'], casos[i]
+        assert fila['Alerta_Temperatura'] == (t > 35 or t < 0)
+
+def test_score_batch_sin_tendencia_igual_a_escalar_sin_cambio():
+    processor = DataProcessor()
+    df = pd.DataFrame({
+        'Temperatura': [20.0, 36.0, 20.0, 20.0],
+        'Precipitacion': [0.0, 6.0, 0.0, 0.0],
+        'Viento': [10.0, 10.0, 55.0, 10.0],
+        'UV': [3.0, 9.0, 7.0, 3.0],
+        'Tendencia': [np.nan, None, '', 'positiva'],
+    })
+    resultado = processor.score_batch(df)
+
+    for i, fila in df.iterrows():
+        clima = {'current': {'temperature_2m': fila['Temperatura'], 'precipitation': fila['Precipitacion'],
+                             'wind_speed_10m': fila['Viento'], 'uv_index': fila['UV']}}
+        # Ruta escalar sin datos de cambio: cambio_estable = True
+        estable = fila['Tendencia'] != 'positiva'
+        escalar = processor.calculate_ivv(processor.evaluate_alerts("X", clima), fila['UV'], cambio_estable=estable)
+        assert resultado.loc[i, 'Cambio_Score'] == escalar['componentes_ivv']['cambio_score'], i
+        assert resultado.loc[i, 'IVV_Score'] == escalar['ivv_score'], i
+
+def test_batch_igual_a_escalar_aleatorio():
+    processor = DataProcessor()
+    rnd = np.random.default_rng(7)
+    n = 5000
+    temperatura = np.round(rnd.uniform(-10, 45, n), 1)
+    precipitacion = np.round(rnd.uniform(0, 10, n), 1)
+    viento = np.round(rnd.uniform(0, 80, n), 1)
+    uv = np.round(rnd.uniform(0, 12, n), 1)
+    estable = rnd.random(n) < 0.5
+
+    alertas = processor.evaluate_alerts_batch(temperatura, precipitacion, viento, uv)
+    ivv = processor.calculate_ivv_batch(alertas['alertas_count'], uv, cambio_estable=estable)
+
+    for i in range(n):
+        clima = {'current': {'temperature_2m': temperatura[i], 'precipitation': precipitacion[i],
+                             'wind_speed_10m': viento[i], 'uv_index': uv[i]}}
+        escalar = processor.calculate_ivv(processor.evaluate_alerts("X", clima), uv[i], cambio_estable=bool(estable[i]))
+        assert ivv['ivv_score'][i] == escalar['ivv_score']
+        assert ivv['nivel_riesgo'][i] == escalar['nivel_riesgo']
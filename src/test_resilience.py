@@ -0,0 +1,98 @@
+# src/test_resilience.py
+import pytest
+from api_clients import resilience
+from api_clients.resilience import CircuitBreaker, CircuitOpenError, TokenBucket
+
+@pytest.fixture
+def reloj(reloj, monkeypatch):
+    # El reloj compartido de conftest; aquí sleep() también lo avanza
+    monkeypatch.setattr(resilience.time, "sleep", reloj.sleep)
+    return reloj
+
+def test_bucket_rafaga_y_recarga(reloj):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert all(bucket.acquire(max_wait=0) for _ in range(3))
+    assert not bucket.acquire(max_wait=0)
+    assert reloj.esperas == []
+
+    # Sin tokens espera lo justo para el siguiente (1 / rate)
+    assert bucket.acquire(max_wait=1)
+    assert reloj.esperas == [pytest.approx(0.5)]
+
+    # La recarga no supera la capacidad
+    reloj.ahora += 60
+    assert all(bucket.acquire(max_wait=0) for _ in range(3))
+    assert not bucket.acquire(max_wait=0)
+
+def test_bucket_no_espera_mas_que_max_wait(reloj):
+    bucket = TokenBucket(rate=0.5, capacity=1)
+    assert bucket.acquire(max_wait=0)
+    assert not bucket.acquire(max_wait=1.9)
+    assert reloj.esperas == []
+    assert bucket.acquire(max_wait=2)
+
+def test_bucket_sin_limite(reloj):
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire(max_wait=0) for _ in range(100))
+
+def test_breaker_ciclo_completo(reloj):
+    breaker = CircuitBreaker("host", failure_threshold=2, reset_timeout=10)
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CERRADO
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.ABIERTO
+
+    reloj.ahora += 9.9
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # Pasado reset_timeout deja salir una sola llamada de prueba
+    reloj.ahora += 0.1
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.SEMIABIERTO
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CERRADO
+    breaker.before_call()
+    breaker.before_call()
+
+def test_breaker_prueba_fallida_reabre(reloj):
+    breaker = CircuitBreaker("host", failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    reloj.ahora += 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.ABIERTO
+
+    # El reset_timeout se cuenta desde la prueba fallida
+    reloj.ahora += 4
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    reloj.ahora += 1
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.SEMIABIERTO
+
+def test_breaker_release_sin_token(reloj):
+    breaker = CircuitBreaker("host", failure_threshold=1, reset_timeout=5)
+    breaker.record_failure()
+    reloj.ahora += 5
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire(max_wait=0)
+
+    # La prueba no obtiene token: se libera sin llegar al host
+    breaker.before_call()
+    assert not bucket.acquire(max_wait=0)
+    breaker.release()
+    assert breaker.state == CircuitBreaker.SEMIABIERTO
+
+    # Con el token recargado, otra llamada puede hacer la prueba y cerrar el circuito
+    reloj.ahora += 1
+    breaker.before_call()
+    assert bucket.acquire(max_wait=0)
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CERRADO
@@ -0,0 +1,174 @@
+# src/test_single_flight.py
+import threading
+import pytest
+import requests_mock
+from config import Config
+from deadline import Deadline, DeadlineExceeded
+from api_clients import resilience
+from api_clients.http_client import fetch_json
+from api_clients import single_flight
+from api_clients.single_flight import SingleFlight, WaitTimeout, process_lock
+
+HILOS = 8
+
+def _en_paralelo(flight, funcion, timeout=None):
+    """Lanza HILOS llamadas con la misma clave; retorna {indice: (resultado, compartido) o excepción}"""
+    salidas = {}
+
+    def llamar(indice):
+        try:
+            salidas[indice] = flight.do("clave", funcion, timeout=timeout)
+        except Exception as e:
+            salidas[indice] = e
+
+    hilos = [threading.Thread(target=llamar, args=(i,)) for i in range(HILOS)]
+    for hilo in hilos:
+        hilo.start()
+    return hilos, salidas
+
+def _lider_bloqueado():
+    """Función que avisa cuando empezó y no termina hasta que se libera"""
+    empezo, liberar = threading.Event(), threading.Event()
+    llamadas = []
+
+    def funcion():
+        llamadas.append(1)
+        empezo.set()
+        assert liberar.wait(5)
+        return {"ok": True}
+
+    return funcion, empezo, liberar, llamadas
+
+class _EventoContado(threading.Event):
+    """Evento que cuenta cuántos hilos lo esperan"""
+    esperando = 0
+    _lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        with self._lock:
+            _EventoContado.esperando += 1
+        return super().wait(timeout)
+
+@pytest.fixture
+def esperando(monkeypatch):
+    """Cantidad de hilos esperando una llamada ajena (los eventos de _Call se cuentan)"""
+    monkeypatch.setattr(_EventoContado, "esperando", 0)
+    original = single_flight._Call.__init__
+
+    def init(call):
+        original(call)
+        call.evento = _EventoContado()
+
+    monkeypatch.setattr(single_flight._Call, "__init__", init)
+    return lambda: _EventoContado.esperando
+
+def _liberar_con_todos_esperando(esperando, liberar):
+    for _ in range(500):
+        if esperando() == HILOS - 1:
+            break
+        threading.Event().wait(0.01)
+    assert esperando() == HILOS - 1
+    liberar.set()
+
+def test_hilos_comparten_una_sola_llamada(esperando):
+    flight = SingleFlight()
+    funcion, empezo, liberar, llamadas = _lider_bloqueado()
+    hilos, salidas = _en_paralelo(flight, funcion)
+    assert empezo.wait(5)
+    _liberar_con_todos_esperando(esperando, liberar)
+    for hilo in hilos:
+        hilo.join(5)
+
+    assert len(llamadas) == 1
+    assert all(resultado == {"ok": True} for resultado, _ in salidas.values())
+    assert sum(1 for _, compartido in salidas.values() if not compartido) == 1
+    assert flight.in_flight() == 0
+
+def test_la_excepcion_llega_a_todos(esperando):
+    flight = SingleFlight()
+    empezo, liberar = threading.Event(), threading.Event()
+    error = ValueError("fallo del líder")
+
+    def funcion():
+        empezo.set()
+        assert liberar.wait(5)
+        raise error
+
+    hilos, salidas = _en_paralelo(flight, funcion)
+    assert empezo.wait(5)
+    _liberar_con_todos_esperando(esperando, liberar)
+    for hilo in hilos:
+        hilo.join(5)
+
+    assert len(salidas) == HILOS
+    # El líder recibe la original y cada hilo que esperaba su propia copia (con la original como causa)
+    assert sum(1 for salida in salidas.values() if salida is error) == 1
+    copias = [salida for salida in salidas.values() if salida is not error]
+    assert len({id(copia) for copia in copias}) == HILOS - 1
+    assert all(type(copia) is ValueError and copia.__cause__ is error for copia in copias)
+    assert flight.in_flight() == 0
+
+def test_quien_espera_respeta_su_timeout():
+    flight = SingleFlight()
+    funcion, empezo, liberar, llamadas = _lider_bloqueado()
+    lider = threading.Thread(target=flight.do, args=("clave", funcion))
+    lider.start()
+    assert empezo.wait(5)
+
+    with pytest.raises(WaitTimeout):
+        flight.do("clave", funcion, timeout=0.05)
+
+    liberar.set()
+    lider.join(5)
+    assert len(llamadas) == 1
+    assert flight.in_flight() == 0
+
+def test_bloqueos_de_claves_distintas_no_se_esperan(tmp_path):
+    claves = [f"https://api.example/clima?lat={i}" for i in range(200)]
+    with process_lock(claves[0], timeout=5, lock_dir=str(tmp_path)) as obtenido:
+        assert obtenido
+        for clave in claves[1:]:
+            with process_lock(clave, timeout=0, lock_dir=str(tmp_path)) as otro:
+                assert otro, clave
+
+@pytest.fixture
+def api_lenta(monkeypatch):
+    """API cuya respuesta tarda más que el timeout por intento (como tras esperar un token)"""
+    monkeypatch.setattr(Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "SINGLE_FLIGHT_ENABLED", True)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0)
+    resilience.reset()
+    empezo = threading.Event()
+
+    def responder(request, context):
+        empezo.set()
+        threading.Event().wait(0.3)
+        return {"ok": True}
+
+    with requests_mock.Mocker() as mock:
+        mock.get("https://api.example/lenta", json=responder)
+        yield empezo, mock
+    resilience.reset()
+
+def _lider_en_curso(empezo):
+    salida = {}
+    lider = threading.Thread(target=lambda: salida.update(datos=fetch_json("https://api.example/lenta", timeout=0.1)))
+    lider.start()
+    assert empezo.wait(5)
+    return lider, salida
+
+def test_quien_espera_no_se_rinde_antes_que_el_lider(api_lenta):
+    empezo, mock = api_lenta
+    lider, salida = _lider_en_curso(empezo)
+    assert fetch_json("https://api.example/lenta", timeout=0.1) == {"ok": True}
+    lider.join(5)
+    assert salida["datos"] == {"ok": True}
+    assert mock.call_count == 1
+
+def test_quien_espera_respeta_el_presupuesto(api_lenta):
+    empezo, mock = api_lenta
+    lider, _ = _lider_en_curso(empezo)
+    with pytest.raises(DeadlineExceeded):
+        fetch_json("https://api.example/lenta", timeout=0.1, deadline=Deadline(0.05))
+    lider.join(5)
+    assert mock.call_count == 1
@@ -0,0 +1,58 @@
+# src/test_weather_client.py
+import pytest
+import requests
+import requests_mock
+from config import Config
+from deadline import Deadline, DeadlineExceeded
+from api_clients import resilience
+from api_clients.weather_client import WeatherClient
+
+COORDS = [(4.6, -74.1), (-12.0, -77.0), (-0.2, -78.5), (3.4, -76.5)]
+
+@pytest.fixture
+def reloj(reloj, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RATE_LIMIT_PER_SECOND", 0)
+    resilience.reset()
+    yield reloj
+    resilience.reset()
+
+def test_no_consulta_con_el_presupuesto_agotado(reloj):
+    deadline = Deadline(1)
+    reloj.ahora += 1
+    with requests_mock.Mocker() as mock:
+        mock.get(Config.WEATHER_API_URL, json=[{}, {}])
+        with pytest.raises(DeadlineExceeded):
+            WeatherClient().get_weather_batch(COORDS, chunk_size=2, deadline=deadline)
+        assert mock.call_count == 0
+
+def test_deja_de_consultar_al_agotarse_el_presupuesto(reloj):
+    deadline = Deadline(10)
+
+    def lento(request, context):
+        # El lote falla después de consumir todo el presupuesto
+        reloj.ahora += 10
+        raise requests.Timeout("lento")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(Config.WEATHER_API_URL, json=lento)
+        with pytest.raises(DeadlineExceeded):
+            WeatherClient().get_weather_batch(COORDS, chunk_size=2, deadline=deadline)
+        # Solo el primer lote: ni respaldo individual ni segundo lote
+        assert mock.call_count == 1
+
+def test_timeout_de_cada_peticion_es_el_tiempo_restante(reloj):
+    deadline = Deadline(10)
+    timeouts = []
+
+    def responder(request, context):
+        timeouts.append(request.timeout)
+        reloj.ahora += 3
+        return [{"current": {}}, {"current": {}}]
+
+    with requests_mock.Mocker() as mock:
+        mock.get(Config.WEATHER_API_URL, json=responder)
+        datos = WeatherClient().get_weather_batch(COORDS, chunk_size=2, deadline=deadline)
+
+    assert len(datos) == 4
+    assert timeouts == [min(Config.HTTP_TIMEOUT, 10), min(Config.HTTP_TIMEOUT, 7)]